@@ -0,0 +1,160 @@
+from collections import Counter, defaultdict
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+from config import CORPUS_PATH
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "which", "with"
+}
+
+_index = None
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercases the text and splits it into word tokens, keeping numbers and dropping stopwords.
+    """
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Incremental inverted index over the chunks of the shared corpus.
+    Every document is persisted as its own postings file, so adding a document only writes that file.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.postings = defaultdict(dict)   # term -> {chunk_id: term frequency}
+        self.chunk_lengths = {}             # chunk_id -> token count
+        self.chunk_documents = {}           # chunk_id -> content hash
+        self.documents = defaultdict(list)  # content hash -> chunk ids
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        for name in os.listdir(self.index_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.index_dir, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._add(data["content_hash"], data["chunks"])
+
+    def _add(self, content_hash: str, chunks: dict) -> None:
+        # Documents without chunks are recorded too, so they are known to be indexed
+        self.documents.setdefault(content_hash, [])
+
+        for chunk_id, term_counts in chunks.items():
+            length = sum(term_counts.values())
+            self.chunk_lengths[chunk_id] = length
+            self.chunk_documents[chunk_id] = content_hash
+            self.documents[content_hash].append(chunk_id)
+            self.total_length += length
+
+            for term, count in term_counts.items():
+                self.postings[term][chunk_id] = count
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self.documents
+
+    def add_document(self, content_hash: str, chunk_ids: list[str], texts: list[str]) -> None:
+        """
+        Indexes the chunks of a document and persists its postings. Re-adding a document replaces it.
+        """
+        chunks = {chunk_id: Counter(tokenize(text)) for chunk_id, text in zip(chunk_ids, texts)}
+
+        with self._lock:
+            self._remove(content_hash)
+            self._add(content_hash, chunks)
+
+            path = os.path.join(self.index_dir, f"{content_hash}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"content_hash": content_hash, "chunks": chunks}, f)
+            os.replace(path + ".tmp", path)
+
+    def _remove(self, content_hash: str) -> None:
+        chunk_ids = self.documents.pop(content_hash, [])
+
+        for chunk_id in chunk_ids:
+            self.total_length -= self.chunk_lengths.pop(chunk_id)
+            self.chunk_documents.pop(chunk_id)
+
+        # The postings file knows which terms reference the removed chunks, an empty document has one as well
+        path = os.path.join(self.index_dir, f"{content_hash}.json")
+        if not os.path.exists(path):
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)["chunks"]
+
+        for chunk_id, term_counts in chunks.items():
+            for term in term_counts:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+        os.remove(path)
+
+    def remove_document(self, content_hash: str) -> None:
+        with self._lock:
+            self._remove(content_hash)
+
+    def search(self, query: str, k: int, documents: set = None) -> list[tuple[str, float]]:
+        """
+        Scores the chunks containing any query term with Okapi BM25.
+        Args:
+            query (str): The query string.
+            k (int): The number of chunks to return.
+            documents (set): Optional, the content hashes the search is restricted to.
+        Returns:
+            list: (chunk_id, score) tuples, best first.
+        """
+        with self._lock:
+            chunk_count = len(self.chunk_lengths)
+            if not chunk_count:
+                return []
+
+            average_length = self.total_length / chunk_count
+            scores = defaultdict(float)
+
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (chunk_count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+                for chunk_id, count in postings.items():
+                    if documents is not None and self.chunk_documents[chunk_id] not in documents:
+                        continue
+
+                    length = self.chunk_lengths[chunk_id]
+                    norm = count + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[chunk_id] += idf * count * (BM25_K1 + 1) / norm
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def get_bm25_index() -> BM25Index:
+    """
+    Returns the BM25 index of the shared corpus, loading it once per process.
+    """
+    global _index
+
+    if _index is None:
+        _index = BM25Index(os.path.join(CORPUS_PATH, "bm25"))
+    return _index
@@ -0,0 +1,118 @@
+from langchain_community.vectorstores import Chroma
+import os
+import shutil
+
+from config import CORPUS_PATH
+from .manifest import get_manifest
+
+CORPUS_COLLECTION = "corpus"
+
+_corpus_store = None
+
+
+def get_corpus_store(embeddings) -> Chroma:
+    """
+    Returns the Chroma collection of the shared corpus, opening it once per process.
+    Every document is embedded into this collection once, whichever session added it first.
+    """
+    global _corpus_store
+
+    if _corpus_store is None:
+        _corpus_store = Chroma(
+            collection_name=CORPUS_COLLECTION,
+            embedding_function=embeddings,
+            persist_directory=os.path.join(CORPUS_PATH, "chroma_db")
+        )
+    return _corpus_store
+
+
+def get_corpus_manifest():
+    """
+    Returns the manifest of the documents embedded into the shared corpus.
+    """
+    return get_manifest(CORPUS_PATH)
+
+
+def corpus_file_path(content_hash: str) -> str:
+    return os.path.join(CORPUS_PATH, "pdfs", f"{content_hash}.pdf")
+
+
+def store_pdf(file_path: str, content_hash: str) -> str:
+    """
+    Keeps a single copy of the PDF in the corpus and hardlinks the session file to it.
+    If hardlinks are not possible (e.g. another filesystem), the session keeps its own copy.
+    Args:
+        file_path (str): The path of the PDF inside the session directory.
+        content_hash (str): The content hash of the PDF.
+    Returns:
+        str: The path of the corpus copy.
+    """
+    corpus_path = corpus_file_path(content_hash)
+    os.makedirs(os.path.dirname(corpus_path), exist_ok=True)
+
+    if not os.path.exists(corpus_path):
+        try:
+            os.link(file_path, corpus_path)
+        except OSError:
+            shutil.copy2(file_path, corpus_path)
+        return corpus_path
+
+    if os.path.samefile(file_path, corpus_path):
+        return corpus_path
+
+    try:
+        tmp_path = file_path + ".link"
+        os.link(corpus_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except OSError as e:
+        print(f"Could not link {file_path} to the corpus copy, keeping both: {e}")
+
+    return corpus_path
+
+
+class SessionCorpusView:
+    """
+    The view of a session on the shared corpus. The session references documents by content hash
+    through its manifest, and searches are filtered to that document set.
+    Everything else is delegated to the shared Chroma collection.
+    """
+
+    def __init__(self, store: Chroma, session_path: str):
+        self.store = store
+        self.session_path = session_path
+        self.manifest = get_manifest(session_path)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def document_ids(self) -> list[str]:
+        return list(self.manifest.documents)
+
+    def allowed_documents(self, target: str = None) -> set:
+        """
+        Returns the content hashes a search may return, all of the session's documents or a single file's.
+        """
+        if target:
+            known = self.manifest.files.get(target)
+            return {known["hash"]} if known else set()
+
+        return set(self.manifest.documents)
+
+    def where(self, target: str = None):
+        """
+        Builds the Chroma filter of the session's documents, or of a single file of the session.
+        Returns None if the session has nothing to search.
+        """
+        document_ids = sorted(self.allowed_documents(target))
+
+        if not document_ids:
+            return None
+        if len(document_ids) == 1:
+            return {"content_hash": document_ids[0]}
+        return {"content_hash": {"$in": document_ids}}
+
+    def reset(self) -> None:
+        """
+        Detaches every document from the session, the shared corpus is left untouched.
+        """
+        self.manifest.clear()
@@ -0,0 +1,200 @@
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+import numpy as np
+import hashlib
+import json
+import os
+import re
+import threading
+
+from config import EMBEDDING_CACHE_PATH
+
+KEYS_FILE = "keys.txt"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta"
+
+_caches = {}
+
+
+def text_hash(text: str) -> str:
+    """
+    Returns the sha256 hex digest of the text, used as the cache key.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, append-only store of embeddings for one embedder.
+    Vectors are kept as raw float32 rows that are memory-mapped for reads,
+    the keys file holds the text hash of every row in the same order.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.keys_path = os.path.join(cache_dir, KEYS_FILE)
+        self.vectors_path = os.path.join(cache_dir, VECTORS_FILE)
+        self.meta_path = os.path.join(cache_dir, META_FILE)
+
+        self.dim = None
+        self.rows = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+
+        with open(self.meta_path, "r") as f:
+            self.dim = json.load(f)["dim"]
+
+        if not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return
+
+        with open(self.keys_path, "rb") as f:
+            data = f.read()
+
+        # Keys are written after their rows, a torn write can leave a partial last key without its newline
+        keys = data.decode("utf-8", errors="replace").split("\n")[:-1]
+
+        row_bytes = 4 * self.dim
+        complete_rows = min(len(keys), os.path.getsize(self.vectors_path) // row_bytes)
+
+        # Both files are cut back to the complete rows, so the next append continues on a clean line and row
+        keys_bytes = sum(len(key.encode("utf-8")) + 1 for key in keys[:complete_rows])
+        if len(data) != keys_bytes:
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(keys_bytes)
+
+        if os.path.getsize(self.vectors_path) != complete_rows * row_bytes:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(complete_rows * row_bytes)
+
+        for row, key in enumerate(keys[:complete_rows]):
+            self.rows[key] = row
+
+    def _vectors(self) -> np.memmap:
+        if self._mmap is None or len(self._mmap) < len(self.rows):
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                   shape=(os.path.getsize(self.vectors_path) // (4 * self.dim), self.dim))
+        return self._mmap
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get_many(self, keys: list[str]) -> list:
+        """
+        Returns the cached vector for every key, or None for the misses.
+        """
+        with self._lock:
+            if not self.rows:
+                return [None] * len(keys)
+
+            vectors = self._vectors()
+            return [vectors[self.rows[key]].tolist() if key in self.rows else None for key in keys]
+
+    def put_many(self, keys: list[str], vectors: list) -> None:
+        """
+        Appends the new vectors to the store, keys that are already cached are skipped.
+        """
+        with self._lock:
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.rows and key not in new:
+                    new[key] = vector
+
+            if not new:
+                return
+
+            array = np.asarray(list(new.values()), dtype=np.float32)
+
+            if self.dim is None:
+                self.dim = array.shape[1]
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            with open(self.keys_path, "a") as f:
+                f.write("".join(key + "\n" for key in new))
+
+            start = len(self.rows)
+            for offset, key in enumerate(new):
+                self.rows[key] = start + offset
+
+
+def get_embedding_cache(embedder_name: str, cache_path: str = EMBEDDING_CACHE_PATH) -> EmbeddingCache:
+    """
+    Returns the process-wide cache of the embedder, shared by all sessions.
+    """
+    if embedder_name not in _caches:
+        cache_dir = os.path.join(cache_path, re.sub(r"[^\w.-]", "_", embedder_name))
+        _caches[embedder_name] = EmbeddingCache(cache_dir)
+    return _caches[embedder_name]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that looks up the embedding cache before calling the underlying embedder.
+    Only the cache misses are embedded, in a single batch.
+    """
+
+    def __init__(self, embeddings: Embeddings, embedder_name: str, batch_queries: bool = None):
+        """
+        Args:
+            embeddings: The underlying embedder.
+            embedder_name (str): The name the cache of the embedder is stored under.
+            batch_queries (bool): If True, several queries are embedded like documents in one batch,
+                by default only for HuggingFaceEmbeddings, which embeds queries exactly like documents.
+        """
+        self.embeddings = embeddings
+        self.embedder_name = embedder_name
+        self.batch_queries = isinstance(embeddings, HuggingFaceEmbeddings) if batch_queries is None else batch_queries
+        self.cache = get_embedding_cache(embedder_name)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _embed(self, texts: list[str], keys: list[str], embed_fn) -> list[list[float]]:
+        vectors = self.cache.get_many(keys)
+
+        # Repeated texts in the same batch are embedded once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], i)
+
+        with self._stats_lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = [list(vector) for vector in embed_fn([texts[i] for i in missing.values()])]
+            self.cache.put_many(list(missing), computed)
+
+            by_key = dict(zip(missing, computed))
+            vectors = [vector if vector is not None else by_key[key] for key, vector in zip(keys, vectors)]
+
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, [text_hash(text) for text in texts], self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds several queries with one embedder call for the cache misses.
+        """
+        # Queries get their own keys, embedders may use a query prefix or instruction
+        return self._embed(texts, [text_hash("query:" + text) for text in texts], self._embed_query_batch)
+
+    def _embed_query_batch(self, texts: list[str]) -> list[list[float]]:
+        # Embedders that embed queries like documents take the whole batch in one forward pass
+        if len(texts) > 1 and self.batch_queries:
+            return self.embeddings.embed_documents(texts)
+        return [self.embeddings.embed_query(text) for text in texts]
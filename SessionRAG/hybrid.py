@@ -0,0 +1,85 @@
+from config import HYBRID_FETCH_K, HYBRID_DENSE_WEIGHT, HYBRID_BM25_WEIGHT, HYBRID_RRF_K
+from .bm25 import get_bm25_index
+
+
+def fuse_rankings(dense_ids: list[str], bm25_ids: list[str],
+                  dense_weight: float = HYBRID_DENSE_WEIGHT,
+                  bm25_weight: float = HYBRID_BM25_WEIGHT,
+                  rrf_k: int = HYBRID_RRF_K) -> list[tuple[str, float]]:
+    """
+    Fuses the dense and BM25 rankings with weighted reciprocal rank fusion.
+    Rank-based fusion does not need the cosine distances and BM25 scores to be on the same scale.
+    Returns:
+        list: (chunk_id, fused score) tuples, best first.
+    """
+    scores = {}
+
+    for rank, chunk_id in enumerate(dense_ids):
+        scores[chunk_id] = scores.get(chunk_id, 0.0) + dense_weight / (rrf_k + rank + 1)
+
+    for rank, chunk_id in enumerate(bm25_ids):
+        scores[chunk_id] = scores.get(chunk_id, 0.0) + bm25_weight / (rrf_k + rank + 1)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def embed_queries(embeddings, queries: list[str]) -> list[list[float]]:
+    """
+    Embeds all queries in one batch if the embedder supports it (see CachedEmbeddings.embed_queries).
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(queries)
+    return [embeddings.embed_query(query) for query in queries]
+
+
+def hybrid_search_many(vectorstore, queries: list[str], k: int, target: str = None,
+                       fetch_k: int = HYBRID_FETCH_K) -> list[list[tuple[str, str]]]:
+    """
+    Retrieves chunks of the session's documents with both dense similarity and BM25,
+    so exact terms like equation or author names are found even if the embedding misses them.
+    All queries are embedded in one batch and sent to Chroma in a single query call.
+    Args:
+        vectorstore: The session's view on the shared corpus.
+        queries (list[str]): The query strings.
+        k (int): The number of chunks to return per query.
+        target (str): Optional, a file of the session to restrict the search to.
+        fetch_k (int): The number of candidates fetched from each retriever.
+    Returns:
+        list: For every query, (chunk_id, text) tuples, best first.
+    """
+    documents = vectorstore.allowed_documents(target)
+
+    if not documents or not queries:
+        return [[] for _ in queries]
+
+    dense = vectorstore._collection.query(query_embeddings=embed_queries(vectorstore.embeddings, queries),
+                                          n_results=fetch_k,
+                                          where=vectorstore.where(target),
+                                          include=["documents"])
+
+    texts = {}
+    for ids, chunk_texts in zip(dense["ids"], dense["documents"]):
+        texts.update(zip(ids, chunk_texts))
+
+    bm25 = get_bm25_index()
+    tops = []
+
+    for query, dense_ids in zip(queries, dense["ids"]):
+        bm25_ids = [chunk_id for chunk_id, _ in bm25.search(query, fetch_k, documents)]
+        tops.append([chunk_id for chunk_id, _ in fuse_rankings(dense_ids, bm25_ids)[:k]])
+
+    # Chunks only found by BM25 are fetched in a single call for all queries
+    missing = list({chunk_id for top in tops for chunk_id in top if chunk_id not in texts})
+    if missing:
+        fetched = vectorstore._collection.get(ids=missing, include=["documents"])
+        texts.update(zip(fetched["ids"], fetched["documents"]))
+
+    return [[(chunk_id, texts[chunk_id]) for chunk_id in top if chunk_id in texts] for top in tops]
+
+
+def hybrid_search(vectorstore, query: str, k: int, target: str = None,
+                  fetch_k: int = HYBRID_FETCH_K) -> list[tuple[str, str]]:
+    """
+    Single query version of hybrid_search_many.
+    """
+    return hybrid_search_many(vectorstore, [query], k=k, target=target, fetch_k=fetch_k)[0]
@@ -0,0 +1,209 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import time
+
+from config import (CHUNK_SIZE, CHUNK_OVERLAP, INGEST_MAX_WORKERS,
+                    INGEST_EMBED_BATCH_SIZE, INGEST_WRITE_BATCH_SIZE)
+
+_pool = None
+
+
+def load_and_split(file_path: str,
+                   source: str,
+                   content_hash: str,
+                   chunk_size: int = CHUNK_SIZE,
+                   chunk_overlap: int = CHUNK_OVERLAP) -> dict:
+    """
+    Loads a single PDF and splits it into chunks. Runs inside the worker processes,
+    so it only returns plain python objects to keep pickling cheap.
+    Args:
+        file_path (str): The path of the PDF file.
+        source (str): The name stored as the "source" metadata of every chunk.
+        content_hash (str): The content hash of the file, used for the chunk ids and metadata.
+        chunk_size (int): The chunk size of the text splitter.
+        chunk_overlap (int): The chunk overlap of the text splitter.
+    Returns:
+        dict: The page count, the chunks as (text, metadata) tuples and the stage timings.
+    """
+    from langchain.document_loaders import PyMuPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    start = time.perf_counter()
+
+    docs = PyMuPDFLoader(file_path).load()
+
+    for doc in docs:
+        doc.metadata["source"] = source
+        doc.metadata["content_hash"] = content_hash
+
+    loaded = time.perf_counter()
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    splits = text_splitter.split_documents(docs)
+
+    return {
+        "source": source,
+        "content_hash": content_hash,
+        "pages": len(docs),
+        "chunks": [(split.page_content, split.metadata) for split in splits],
+        "extract_s": loaded - start,
+        "split_s": time.perf_counter() - loaded
+    }
+
+
+def get_pool(max_workers: int = INGEST_MAX_WORKERS) -> ProcessPoolExecutor:
+    """
+    Returns the shared ingestion process pool, creating it on first use.
+    The pool uses "spawn" so the workers do not inherit the loaded embedder and torch threads.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Shuts down the shared ingestion process pool.
+    """
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _new_stats() -> dict:
+    return {
+        "files": 0,
+        "pages": 0,
+        "chunks": 0,
+        "embeddings": 0,
+        "extract_s": 0.0,
+        "split_s": 0.0,
+        "embed_s": 0.0,
+        "write_s": 0.0,
+        "wall_s": 0.0,
+    }
+
+
+def _rate(items: int, seconds: float) -> float:
+    return items / seconds if seconds > 0 else 0.0
+
+
+def format_ingestion_stats(stats: dict) -> str:
+    """
+    Formats the ingestion statistics into a single log line.
+    Extraction and splitting rates are per worker, embedding and writing rates are for the main process.
+    """
+    return (f"Ingested {stats['files']} files in {stats['wall_s']:.2f}s | "
+            f"pages/s: {_rate(stats['pages'], stats['extract_s']):.1f} | "
+            f"chunks/s: {_rate(stats['chunks'], stats['split_s']):.1f} | "
+            f"embeddings/s: {_rate(stats['embeddings'], stats['embed_s']):.1f} | "
+            f"writes/s: {_rate(stats['embeddings'], stats['write_s']):.1f}")
+
+
+def _embed_and_write(vectorstore, chunks: list, content_hash: str, stats: dict,
+                     embed_batch_size: int,
+                     write_batch_size: int) -> None:
+    """
+    Embeds the chunks in large batches and writes them to the Chroma collection in bulk.
+    Chunk ids are derived from the content hash, so writing the same document twice is idempotent.
+    """
+    embedder = vectorstore.embeddings
+
+    for start in range(0, len(chunks), write_batch_size):
+        batch = chunks[start:start + write_batch_size]
+        texts = [text for text, _ in batch]
+
+        embed_start = time.perf_counter()
+        vectors = []
+        for i in range(0, len(texts), embed_batch_size):
+            vectors.extend(embedder.embed_documents(texts[i:i + embed_batch_size]))
+        stats["embed_s"] += time.perf_counter() - embed_start
+        stats["embeddings"] += len(vectors)
+
+        write_start = time.perf_counter()
+        vectorstore._collection.upsert(
+            ids=[f"{content_hash}:{start + i}" for i in range(len(batch))],
+            embeddings=vectors,
+            metadatas=[metadata for _, metadata in batch],
+            documents=texts
+        )
+        stats["write_s"] += time.perf_counter() - write_start
+
+
+def ingest_pdfs(vectorstore,
+                files: list[tuple[str, str, str]],
+                max_workers: int = INGEST_MAX_WORKERS,
+                embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+                write_batch_size: int = INGEST_WRITE_BATCH_SIZE,
+                bm25_index=None,
+                debug: bool = False) -> tuple[dict, dict]:
+    """
+    Ingests PDFs into the vector store. Pages are extracted and split across a process pool,
+    while the main process embeds and writes the chunks of the files that are already done.
+    Args:
+        vectorstore: The Chroma vector store to write to.
+        files (list): A list of (file_path, source, content_hash) tuples.
+        max_workers (int): The number of extraction processes, 1 runs everything inline.
+        embed_batch_size (int): The number of chunks per embedder call.
+        write_batch_size (int): The number of chunks per Chroma write.
+        bm25_index: Optional, the BM25 index that is updated with the written chunks.
+        debug (bool): If True, enables debug mode for additional logging.
+    Returns:
+        tuple: The chunk count of every ingested source and the ingestion statistics.
+    """
+    stats = _new_stats()
+    ingested = {}
+
+    if not files:
+        return ingested, stats
+
+    wall_start = time.perf_counter()
+
+    def consume(result: dict) -> None:
+        _embed_and_write(vectorstore, result["chunks"], result["content_hash"], stats,
+                         embed_batch_size, write_batch_size)
+
+        if bm25_index is not None:
+            bm25_index.add_document(result["content_hash"],
+                                    [f"{result['content_hash']}:{i}" for i in range(len(result["chunks"]))],
+                                    [text for text, _ in result["chunks"]])
+
+        stats["files"] += 1
+        stats["pages"] += result["pages"]
+        stats["chunks"] += len(result["chunks"])
+        stats["extract_s"] += result["extract_s"]
+        stats["split_s"] += result["split_s"]
+        ingested[result["source"]] = len(result["chunks"])
+
+        if debug:
+            print(f"✅ Added {result['source']} to RAG system ({result['pages']} pages, {len(result['chunks'])} chunks).")
+
+    # A pool is not worth spawning for a single file
+    if max_workers <= 1 or len(files) == 1:
+        for file_path, source, content_hash in files:
+            try:
+                consume(load_and_split(file_path, source, content_hash))
+            except Exception as e:
+                print(f"❌ Error while ingesting {source}: {e}")
+
+    else:
+        pool = get_pool(max_workers=max_workers)
+        futures = {pool.submit(load_and_split, file_path, source, content_hash): source
+                   for file_path, source, content_hash in files}
+
+        for future in as_completed(futures):
+            try:
+                consume(future.result())
+            except Exception as e:
+                print(f"❌ Error while ingesting {futures[future]}: {e}")
+
+    stats["wall_s"] = time.perf_counter() - wall_start
+
+    print(format_ingestion_stats(stats))
+
+    return ingested, stats
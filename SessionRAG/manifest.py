@@ -0,0 +1,162 @@
+from config import ADDED_FILES, EMBEDDER_MODEL_NAME, CHUNK_SIZE, CHUNK_OVERLAP
+from datetime import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+MANIFEST_FILE = "manifest.json"
+
+# Chunks are only reusable if they were produced by the same embedder and splitter settings
+EMBEDDER_VERSION = f"{EMBEDDER_MODEL_NAME}|{CHUNK_SIZE}|{CHUNK_OVERLAP}"
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the sha256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Per-session record of the files that are embedded into the vector store.
+    Files are tracked by name with their size and mtime, documents are tracked by content hash,
+    so a renamed copy of an already embedded file is recognized without embedding it again.
+    """
+
+    def __init__(self, session_path: str):
+        self.session_path = session_path
+        self.path = os.path.join(session_path, "utils", MANIFEST_FILE)
+        self.files = {}
+        self.documents = {}
+        # Sessions ingest in parallel, and the corpus manifest is shared by all of them
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.documents = data.get("documents", {})
+            return
+
+        self._migrate_added_files()
+
+    def _migrate_added_files(self):
+        """Imports the legacy added_files.txt of older sessions, their chunk counts are unknown."""
+        added_files_path = os.path.join(self.session_path, ADDED_FILES)
+
+        if not os.path.exists(added_files_path):
+            return
+
+        with open(added_files_path, "r") as f:
+            names = set(f.read().splitlines())
+
+        for name in names:
+            file_path = os.path.join(self.session_path, name)
+            if name and os.path.isfile(file_path):
+                self.record(name, file_path, chunks=None)
+
+        self.save()
+
+    def content_hash(self, name: str, file_path: str) -> str:
+        """
+        Returns the content hash of the file, reusing the stored hash if size and mtime are unchanged.
+        """
+        stat = os.stat(file_path)
+        known = self.files.get(name)
+
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            return known["hash"]
+
+        return hash_file(file_path)
+
+    def is_added(self, content_hash: str) -> bool:
+        """
+        Checks if a document with this content was already embedded with the current embedder.
+        """
+        document = self.documents.get(content_hash)
+        return document is not None and document["embedder"] == EMBEDDER_VERSION
+
+    def record(self, name: str, file_path: str, chunks: int = None, content_hash: str = None) -> str:
+        """
+        Records the file under its name and its content hash. Does not write to disk, call save().
+        Args:
+            name (str): The file name inside the session directory.
+            file_path (str): The path of the file.
+            chunks (int): The number of chunks embedded for the document, None keeps the known value.
+            content_hash (str): Optional, the already computed content hash.
+        Returns:
+            str: The content hash of the file.
+        """
+        stat = os.stat(file_path)
+        content_hash = content_hash or hash_file(file_path)
+
+        with self._lock:
+            self.files[name] = {"hash": content_hash, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+            document = self.documents.setdefault(content_hash, {
+                "size": stat.st_size,
+                "chunks": None,
+                "embedder": EMBEDDER_VERSION,
+                "added": datetime.now().isoformat()
+            })
+            if chunks is not None:
+                document["chunks"] = chunks
+                document["embedder"] = EMBEDDER_VERSION
+
+        return content_hash
+
+    def clear(self):
+        """Forgets every file and document and saves the empty manifest."""
+        with self._lock:
+            self.files.clear()
+            self.documents.clear()
+            self.save()
+
+    def save(self):
+        """Writes the manifest atomically, through a temporary file of its own per call."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with self._lock:
+            data = json.dumps({"files": self.files, "documents": self.documents}, ensure_ascii=False)
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=MANIFEST_FILE, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+
+def get_manifest(session_path: str) -> IngestionManifest:
+    """
+    Returns the manifest of the session, loading it from disk only once per process.
+    """
+    key = os.path.abspath(session_path)
+
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = IngestionManifest(session_path)
+        return _manifests[key]
+
+
+def drop_manifest(session_path: str) -> None:
+    """
+    Forgets the cached manifest of the session, e.g. after the session is deleted.
+    """
+    with _manifests_lock:
+        _manifests.pop(os.path.abspath(session_path), None)
@@ -1,22 +1,23 @@
 from langchain_core.documents import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.in_memory import InMemoryDocstore
 import os
+import threading
 import faiss
 
 from config import MAIN_PATH
 from .setup_emb import setup_embedder
-from .rag_utils import mark_as_added, is_file_added
+from .manifest import get_manifest
+from .ingest import ingest_pdfs
+from .corpus import SessionCorpusView, get_corpus_store, get_corpus_manifest, store_pdf
+from .bm25 import get_bm25_index
+from .hybrid import hybrid_search_many
 
-from langchain_community.vectorstores import Chroma
+from utils import create_session_id, create_session_directory, tool_error
 
-from utils import create_session_id, create_session_directory
-
-
-ADDED_FILES = "added_files.txt"
+# Serializes ingestion into the shared corpus, add_to_rag runs from uploads, post-turn ingestion and agentic downloads
+_corpus_lock = threading.Lock()
 
 def init_rag(embedding = None, session_id = None) -> tuple:
     """
@@ -27,7 +28,7 @@ def init_rag(embedding = None, session_id = None) -> tuple:
         embedding: Optional, a pre-initialized embedding model.
         session_id: Optional, a pre-defined session ID.
     Returns:
-        tuple: A tuple containing the vector store and embeddings.
+        tuple: A tuple containing the session's view on the shared corpus and the embeddings.
     """
     if embedding is None:
         print("Initializing the embedder...")
@@ -58,135 +59,193 @@ def init_rag(embedding = None, session_id = None) -> tuple:
     """
     session_path = create_session_directory(session_id=session_id)
 
-    persist_directory = f"./{session_path}/utils/chroma_db"
-
-    # Chroma vectorstore alternative initialization
-    chroma_vectorstore = Chroma(
-        collection_name=f"chat_{session_id}",
-        embedding_function=embeddings,
-        persist_directory=persist_directory  # Directory to store the collection
-    )
-    
-    vectorstore = chroma_vectorstore
+    # All sessions share one deduplicated corpus collection, a session only sees its own documents
+    vectorstore = SessionCorpusView(get_corpus_store(embeddings), session_path)
 
     print(f"RAG system initialized with session ID: {session_id}")
-    print(f"Documents:{vectorstore.get()['documents']}")
-    print(f"metadatas:{vectorstore.get()['metadatas']}")
+    print(f"Collection stats: {collection_stats(vectorstore, session_path)}")
 
 
     return vectorstore, embeddings
 
 
+def collection_stats(vectorstore, session_path: str) -> dict:
+    """
+    Returns the size of the session's view and of the shared corpus without materializing any chunks.
+    The session counts come from the session manifest, the corpus size is a single count query.
+    Args:
+        vectorstore: The session's view on the shared corpus.
+        session_path: The path to the session directory.
+    Returns:
+        dict: The number of chunks, documents and files of the session, and the corpus chunk count.
+    """
+    manifest = get_manifest(session_path)
+
+    return {
+        "chunks": sum(document["chunks"] or 0 for document in manifest.documents.values()),
+        "documents": len(manifest.documents),
+        "files": len(manifest.files),
+        "corpus_chunks": vectorstore._collection.count()
+    }
+
+
 def add_to_rag(vectorstore, 
                session_path: str,
-               debug: bool = False) -> None:
+               debug: bool = False) -> dict:
     """
-    Adds new documents to the existing FAISS vector store.
+    Adds the session's new documents to its view on the shared corpus.
+    Documents already in the corpus are only referenced, the rest are extracted and split in parallel,
+    then embedded and written in batches.
     Args:
-        vectorstore: The vector store to add documents to.
+        vectorstore: The session's view on the shared corpus.
         session_path: The path to the session directory containing PDF files.
         debug: If True, enables debug mode for additional logging.
     Returns:
-        None
+        dict: The ingestion statistics, see SessionRAG.ingest.ingest_pdfs.
     """
     files = os.listdir(session_path)
 
     if not files:
         print("No PDF files found in the specified directory, Skipping...")
-        return
+        return {}
     try:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        # The corpus check, ingestion and manifest updates of one session at a time, so two sessions never
+        # embed the same new document twice or delete the chunks of a document another one is writing
+        with _corpus_lock:
+            manifest = get_manifest(session_path)
+            corpus = get_corpus_manifest()
+            bm25 = get_bm25_index()
+            pending = {}
+            aliases = []
 
-        for file in files:
+            for file in files:
 
-            if is_file_added(file_name=file, 
-                             session_path=session_path,):
-                
-                if debug:
-                    print("✅ File already added to RAG system, Skipping...")
+                if not file.endswith('.pdf'):
+                    continue
 
-                continue
+                file_path = os.path.join(session_path, file)
+                content_hash = manifest.content_hash(file, file_path)
 
-            if file.endswith('.pdf'):
+                if corpus.is_added(content_hash):
+                    # Already embedded by this or another session, or a renamed copy (e.g. "_2" uploads)
+                    if file not in manifest.files or not manifest.is_added(content_hash):
+                        store_pdf(file_path, content_hash)
+                        manifest.record(file, file_path,
+                                        chunks=corpus.documents[content_hash]["chunks"],
+                                        content_hash=content_hash)
 
-                loader = PyMuPDFLoader(os.path.join(session_path, file))
-                docs = loader.load()
+                    if debug:
+                        print(f"✅ {file} already added to RAG system, Skipping...")
 
-                for doc in docs:
-                    doc.metadata["source"] = file
+                    continue
 
-                splits = text_splitter.split_documents(docs)
+                if content_hash in pending:
+                    aliases.append((file_path, file, content_hash))
+                    continue
 
-                vectorstore.add_documents(splits)
-                mark_as_added(file, session_path)
+                if content_hash in corpus.documents:
+                    # Embedded with an older embedder or splitter, the stale chunks are replaced
+                    vectorstore._collection.delete(where={"content_hash": content_hash})
+                    bm25.remove_document(content_hash)
 
-                if debug:
-                    print(f"✅ Added {file} to RAG system.")
+                pending[content_hash] = (file_path, file, content_hash)
+
+            ingested, stats = ingest_pdfs(vectorstore, list(pending.values()), bm25_index=bm25, debug=debug)
+
+            for file_path, file, content_hash in pending.values():
+                if file in ingested:
+                    corpus_path = store_pdf(file_path, content_hash)
+                    corpus.record(os.path.basename(corpus_path), corpus_path,
+                                  chunks=ingested[file], content_hash=content_hash)
+                    manifest.record(file, file_path, chunks=ingested[file], content_hash=content_hash)
+
+            for file_path, file, content_hash in aliases:
+                if corpus.is_added(content_hash):
+                    store_pdf(file_path, content_hash)
+                    manifest.record(file, file_path, chunks=corpus.documents[content_hash]["chunks"],
+                                    content_hash=content_hash)
+
+            corpus.save()
+            manifest.save()
+
+            # Documents embedded before the BM25 index existed are indexed from their stored chunks
+            for content_hash in corpus.documents:
+                if content_hash not in bm25:
+                    stored = vectorstore._collection.get(where={"content_hash": content_hash}, include=["documents"])
+                    bm25.add_document(content_hash, stored["ids"], stored["documents"])
+
+            return stats
 
     except Exception as e:
         print(f"❌ Error while adding files to RAG system: {e}")
         raise e
     
 def similarity_search(vectorstore, 
-                      query: str, 
+                      query: str | list[str], 
                       target:str = None, 
                       k: int = 4,
                       debug: bool = False) -> str:
     """
-    Performs a similarity search on the specified vector store.
+    Performs a hybrid (dense + BM25) search on the session's documents.
+    Several queries can be searched at once, they are embedded and searched in one batch.
     Args:
-        vectorstore: The vector store to search in.
-        query (str): The query string to search for.
+        vectorstore: The session's view on the shared corpus.
+        query (str | list[str]): The query string, or a list of query strings, to search for.
         target (str): Optional, a specific document to filter results by.
-        k (int): The number of results to return. Default is 4.
+        k (int): The number of results to return per query. Default is 4.
         debug (bool): If True, enables debug mode for additional logging.
     Returns:
-        str: A shortened response based on the search results. 
+        str: A shortened response based on the search results, grouped by query for multiple queries. 
     """
-    if not query: 
-        return "❌ ERROR: Query cannot be empty."
+    queries = [q.strip() for q in query if q and q.strip()] if isinstance(query, list) else [query]
+
+    if not queries or not queries[0]: 
+        return tool_error("Query cannot be empty.")
     
     try:
         if target: 
             if debug: print(f"Target: {target}\n")
-
-            results = vectorstore.similarity_search(query=query,
-                                                        k=k,
-                                                        filter={"source":target})
             short = 300
             
         else:
             if debug: print("No target specified, searching across all documents.")
-
-            results = vectorstore.similarity_search(query=query, 
-                                                    k=k)
             short = 600
-            
-        results_summary = "\n".join(
-            [f"- {doc.page_content[:short].strip()}" for doc in results]
-            )
 
-        #if debug: print(f"Type: {type(results[0])}\n Results: {results}\n")
+        # Dense and BM25 results are fused, an empty session (or unknown target) returns nothing
+        results = hybrid_search_many(vectorstore, queries=queries, k=k, target=target)
+
+        if len(queries) == 1:
+            return "\n".join([f"- {text[:short].strip()}" for _, text in results[0]])
+
+        # Chunks retrieved by several queries are only shown under the first one
+        seen = set()
+        groups = []
+
+        for i, (q, query_results) in enumerate(zip(queries, results), start=1):
+            lines = [f"- {text[:short].strip()}" for chunk_id, text in query_results if chunk_id not in seen]
+            seen.update(chunk_id for chunk_id, _ in query_results)
 
-        ## Format results for better readability for the model. Summarizes the content
+            if not lines:
+                lines = ["- (no new results, see the results above)" if query_results else "- (no results)"]
 
+            groups.append(f"Query {i}: {q}\n" + "\n".join(lines))
 
-        return results_summary
+        return "\n\n".join(groups)
 
     except Exception as e:
-        return f"❌ Error during similarity search: {e}"
+        return tool_error(f"Similarity search failed: {e}")
 
 def reset_rag(vectorstore) -> None:
     """
-    Resets the RAG system by clearing the vector store.
+    Resets the session's RAG system by detaching its documents.
+    The shared corpus is left untouched, other sessions may reference the same documents.
     Args:
-        vectorstore: The vector store to reset.
+        vectorstore: The session's view on the shared corpus.
     Returns:
         None
     """
     try:
-        # Delete the collection if it exists
-        vectorstore.delete_collection()
+        vectorstore.reset()
         print("RAG system reset successfully.")
     except Exception as e:
         if "does not exist" in str(e):
@@ -1,6 +1,7 @@
 from huggingface_hub import snapshot_download
 from config import EMBEDDER_MODEL_NAME
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from .embedding_cache import CachedEmbeddings
 
 _embedder_cache = None
 
@@ -17,7 +18,7 @@ def setup_embedder():
     """
     Sets up the RAG (Retrieval-Augmented Generation) environment by downloading the embedding model if not already cached.
     Returns:
-        HuggingFaceEmbeddings: The initialized embedding model.
+        CachedEmbeddings: The initialized embedding model, wrapped by the embedding cache.
     """
     global _embedder_cache
     
@@ -30,6 +31,9 @@ def setup_embedder():
     print("RAG environment setup complete.")
 
     embeddings = HuggingFaceEmbeddings(model_name=EMBEDDER_MODEL_NAME, model_kwargs={"device":"cpu"})
+
+    # Every chunk and query embedding goes through the on-disk cache shared by all sessions
+    embeddings = CachedEmbeddings(embeddings, embedder_name=EMBEDDER_MODEL_NAME)
     _embedder_cache = embeddings
 
     return embeddings
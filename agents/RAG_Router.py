@@ -1,10 +1,30 @@
 ## File: phi_delta/agents/router.py
 
-from config import TOOL_DESCRIPTIONS
+from config import TOOL_DESCRIPTIONS, ROUTER_STREAM_DECISIONS, CONTEXT_TOOL_OUTPUT_MAX_TOKENS
 from prompts import RAG_ROUTER_PROMPT_TEMPLATE
 from memory.memory import AgentMemory
+from parsers.parse_router import RAG_ROUTE_CHOICES
+from .core.decision_stream import stream_until_decision, astream_until_decision
+from .core.context_budget import Section, build_prompt
 
-def run_RAG_router(reasoning_llm, query: str, response: str = "", debug: bool = False) -> str:
+def _RAG_router_messages(query: str, response: str = "", debug: bool = False) -> list:
+    # The start of the draft is enough to judge it
+    RAG_router_prompt = build_prompt(RAG_ROUTER_PROMPT_TEMPLATE, [
+        Section("response", response, CONTEXT_TOOL_OUTPUT_MAX_TOKENS)
+    ], question=query)
+    
+    if debug:
+        print(f"RAG Router Prompt: {RAG_router_prompt}\n")
+
+    return [
+
+            {"role": "system", "content": "You are a router agent deciding rather you should escalate or end the process."},
+            {"role": "user", "content": f"{RAG_router_prompt}"}
+
+        ]
+
+def run_RAG_router(reasoning_llm, query: str, response: str = "", debug: bool = False,
+                   stream: bool = ROUTER_STREAM_DECISIONS) -> str:
     """
     Routes the query to the appropriate agent based on the context and response.
     Args:
@@ -12,19 +32,29 @@ def run_RAG_router(reasoning_llm, query: str, response: str = "", debug: bool =
         query (str): The query to be routed.
         response (str): The response from the previous agent or context.
         debug (bool): If True, enables debug mode for additional logging.
+        stream (bool): If True, the generation is stopped as soon as the decision is parsed.
     Returns:
         str: The response from the routing agent.
     """
-    RAG_router_prompt = RAG_ROUTER_PROMPT_TEMPLATE.format(question=query, response=response)
+    messages = _RAG_router_messages(query, response, debug)
+
+    if stream:
+        return stream_until_decision(reasoning_llm, messages, RAG_ROUTE_CHOICES, debug=debug)
+
+    result = reasoning_llm.invoke(messages)
     
-    if debug:
-        print(f"RAG Router Prompt: {RAG_router_prompt}\n")
+    return result.content
 
-    result = reasoning_llm.invoke([
+async def arun_RAG_router(reasoning_llm, query: str, response: str = "", debug: bool = False,
+                          stream: bool = ROUTER_STREAM_DECISIONS) -> str:
+    """
+    Async version of run_RAG_router, does not block the event loop while the model generates.
+    """
+    messages = _RAG_router_messages(query, response, debug)
 
-            {"role": "system", "content": "You are a router agent deciding rather you should escalate or end the process."},
-            {"role": "user", "content": f"{RAG_router_prompt}"}
+    if stream:
+        return await astream_until_decision(reasoning_llm, messages, RAG_ROUTE_CHOICES, debug=debug)
 
-        ])
+    result = await reasoning_llm.ainvoke(messages)
     
-    return result.content
\ No newline at end of file
+    return result.content
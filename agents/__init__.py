@@ -4,17 +4,18 @@ from .critic import run_critic
 from .evaluator import run_evaluator
 from .planner import run_planner
 from .quickresponse import run_quickresponse
-from .router import run_router
-from .summarizer import run_summarizer
+from .router import run_router, arun_router
+from .summarizer import run_summarizer, run_incremental_summarizer
 from .executor import run_agent
 from .humanizer import run_humanizer
-from .rewriter import run_rewriter
+from .rewriter import run_rewriter, arun_rewriter
 from .search_summarizer import run_search_summarizer
 from .finalizer import run_finalizer
-from .RAG_Router import run_RAG_router
+from .RAG_Router import run_RAG_router, arun_RAG_router
 from .title_writer import generate_title 
 
 __all__ = ["instance_agent","instance_llm" "run_critic", "run_evaluator",
            "run_planner", "run_quickresponse", "run_router", "run_summarizer", 
            "run agent", "run_humanizer","run_rewriter","run_search_summarizer",
-           "run_finalizer", "run_RAG_router", "generate_title"]
+           "run_finalizer", "run_RAG_router", "generate_title",
+           "arun_router", "arun_rewriter", "arun_RAG_router", "run_incremental_summarizer"]
@@ -0,0 +1,165 @@
+import re
+from typing import List, Union
+
+from utils import count_tokens, truncate_to_tokens
+from config import LLM_CONTEXT_WINDOW, LLM_MAX_OUTPUT_TOKENS
+
+MESSAGE_OVERHEAD_TOKENS = 8  # Chat template tokens around every message
+
+MIN_SECTION_TOKENS = 16  # A section squeezed below this is dropped instead
+
+
+class Section:
+    """
+    A variable part of a prompt with its own token budget.
+    Text sections are truncated, keeping their head or tail. Item sections (e.g. messages or steps)
+    drop whole items from the end they do not keep, the first `pinned` items are never dropped.
+    When the whole prompt does not fit, the lowest priority sections are compressed and cut first.
+    """
+
+    def __init__(self, name: str, content: Union[str, List[str]], max_tokens: int = None, priority: int = 0,
+                 keep: str = "head", pinned: int = 0, compress=None, separator: str = "\n", empty: str = ""):
+        """
+        Args:
+            name (str): The placeholder of the section in the prompt template.
+            content: The text, or the list of items joined with the separator.
+            max_tokens (int): Optional, the budget of the section on its own.
+            priority (int): Lower priority sections are cut first.
+            keep (str): "head" keeps the start of the text or the first items, "tail" the end or the latest items.
+            pinned (int): Leading items that are never dropped, e.g. the question before the steps.
+            compress: Optional, a lossy but shorter rewrite of the content, used before anything is cut.
+            separator (str): Joins the items.
+            empty (str): The text of a dropped section.
+        """
+        self.name = name
+        self.content = content
+        self.max_tokens = max_tokens
+        self.priority = priority
+        self.keep = keep
+        self.pinned = pinned
+        self.compress = compress
+        self.separator = separator
+        self.empty = empty
+
+    def fit(self, budget: int = None) -> str:
+        """
+        Renders the section within the budget, its own max_tokens if None.
+        """
+        budget = self.max_tokens if budget is None else budget
+        if self.max_tokens is not None:
+            budget = min(budget, self.max_tokens)
+
+        if budget is not None and budget < MIN_SECTION_TOKENS:
+            return self.empty
+
+        content = self.content
+        if budget is not None and self.compress is not None and count_tokens(self._join(content)) > budget:
+            content = self.compress(content)
+
+        if isinstance(content, str):
+            return content if budget is None else truncate_to_tokens(content, budget, keep=self.keep)
+
+        return self._fit_items(content, budget)
+
+    def compressed(self) -> "Section":
+        """
+        Returns the section with its compressed content, itself if it has no compression.
+        """
+        if self.compress is None:
+            return self
+        return Section(self.name, self.compress(self.content), self.max_tokens, self.priority,
+                       self.keep, self.pinned, separator=self.separator, empty=self.empty)
+
+    def _join(self, content: Union[str, List[str]]) -> str:
+        return content if isinstance(content, str) else self.separator.join(str(item) for item in content)
+
+    def _fit_items(self, content: List[str], budget: int) -> str:
+        items = [str(item) for item in content]
+        if budget is None:
+            return self.separator.join(items)
+
+        pinned, rest = items[:self.pinned], items[self.pinned:]
+        separator_tokens = count_tokens(self.separator) if self.separator else 0
+
+        used = sum(count_tokens(item) + separator_tokens for item in pinned)
+        kept = []
+
+        # The latest (or first) items are added until the next one does not fit
+        for item in (reversed(rest) if self.keep == "tail" else rest):
+            tokens = count_tokens(item) + separator_tokens
+            if used + tokens > budget:
+                # A single oversized item is truncated rather than leaving the section empty
+                if not kept and budget - used >= MIN_SECTION_TOKENS:
+                    kept.append(truncate_to_tokens(item, budget - used - separator_tokens, keep=self.keep))
+                break
+            kept.append(item)
+            used += tokens
+
+        if self.keep == "tail":
+            kept.reverse()
+
+        if not pinned and not kept:
+            return self.empty
+        return self.separator.join(pinned + kept)
+
+
+def build_prompt(template: str, sections: List[Section], reserved: str = "", messages: int = 2,
+                 context_window: int = LLM_CONTEXT_WINDOW, output_tokens: int = LLM_MAX_OUTPUT_TOKENS,
+                 **fixed) -> str:
+    """
+    Formats a prompt template with its sections fit into the context window.
+    Every section is first fit into its own budget. If the prompt still does not fit, the sections are
+    compressed and then cut down, lowest priority first, until it does.
+    Args:
+        template (str): The prompt template.
+        sections (list): The Sections of the template's variable placeholders.
+        reserved (str): Text of the other messages of the request, e.g. the user message.
+        messages (int): The number of messages of the request, for the chat template overhead.
+        context_window (int): The context size of the model.
+        output_tokens (int): The tokens kept free for the generation.
+        **fixed: Placeholders that are formatted as they are, e.g. short questions.
+    Returns:
+        str: The formatted prompt.
+    """
+    fixed_tokens = count_tokens(template.format(**fixed, **{section.name: "" for section in sections}))
+    available = (context_window - output_tokens - fixed_tokens - count_tokens(reserved)
+                 - messages * MESSAGE_OVERHEAD_TOKENS)
+
+    rendered = {section.name: section.fit() for section in sections}
+    tokens = {name: count_tokens(text) for name, text in rendered.items()}
+    sections = sorted(sections, key=lambda section: section.priority)
+
+    # Compressing keeps something of every section, so it is tried on all of them before anything is cut
+    for i, section in enumerate(sections):
+        if sum(tokens.values()) <= available:
+            break
+        if section.compress is not None:
+            sections[i] = section.compressed()
+            rendered[section.name] = sections[i].fit()
+            tokens[section.name] = count_tokens(rendered[section.name])
+
+    for section in sections:
+        excess = sum(tokens.values()) - available
+        if excess <= 0:
+            break
+
+        rendered[section.name] = section.fit(max(0, tokens[section.name] - excess))
+        tokens[section.name] = count_tokens(rendered[section.name])
+
+    if sum(tokens.values()) > available:
+        print(f"Prompt over the context budget by {sum(tokens.values()) - available} tokens after cutting every section")
+
+    return template.format(**fixed, **rendered)
+
+
+def compress_tool_descriptions(tools: str) -> str:
+    """
+    Shortens the tool descriptions to one line per tool: its name and the first sentence of its description.
+    """
+    lines = []
+    for number, name, description in re.findall(r"(\d+)\.\s+(\w+_\w+):(.+?)(?=\n\d+\.|\Z)", tools, re.DOTALL):
+        description = " ".join(description.split())
+        first_sentence = re.split(r"(?<=[.!?])\s", description, maxsplit=1)[0]
+        lines.append(f"{number}. {name}: {first_sentence}")
+
+    return "\n".join(lines) if lines else tools
@@ -0,0 +1,47 @@
+from parsers.parse_router import RouterStreamParser, ROUTE_CHOICES
+
+
+def stream_until_decision(reasoning_llm, messages: list, choices: tuple = ROUTE_CHOICES, debug: bool = False) -> str:
+    """
+    Streams a router generation and stops it as soon as the decision line is parsed.
+    Args:
+        reasoning_llm: The language model to use for routing.
+        messages (list): The router messages.
+        choices (tuple): The pipelines the router chooses from.
+        debug (bool): If True, enables debug mode for additional logging.
+    Returns:
+        str: The generated text up to and including the decision, parse_router reads it as usual.
+    """
+    parser = RouterStreamParser(choices)
+    stream = reasoning_llm.stream(messages)
+
+    try:
+        for chunk in stream:
+            if parser.feed(chunk.content) is not None:
+                break
+    finally:
+        # Closing the stream closes the connection, which stops the generation on the server
+        stream.close()
+
+    if debug: print(f"Router decision: {parser.finish(debug=debug)} after {len(parser.text)} chars")
+
+    return parser.text
+
+
+async def astream_until_decision(reasoning_llm, messages: list, choices: tuple = ROUTE_CHOICES, debug: bool = False) -> str:
+    """
+    Async version of stream_until_decision, does not block the event loop while the model generates.
+    """
+    parser = RouterStreamParser(choices)
+    stream = reasoning_llm.astream(messages)
+
+    try:
+        async for chunk in stream:
+            if parser.feed(chunk.content) is not None:
+                break
+    finally:
+        await stream.aclose()
+
+    if debug: print(f"Router decision: {parser.finish(debug=debug)} after {len(parser.text)} chars")
+
+    return parser.text
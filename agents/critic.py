@@ -1,7 +1,9 @@
 ## File: phi_delta/agents/critic.py
 
-from config import TOOL_DESCRIPTIONS,RAG_TOOL_DESCRIPTIONS
+from config import TOOL_DESCRIPTIONS,RAG_TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, CONTEXT_STEPS_MAX_TOKENS
 from prompts import CRITIC_PROMPT_TEMPLATE
+from utils import truncate_to_tokens
+from .core.context_budget import Section, build_prompt, compress_tool_descriptions
 
 def run_critic(reasoning_llm, 
                planner_response: str, 
@@ -15,17 +17,24 @@ def run_critic(reasoning_llm,
     Returns:
         str: The evaluation or feedback from the critic agent.
     """
+    # The plan is kept whole up to the step budget, the tool descriptions are compressed around it
+    user_message = f"Planner Agent's Response: {truncate_to_tokens(planner_response, CONTEXT_STEPS_MAX_TOKENS)}"
+
     if rag: 
-        critic_prompt = CRITIC_PROMPT_TEMPLATE.format(tools=RAG_TOOL_DESCRIPTIONS)
+        critic_prompt = build_prompt(CRITIC_PROMPT_TEMPLATE, [
+            Section("tools", RAG_TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, compress=compress_tool_descriptions)
+        ], reserved=user_message)
 
     else:
         # Use the standard tool descriptions for non-RAG planning
-        critic_prompt = CRITIC_PROMPT_TEMPLATE.format(tools=TOOL_DESCRIPTIONS) 
+        critic_prompt = build_prompt(CRITIC_PROMPT_TEMPLATE, [
+            Section("tools", TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, compress=compress_tool_descriptions)
+        ], reserved=user_message)
 
     result = reasoning_llm.invoke([
 
         {"role": "system", "content": critic_prompt},
-        {"role": "user", "content": f"Planner Agent's Response: {planner_response}"}
+        {"role": "user", "content": user_message}
 
     ])
 
@@ -1,7 +1,11 @@
-from config import TOOL_DESCRIPTIONS
+from config import TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, CONTEXT_STEPS_MAX_TOKENS, CONTEXT_TOOL_OUTPUT_MAX_TOKENS
+from config import CONTEXT_STEP_SUMMARY_MAX_TOKENS
+from utils import truncate_to_tokens
+from .core.context_budget import Section, build_prompt, compress_tool_descriptions
 from prompts import EVALUATOR_PROMPT_TEMPLATE
 
-def run_evaluator(reasoning_llm, action: str, step: str, steps, question: str, rag: bool = False) -> str:
+def run_evaluator(reasoning_llm, action: str, step: str, steps, question: str, rag: bool = False,
+                  previous: list = None) -> str:
     """
     Evaluates the agent's action and provides feedback or suggestions.
     Args:
@@ -11,21 +15,29 @@ def run_evaluator(reasoning_llm, action: str, step: str, steps, question: str, r
         steps: The list of steps taken by the agent.
         question (str): The original question posed by the user.
         rag (bool): If True, enables RAG (Retrieval-Augmented Generation) mode.
+        previous (list): Optional, summaries of the earlier steps that were not evaluated, judged together with this one.
     Returns:
         str: The evaluation or feedback from the evaluator agent.
     """
 
     # Use the standard tool descriptions for non-RAG evaluation
-    eval_prompt = EVALUATOR_PROMPT_TEMPLATE.format(
-            tools=TOOL_DESCRIPTIONS,
-            steps=steps,
-            question=question,
-        )
+    user_message = (f"User's initial question was: {question}. How the Agent approach the Step: {step} is: "
+                    f"{truncate_to_tokens(action, CONTEXT_TOOL_OUTPUT_MAX_TOKENS)}")
+
+    if previous:
+        # Batched evaluation, the latest unevaluated steps are kept within the step summary budget
+        user_message += ("\nThe steps before it were not evaluated, what they did: "
+                         + Section("previous", previous, CONTEXT_STEP_SUMMARY_MAX_TOKENS, keep="tail").fit())
+
+    eval_prompt = build_prompt(EVALUATOR_PROMPT_TEMPLATE, [
+            Section("tools", TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, priority=0, compress=compress_tool_descriptions),
+            Section("steps", str(steps), CONTEXT_STEPS_MAX_TOKENS, priority=1)
+        ], reserved=user_message, question=question)
 
     result = reasoning_llm.invoke([
 
             {"role": "system", "content": eval_prompt},
-            {"role": "user", "content": f"User's initial question was: {question}. How the Agent approach the Step: {step} is: {action}"}
+            {"role": "user", "content": user_message}
 
         ])
     
@@ -1,12 +1,14 @@
 from config import TOOL_DESCRIPTIONS_DICT, RAG_TOOL_DESCRIPTIONS_DICT, TOOL_DESCRIPTIONS, RAG_TOOL_DESCRIPTIONS, parse_tool_descriptions
+from config import CONTEXT_STEP_SUMMARY_MAX_TOKENS, CONTEXT_TOOLS_MAX_TOKENS
 from prompts import EXECUTOR_PROMPT_TEMPLATE
-from utils import extract_tool_names
+from utils import extract_tool_names, extract_tool_errors
 from memory.memory import AgentMemory
+from .core.context_budget import Section, build_prompt
 
 def run_agent(agent, 
               step: str, 
               context: str = "", 
-              rag: bool = False) -> tuple[str, list[str]]:
+              rag: bool = False) -> tuple[str, list[str], list[str]]:
     """
     Executes a step using the provided agent and context.
     Args:
@@ -15,7 +17,7 @@ def run_agent(agent,
         context (str): Context for the agent, defaults to an empty string.
         rag (bool): Whether to use RAG tools, defaults to False.
     Returns:
-        tuple: A tuple containing the raw answer and a list of tools used.
+        tuple: A tuple containing the raw answer, a list of tools used and a list of the tools whose calls failed.
     """
 
     print(step)
@@ -34,29 +36,32 @@ def run_agent(agent,
         elif rag and tool in RAG_TOOL_DESCRIPTIONS_DICT:
             tools += tool + ":" + RAG_TOOL_DESCRIPTIONS_DICT[tool] + "\n"
 
+    user_message = f"Your task: {step}"
+
+    # The tool calls and their outputs share the window with the prompt, so the output budget is kept free
+    sections = [
+        Section("context", context, CONTEXT_STEP_SUMMARY_MAX_TOKENS, priority=0, keep="tail"),
+        Section("tools", tools, CONTEXT_TOOLS_MAX_TOKENS, priority=1)
+    ]
+
     if rag: 
         # If RAG is enabled, we might want to use different tool descriptions
-        executor_prompt = EXECUTOR_PROMPT_TEMPLATE.format(
-        context=context, 
-        tools=tools
-        )
+        executor_prompt = build_prompt(EXECUTOR_PROMPT_TEMPLATE, sections, reserved=user_message)
 
     else:
-        executor_prompt = EXECUTOR_PROMPT_TEMPLATE.format(
-            context=context, 
-            tools=tools
-            )
+        executor_prompt = build_prompt(EXECUTOR_PROMPT_TEMPLATE, sections, reserved=user_message)
     
     print(f"\n\nExecutor Prompt: {executor_prompt}\n\n")
 
     result = agent.invoke({"messages":[
 
         {"role": "system", "content": executor_prompt},
-        {"role": "user", "content": f"Your task: {step}"}
+        {"role": "user", "content": user_message}
 
     ]})
 
     raw_answer = result["messages"][-1].content
     tools_used = extract_tool_names(result)
+    tools_failed = extract_tool_errors(result)
 
-    return raw_answer, tools_used
\ No newline at end of file
+    return raw_answer, tools_used, tools_failed
\ No newline at end of file
@@ -0,0 +1,167 @@
+## File: phi_delta/agents/fast_router.py
+
+from datetime import datetime
+from typing import Optional
+import numpy as np
+import json
+import os
+import threading
+
+from config import (FAST_ROUTER_PATH, FAST_ROUTER_THRESHOLD, FAST_ROUTER_MIN_EXAMPLES,
+                    FAST_ROUTER_TEMPERATURE)
+
+ROUTES = ["QuickResponse", "RAG", "Agentic"]
+
+DECISIONS_FILE = "decisions.jsonl"
+MODEL_FILE = "centroids.npz"
+
+_fast_router = None
+
+
+class FastRouter:
+    """
+    Nearest-centroid classifier over the question embeddings, placed in front of the LLM router.
+    The centroids are trained offline from the logged decisions of the LLM router,
+    and only confident predictions are used, everything else is deferred to run_router.
+    """
+
+    def __init__(self, embeddings, router_path: str = FAST_ROUTER_PATH):
+        self.embeddings = embeddings
+        self.log_path = os.path.join(router_path, DECISIONS_FILE)
+        self.model_path = os.path.join(router_path, MODEL_FILE)
+
+        self.labels = []
+        self.centroids = None
+        self._lock = threading.Lock()
+
+        os.makedirs(router_path, exist_ok=True)
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.model_path):
+            return
+
+        model = np.load(self.model_path)
+        self.labels = [str(label) for label in model["labels"]]
+        self.centroids = model["centroids"]
+
+    def _embed(self, questions: list[str]) -> np.ndarray:
+        if hasattr(self.embeddings, "embed_queries"):
+            vectors = self.embeddings.embed_queries(questions)
+        else:
+            vectors = [self.embeddings.embed_query(question) for question in questions]
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def classify(self, question: str, threshold: float = FAST_ROUTER_THRESHOLD) -> tuple[Optional[str], float]:
+        """
+        Classifies the question by its cosine similarity to the route centroids.
+        Args:
+            question (str): The user's question.
+            threshold (float): The minimum confidence for a decision.
+        Returns:
+            tuple: The route (None if not confident or not trained) and the confidence.
+        """
+        if self.centroids is None:
+            return None, 0.0
+
+        similarities = self.centroids @ self._embed([question])[0]
+
+        # Softmax over the similarities, the temperature spreads the small cosine differences
+        logits = similarities / FAST_ROUTER_TEMPERATURE
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+
+        if confidence < threshold:
+            return None, confidence
+        return self.labels[best], confidence
+
+    def log_decision(self, question: str, route: str, source: str, confidence: float = None) -> None:
+        """
+        Appends a routing decision to the log the centroids are trained from.
+        Args:
+            question (str): The user's question.
+            route (str): The chosen route.
+            source (str): "fast" for the classifier, "llm" for run_router.
+            confidence (float): The classifier's confidence, if any.
+        """
+        if route not in ROUTES:
+            return
+
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "question": question,
+            "route": route,
+            "source": source,
+            "confidence": confidence
+        }
+
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def fit_from_log(self, min_examples: int = FAST_ROUTER_MIN_EXAMPLES) -> dict:
+        """
+        Trains the centroids from the LLM router's logged decisions and saves them.
+        The classifier's own decisions are not used, so it never trains on its own output.
+        Nothing is trained until every route has at least min_examples examples.
+        Returns:
+            dict: The number of training examples per route.
+        """
+        examples = {}
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["source"] == "llm":
+                        # The latest label of a repeated question wins
+                        examples[record["question"]] = record["route"]
+
+        counts = {route: 0 for route in ROUTES}
+        for route in examples.values():
+            counts[route] += 1
+
+        # A missing route would be confidently mistaken for its nearest neighbour, so all routes are required
+        if any(count < min_examples for count in counts.values()):
+            print(f"Not enough routing decisions to train the fast router: {counts}")
+            return counts
+
+        labels = ROUTES
+
+        questions = [question for question, route in examples.items() if route in labels]
+        vectors = self._embed(questions)
+        routes = np.asarray([examples[question] for question in questions])
+
+        centroids = np.stack([vectors[routes == label].mean(axis=0) for label in labels])
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        np.savez(self.model_path, labels=np.asarray(labels), centroids=centroids)
+
+        self.labels = labels
+        self.centroids = centroids
+
+        print(f"Fast router trained: {counts}")
+        return counts
+
+
+def get_fast_router(embeddings) -> FastRouter:
+    """
+    Returns the process-wide fast router, created on first use.
+    """
+    global _fast_router
+
+    if _fast_router is None:
+        _fast_router = FastRouter(embeddings)
+    return _fast_router
+
+
+if __name__ == "__main__":
+    # Offline retraining: python -m agents.fast_router
+    from SessionRAG.setup_emb import setup_embedder
+
+    FastRouter(setup_embedder()).fit_from_log()
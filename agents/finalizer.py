@@ -2,6 +2,8 @@
 
 from prompts import FINALIZER_PROMPT_TEMPLATE
 from memory.memory import AgentMemory
+from config import CONTEXT_STEPS_MAX_TOKENS
+from .core.context_budget import Section, build_prompt
 
 def run_finalizer(reasoning_llm, memory: AgentMemory):
     """
@@ -12,7 +14,11 @@ def run_finalizer(reasoning_llm, memory: AgentMemory):
     Yields:
         str: The streamed tokens generated by the finalizer agent.
     """
-    finalizer_prompt = FINALIZER_PROMPT_TEMPLATE.format(step_history = memory.step_history)
+    # The question is kept, the earliest step reports are dropped first
+    pinned = 1 if memory.step_history and "question" in memory.step_history[0] else 0
+    finalizer_prompt = build_prompt(FINALIZER_PROMPT_TEMPLATE, [
+        Section("step_history", memory.step_history, CONTEXT_STEPS_MAX_TOKENS, keep="tail", pinned=pinned)
+    ])
 
     for chunk in reasoning_llm.stream([
 
@@ -1,7 +1,9 @@
 ## File: phi_delta/agents/quickresponse.py
 
 from prompts import HUMANIZER_PROMPT_TEMPLATE
-from config import TOOL_DESCRIPTIONS
+from config import TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, CONTEXT_STEP_SUMMARY_MAX_TOKENS
+from utils import truncate_to_tokens
+from .core.context_budget import Section, build_prompt, compress_tool_descriptions
 from memory.memory import AgentMemory
 
 def run_humanizer(reasoning_llm, step: str) -> str:
@@ -13,12 +15,18 @@ def run_humanizer(reasoning_llm, step: str) -> str:
     Returns:
         str: The humanized version of the step.
     """
-    humanizer_prompt = HUMANIZER_PROMPT_TEMPLATE.format(step=step, tools=TOOL_DESCRIPTIONS)
+    step = truncate_to_tokens(step, CONTEXT_STEP_SUMMARY_MAX_TOKENS)
+    user_message = f"Now humanize this step: {step}"
+
+    # Only a one-line rewrite of the step, the tool names are enough
+    humanizer_prompt = build_prompt(HUMANIZER_PROMPT_TEMPLATE, [
+        Section("tools", TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, compress=compress_tool_descriptions)
+    ], reserved=user_message, step=step)
 
     result = reasoning_llm.invoke([
 
         {"role": "system", "content": humanizer_prompt},
-        {"role": "user", "content": f"Now humanize this step: {step}"}
+        {"role": "user", "content": user_message}
 
     ])
 
@@ -1,8 +1,9 @@
 ## File: phi_delta/agents/planner.py
 
-from config import TOOL_DESCRIPTIONS, RAG_TOOL_DESCRIPTIONS
+from config import TOOL_DESCRIPTIONS, RAG_TOOL_DESCRIPTIONS, CONTEXT_SUMMARY_MAX_TOKENS, CONTEXT_TOOLS_MAX_TOKENS
 from prompts import PLANNER_PROMPT_TEMPLATE, RAG_PLANNER_PROMPT_TEMPLATE  
 from memory.memory import AgentMemory
+from .core.context_budget import Section, build_prompt, compress_tool_descriptions
 
 
 def run_planner(reasoning_llm, 
@@ -19,12 +20,18 @@ def run_planner(reasoning_llm,
     Returns:
         str: The generated plan from the planner agent.
     """
-    planner_prompt = PLANNER_PROMPT_TEMPLATE.format(context=context.chat_summary, tools=TOOL_DESCRIPTIONS)
+    user_message = f"Task: {question}"
+
+    # The plan can only use the listed tools, so the chat summary is cut first
+    planner_prompt = build_prompt(PLANNER_PROMPT_TEMPLATE, [
+        Section("context", context.chat_summary, CONTEXT_SUMMARY_MAX_TOKENS, priority=0),
+        Section("tools", TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, priority=1, compress=compress_tool_descriptions)
+    ], reserved=user_message)
 
     result = reasoning_llm.invoke([
 
         {"role": "system", "content": planner_prompt},
-        {"role": "user", "content": f"Task: {question}"}
+        {"role": "user", "content": user_message}
 
     ])
 
@@ -1,7 +1,9 @@
 ## File: phi_delta/agents/quickresponse.py
 
-from prompts import QUICKRESPONSE_PROMPT_TEMPLATE
+from prompts import QUICKRESPONSE_PROMPT_TEMPLATE, QUICKRESPONSE_PROMPT_TEMPLATE_RAG
 from memory.memory import AgentMemory
+from config import CONTEXT_SUMMARY_MAX_TOKENS, CONTEXT_RETRIEVED_MAX_TOKENS
+from .core.context_budget import Section, build_prompt
 
 def run_quickresponse(reasoning_llm, question: str, context: AgentMemory, retrieved_context: str = "", rag: bool = False):
     """
@@ -15,10 +17,16 @@ def run_quickresponse(reasoning_llm, question: str, context: AgentMemory, retrie
     Yields:
         str: The generated tokens from the quick response agent.
     """
+    summary = Section("context", context.chat_summary, CONTEXT_SUMMARY_MAX_TOKENS, priority=0)
+
     if not rag:
-        quickresponse_prompt = QUICKRESPONSE_PROMPT_TEMPLATE.format(context=context.chat_summary)
+        quickresponse_prompt = build_prompt(QUICKRESPONSE_PROMPT_TEMPLATE, [summary], reserved=question)
     else:
-        quickresponse_prompt = QUICKRESPONSE_PROMPT_TEMPLATE.format(context=context.chat_summary, retrieved_context=retrieved_context)
+        # The retrieved context grounds the answer, the chat summary is cut first
+        quickresponse_prompt = build_prompt(QUICKRESPONSE_PROMPT_TEMPLATE_RAG, [
+            summary,
+            Section("retrieved_context", retrieved_context, CONTEXT_RETRIEVED_MAX_TOKENS, priority=1)
+        ], reserved=question)
 
     for chunk in reasoning_llm.stream([{"role": "system", "content": quickresponse_prompt},{"role": "user", "content": f"{question}"}]):
         yield chunk.content
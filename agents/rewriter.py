@@ -2,6 +2,26 @@
 
 from prompts import REWRITER_PROMPT_TEMPLATE
 
+def _rewriter_messages(question: str) -> list:
+    rewriter_prompt = REWRITER_PROMPT_TEMPLATE.format(query=question)
+
+    return [
+
+        {"role": "system", "content": "You are a helpful query rewriter."},
+        {"role": "user", "content": rewriter_prompt}
+
+    ]
+
+def _clean_rewrite(content: str, question: str) -> str:
+    # Only the rewritten query is kept, without labels or quotes the model may add
+    lines = [line.strip() for line in content.strip().splitlines() if line.strip()]
+    rewritten = lines[0] if lines else question
+
+    if rewritten.lower().startswith("rewritten:"):
+        rewritten = rewritten[len("rewritten:"):]
+
+    return rewritten.strip().strip('"').strip() or question
+
 def run_rewriter(reasoning_llm, question: str) -> str:
     """
     Rewrites the provided question to improve clarity or focus.
@@ -11,13 +31,14 @@ def run_rewriter(reasoning_llm, question: str) -> str:
     Returns:
         str: The rewritten question.
     """
-    rewriter_prompt = REWRITER_PROMPT_TEMPLATE.format(query=question)
-
-    result = reasoning_llm.invoke([
+    result = reasoning_llm.invoke(_rewriter_messages(question))
 
-        {"role": "system", "content": "You are a helpful query rewriter."},
-        {"role": "user", "content": rewriter_prompt}
+    return _clean_rewrite(result.content, question)
 
-    ])
+async def arun_rewriter(reasoning_llm, question: str) -> str:
+    """
+    Async version of run_rewriter, does not block the event loop while the model generates.
+    """
+    result = await reasoning_llm.ainvoke(_rewriter_messages(question))
 
-    return result.content
\ No newline at end of file
+    return _clean_rewrite(result.content, question)
@@ -1,10 +1,36 @@
 ## File: phi_delta/agents/router.py
 
-from config import TOOL_DESCRIPTIONS
+from config import (TOOL_DESCRIPTIONS, ROUTER_STREAM_DECISIONS, CONTEXT_SUMMARY_MAX_TOKENS,
+                    CONTEXT_RETRIEVED_MAX_TOKENS, CONTEXT_TOOLS_MAX_TOKENS)
 from prompts import ROUTER_PROMPT_TEMPLATE
 from memory.memory import AgentMemory
+from parsers.parse_router import ROUTE_CHOICES
+from .core.decision_stream import stream_until_decision, astream_until_decision
+from .core.context_budget import Section, build_prompt, compress_tool_descriptions
 
-def run_router(reasoning_llm, query: str, context: AgentMemory, retrieved_context: str = "", debug: bool = False) -> str:
+def _router_messages(query: str, context: AgentMemory, retrieved_context: str = "", debug: bool = False) -> list:
+    user_message = f"The Query to be routed is: {query}"
+
+    # The retrieved context goes first, then the tool details, the chat summary last
+    router_prompt = build_prompt(ROUTER_PROMPT_TEMPLATE, [
+        Section("context", context.chat_summary, CONTEXT_SUMMARY_MAX_TOKENS, priority=2),
+        Section("retrieved_context", retrieved_context, CONTEXT_RETRIEVED_MAX_TOKENS, priority=0),
+        Section("tools", TOOL_DESCRIPTIONS, CONTEXT_TOOLS_MAX_TOKENS, priority=1, compress=compress_tool_descriptions)
+    ], reserved=user_message)
+    
+    if debug:
+        print("Router Prompt:")
+        print(router_prompt)
+
+    return [
+
+            {"role": "system", "content": router_prompt},
+            {"role": "user", "content": user_message}
+
+        ]
+
+def run_router(reasoning_llm, query: str, context: AgentMemory, retrieved_context: str = "", debug: bool = False,
+               stream: bool = ROUTER_STREAM_DECISIONS) -> str:
     """
     Routes the query to the appropriate tool based on the context and retrieved information.
     Args:
@@ -13,20 +39,29 @@ def run_router(reasoning_llm, query: str, context: AgentMemory, retrieved_contex
         context: An object that stores state, such as chat history and thinking steps.
         retrieved_context (str): Additional context retrieved for the query.
         debug (bool): If True, enables debug mode for additional logging.
+        stream (bool): If True, the generation is stopped as soon as the decision is parsed.
     Returns:
         str: The response from the routing agent.
     """
-    router_prompt = ROUTER_PROMPT_TEMPLATE.format(context=context.chat_summary, retrieved_context=retrieved_context, tools= TOOL_DESCRIPTIONS)
+    messages = _router_messages(query, context, retrieved_context, debug)
+
+    if stream:
+        return stream_until_decision(reasoning_llm, messages, ROUTE_CHOICES, debug=debug)
+
+    result = reasoning_llm.invoke(messages)
     
-    if debug:
-        print("Router Prompt:")
-        print(router_prompt)
+    return result.content
 
-    result = reasoning_llm.invoke([
+async def arun_router(reasoning_llm, query: str, context: AgentMemory, retrieved_context: str = "", debug: bool = False,
+                      stream: bool = ROUTER_STREAM_DECISIONS) -> str:
+    """
+    Async version of run_router, does not block the event loop while the model generates.
+    """
+    messages = _router_messages(query, context, retrieved_context, debug)
 
-            {"role": "system", "content": router_prompt},
-            {"role": "user", "content": f"The Query to be routed is: {query}"}
+    if stream:
+        return await astream_until_decision(reasoning_llm, messages, ROUTE_CHOICES, debug=debug)
 
-        ])
+    result = await reasoning_llm.ainvoke(messages)
     
-    return result.content
\ No newline at end of file
+    return result.content
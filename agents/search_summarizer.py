@@ -1,6 +1,8 @@
 ## File: phi_delta/agents/search_summarizer.py
 
 from prompts import SEARCH_SUMMARIZER_PROMPT_TEMPLATE
+from config import CONTEXT_TOOL_OUTPUT_MAX_TOKENS
+from .core.context_budget import Section, build_prompt
 
 def run_search_summarizer(reasoning_llm, tool_output: str) -> str:
     """
@@ -11,7 +13,9 @@ def run_search_summarizer(reasoning_llm, tool_output: str) -> str:
     Returns:
         str: The summarized response based on the search results.
     """
-    search_summarizer_prompt = SEARCH_SUMMARIZER_PROMPT_TEMPLATE.format(tool_output=tool_output)
+    search_summarizer_prompt = build_prompt(SEARCH_SUMMARIZER_PROMPT_TEMPLATE, [
+        Section("tool_output", tool_output, CONTEXT_TOOL_OUTPUT_MAX_TOKENS)
+    ])
 
     result = reasoning_llm.invoke([
 
@@ -1,7 +1,8 @@
-from config import TOOL_DESCRIPTIONS
-from prompts import SUMMARIZER_PROMPT_EXAMPLE, STEP_SUMMARIZER_PROMPT_EXAMPLE
+from config import CONTEXT_TOOL_OUTPUT_MAX_TOKENS, CONTEXT_HISTORY_MAX_TOKENS
+from prompts import SUMMARIZER_PROMPT_EXAMPLE, STEP_SUMMARIZER_PROMPT_EXAMPLE, INCREMENTAL_SUMMARIZER_PROMPT_TEMPLATE
 from typing import List, Dict
 from memory.memory import AgentMemory
+from .core.context_budget import Section, build_prompt
 
 def run_summarizer(reasoning_llm, memory: AgentMemory, step_mode: bool = False, step: str = None, answer: str = None) -> str:
     
@@ -10,7 +11,9 @@ def run_summarizer(reasoning_llm, memory: AgentMemory, step_mode: bool = False,
         return reasoning_llm.invoke([
 
         {"role": "system", "content": "You are a summarizer. Your task is to summarize the step and the answer."},
-        {"role": "user", "content": STEP_SUMMARIZER_PROMPT_EXAMPLE.format(step=step, answer=answer)}
+        {"role": "user", "content": build_prompt(STEP_SUMMARIZER_PROMPT_EXAMPLE, [
+            Section("answer", answer, CONTEXT_TOOL_OUTPUT_MAX_TOKENS)
+        ], step=step)}
         
         ]).content
     
@@ -19,6 +22,27 @@ def run_summarizer(reasoning_llm, memory: AgentMemory, step_mode: bool = False,
     return reasoning_llm.invoke([
 
         {"role": "system", "content": summary_prompt},
-        {"role": "user", "content": str(memory.chat_history)}
+        # The latest messages that fit the budget
+        {"role": "user", "content": build_prompt("{chat_history}", [
+            Section("chat_history", memory.chat_history, CONTEXT_HISTORY_MAX_TOKENS, keep="tail")
+        ], reserved=summary_prompt)}
         
-    ]).content
\ No newline at end of file
+    ]).content
+
+def run_incremental_summarizer(reasoning_llm, summary: str, new_messages: str, max_tokens: int) -> str:
+    """
+    Folds the messages since the last summary into it, the cost depends on the new messages only.
+    Args:
+        reasoning_llm: The language model to use for summarization.
+        summary (str): The current rolling summary, empty for a new conversation.
+        new_messages (str): The rendered messages after the summary.
+        max_tokens (int): The token budget of the updated summary.
+    Returns:
+        str: The updated summary.
+    """
+    return reasoning_llm.invoke([
+
+        {"role": "system", "content": INCREMENTAL_SUMMARIZER_PROMPT_TEMPLATE.format(summary=summary or "(empty)", max_tokens=max_tokens)},
+        {"role": "user", "content": new_messages}
+        
+    ]).content
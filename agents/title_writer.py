@@ -1,6 +1,10 @@
 from prompts import TITLE_WRITER_PROMPT_TEMPLATE
 from memory.memory import AgentMemory
 from utils import get_user_prompts
+from config import CONTEXT_HISTORY_MAX_TOKENS
+from .core.context_budget import Section, build_prompt
+
+TITLE_WRITER_SYSTEM = "You are a helpful assistant that will write 2-4 word concise and informative title for the chat."
 
 def generate_title(reasoning_llm, memory: AgentMemory) -> str:
 
@@ -8,11 +12,14 @@ def generate_title(reasoning_llm, memory: AgentMemory) -> str:
 
     print(f"User messages for title generation: {user_messages}")  # Debug log
 
-    title_generator_prompt = TITLE_WRITER_PROMPT_TEMPLATE.format(chat_history=user_messages)
+    # The first questions name the chat best, the later ones are dropped first
+    title_generator_prompt = build_prompt(TITLE_WRITER_PROMPT_TEMPLATE, [
+        Section("chat_history", [str(message) for message in user_messages], CONTEXT_HISTORY_MAX_TOKENS, keep="head")
+    ], reserved=TITLE_WRITER_SYSTEM)
 
     result = reasoning_llm.invoke([
 
-        {"role": "system", "content": "You are a helpful assistant that will write 2-4 word concise and informative title for the chat."},
+        {"role": "system", "content": TITLE_WRITER_SYSTEM},
         {"role": "user", "content": f"{title_generator_prompt}"}
 
     ])
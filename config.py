@@ -16,7 +16,7 @@ You have access to the following tools:
 3. rag_search: Use this to perform a similarity search on locally stored documents in the vector store. This tool is ideal for retrieving relevant information from specific files based on a query.
    - Input: A string containing the "query" and an optional "file" name. Example: query: your query here, file: your_file_path.pdf
    - Input: If no file is specified, the tool will search across all available documents in the vector store. Example: "query: your general query here"
-   - **Important** Input: Query should be one, if you want to search multiple queries, you have to use the rag_tool multiple times.
+   - Input: To search multiple queries, put them in ONE call separated by "|". Example: "query: first query | second query | third query, file: your_file_path.pdf"
    - Output: A list of relevant document extractions matching the query.
    - Note: Use this tool to retrieve specific information from documents you have previously added to the system. It is particularly useful for academic papers, reports, or any text-based files you have stored in the vector store.
    - Important Note: The file names that are added to the vector store are the same as the file names in the "./model_files/" directory, so you can use the list_directory_tool to check the files you have in your directory first.
@@ -79,7 +79,7 @@ You have access to the following tools:
 3. rag_search: Use this to perform a similarity search on locally stored documents in the vector store. This tool is ideal for retrieving relevant information from specific files based on a query.
    - Input: A string containing the "query" and an optional "file" name. Example: query: your query here, file: your_file_path.pdf
    - Input: If no file is specified, the tool will search across all available documents in the vector store. Example: "query: your general query here"
-   - **Important** Input: Query should be one, if you want to search multiple queries, you have to use the rag_tool multiple times.
+   - Input: To search multiple queries, put them in ONE call separated by "|". Example: "query: first query | second query | third query, file: your_file_path.pdf"
    - Output: A list of relevant document extractions matching the query.
    - Note: Use this tool to retrieve specific information from documents you have previously added to the system. It is particularly useful for academic papers, reports, or any text-based files you have stored in the vector store.
    - Important Note: The file names that are added to the vector store are the same as the file names in the "./model_files/" directory, so you can use the list_directory_tool to check the files you have in your directory first.
@@ -111,7 +111,7 @@ You have access to the following tools:
 3. rag_search: Use this to perform a similarity search on locally stored documents in the vector store. This tool is ideal for retrieving relevant information from specific files based on a query.
    - Input: A string containing the "query" and an optional "file" name. Example: query: your query here, file: your_file_path.pdf
    - Input: If no file is specified, the tool will search across all available documents in the vector store. Example: "query: your general query here"
-   - **Important** Input: Query should be one, if you want to search multiple queries, you have to use the rag_tool multiple times.
+   - Input: To search multiple queries, put them in ONE call separated by "|". Example: "query: first query | second query | third query, file: your_file_path.pdf"
    - Output: A list of relevant document extractions matching the query.
    - Note: Use this tool to retrieve specific information from documents you have previously added to the system. It is particularly useful for academic papers, reports, or any text-based files you have stored in the vector store.
    - Important Note: The file names that are added to the vector store are the same as the file names in the "./model_files/" directory, so you can use the list_directory_tool to check the files you have in your directory first.
@@ -136,3 +136,119 @@ EMBEDDER_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 ADDED_FILES = "added_files.txt"
 
 SESSION_BASED_PATHING = "sessions/session_{session_id}/"
+
+# RAG ingestion settings
+CHUNK_SIZE = 1000
+
+CHUNK_OVERLAP = 200
+
+INGEST_MAX_WORKERS = 4  # Processes used for PDF extraction and splitting
+
+INGEST_EMBED_BATCH_SIZE = 256  # Chunks embedded per embedder call
+
+INGEST_WRITE_BATCH_SIZE = 2048  # Chunks written per Chroma call, must stay below Chroma's max batch size
+
+EMBEDDING_CACHE_PATH = "./cache/embeddings/"  # Shared by all sessions, kept outside of MAIN_PATH
+
+CORPUS_PATH = "./corpus/"  # One copy, embedding and index entry of every document, shared by all sessions
+
+# Hybrid retrieval settings, dense and BM25 rankings are fused with reciprocal rank fusion
+HYBRID_FETCH_K = 20  # Candidates fetched from each retriever before fusion
+
+HYBRID_DENSE_WEIGHT = 1.0
+
+HYBRID_BM25_WEIGHT = 1.0
+
+HYBRID_RRF_K = 60
+
+# Query rewriting settings
+REWRITE_MODE = "concurrent"  # "sequential": rewrite then retrieve, "concurrent": retrieve the raw query while rewriting
+
+REWRITE_CACHE_SIZE = 256  # Entries of the per-session rewrite LRU cache
+
+REWRITE_MIN_WORDS = 3  # Queries with this many words or fewer are not rewritten
+
+REWRITE_MATERIAL_THRESHOLD = 0.5  # Word Jaccard similarity below which a rewrite is re-queried
+
+# Fast router settings, an embedding classifier that answers confident routing decisions before the LLM router
+FAST_ROUTER_ENABLED = True
+
+FAST_ROUTER_PATH = "./cache/router/"  # Decision log and trained centroids
+
+FAST_ROUTER_THRESHOLD = 0.85  # Minimum confidence to skip the LLM router
+
+FAST_ROUTER_MIN_EXAMPLES = 20  # Logged LLM decisions needed per route to train it
+
+FAST_ROUTER_TEMPERATURE = 0.05
+
+# Router settings
+ROUTER_STREAM_DECISIONS = True  # Stream the router generations and stop them once the decision line is parsed
+
+# RAG reply settings
+RAG_REPLY_MODE = "draft_and_judge"  # "draft_and_judge" streams the answer while the RAG router judges it, "judge_first" judges before streaming (two generations)
+
+RAG_SUPERSEDED_MARKER = "\n\n[[superseded]]\n"  # Sent when an escalated draft is retracted, the frontend matches this exact string
+
+# Server session registry settings
+SESSION_REGISTRY_MAX_SESSIONS = 8  # Sessions kept resident, the least recently used is evicted beyond this
+
+SESSION_REGISTRY_MAX_RSS_MB = 0  # Evict cold sessions while the process uses more memory than this (0 to disable)
+
+# Background job settings
+JOB_MAX_WORKERS = 2  # Agentic jobs running at once against the LLM server
+
+JOB_HISTORY_SIZE = 200  # Finished jobs kept for the status and result endpoints
+
+JOB_INTERACTIVE_MAX_WAIT = 30  # Seconds a job waits for interactive requests before it proceeds anyway
+
+# Server-Sent Events settings
+EVENTS_BUFFER_SIZE = 500  # Recent events kept per session, replayed to clients that reconnect with Last-Event-ID
+
+EVENTS_KEEPALIVE = 15  # Seconds without events before a keepalive comment is sent
+
+# Session journal settings
+JOURNAL_COMPACT_RECORDS = 200  # Journal records after which the session is compacted into a new snapshot
+
+JOURNAL_FSYNC_INTERVAL = 1.0  # Seconds between the batched fsyncs of the session journals
+
+SESSION_INDEX_PATH = "./cache/session_index.sqlite"  # SQLite index of the saved sessions, rebuild with: python session_index.py rebuild
+
+# Rolling summary settings, new messages are folded into memory.chat_summary after each reply
+SUMMARY_MAX_TOKENS = 500  # Token budget of the rolling summary
+
+SUMMARY_DELTA_MAX_TOKENS = 3000  # Token budget of the new messages sent to the summarizer per fold
+
+# Post-turn pipeline settings, the summarize/save/title/ingest work that runs after a reply is closed
+POST_TURN_WORKERS = 2  # Sessions whose post-turn tasks run at once, the tasks of one session always run in order
+
+# Prompt context settings, every agent prompt is fit into the llama-server context window
+TOKENIZER_ENCODING = "cl100k_base"  # tiktoken encoding of phi-4's tokenizer, token counts fall back to ~4 characters per token without it
+
+LLM_CONTEXT_WINDOW = 16384  # --ctx-size of the llama-server
+
+LLM_MAX_OUTPUT_TOKENS = 2048  # Tokens kept free for the generation
+
+CONTEXT_SUMMARY_MAX_TOKENS = 1000  # Rolling chat summary in the prompts
+
+CONTEXT_RETRIEVED_MAX_TOKENS = 4000  # Retrieved RAG context
+
+CONTEXT_TOOLS_MAX_TOKENS = 1500  # Tool descriptions, compressed to one line per tool beyond this
+
+CONTEXT_STEPS_MAX_TOKENS = 4000  # Step history of the finalizer and plan steps of the evaluator, the oldest steps are dropped first
+
+CONTEXT_STEP_SUMMARY_MAX_TOKENS = 400  # Summaries of the previous steps given to the executor, the oldest are dropped first
+
+CONTEXT_TOOL_OUTPUT_MAX_TOKENS = 3000  # A single step answer or tool output sent to a summarizer
+
+CONTEXT_HISTORY_MAX_TOKENS = 3000  # Chat messages sent to the full summarizer, the oldest are dropped first
+
+# Agentic pipeline settings
+AGENTIC_STEP_WORKERS = 4  # Threads shared by the agentic tasks for the step summarizer, the evaluator runs on the task's own thread
+
+AGENTIC_HUMANIZER_WORKERS = 2  # Threads shared by the agentic tasks for the display-only humanizer, apart from the summarizer's
+
+AGENTIC_MAX_PARALLEL_STEPS = 2  # Independent plan steps of an agentic task running at once
+
+EVALUATION_POLICY = "adaptive"  # "always" runs the evaluator after every plan step, "adaptive" only after anomalous steps and every EVALUATION_EVERY_N_STEPS steps
+
+EVALUATION_EVERY_N_STEPS = 3  # Periodic evaluation of the adaptive policy, the skipped steps since the last one are evaluated with it
@@ -0,0 +1,131 @@
+from collections import defaultdict, deque
+import asyncio
+import json
+import threading
+
+from config import EVENTS_BUFFER_SIZE, EVENTS_KEEPALIVE
+
+_event_bus = None
+
+
+def format_sse(event: tuple) -> str:
+    """
+    Formats an (id, type, data) event as a Server-Sent Events message.
+    """
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class EventBus:
+    """
+    Per-session publish/subscribe channel behind the /events SSE endpoint.
+    Events are numbered per session and the latest ones are buffered, so a client that reconnects
+    with its Last-Event-ID receives what it missed. Publishing is thread-safe, the job workers
+    publish from their own threads and the subscribers run on the event loop.
+    """
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE):
+        self.buffers = defaultdict(lambda: deque(maxlen=buffer_size))  # session_id -> recent events
+        self.last_ids = defaultdict(int)                                # session_id -> last event id
+        self.subscribers = defaultdict(set)                             # session_id -> {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def publish(self, session_id: str, event_type: str, data) -> int:
+        """
+        Publishes an event to the subscribers of the session.
+        Args:
+            session_id (str): The session the event belongs to.
+            event_type (str): e.g. "thinking_step", "job", "final_token".
+            data: JSON-serializable payload.
+        Returns:
+            int: The id of the event.
+        """
+        with self._lock:
+            self.last_ids[session_id] += 1
+            event = (self.last_ids[session_id], event_type, data)
+            self.buffers[session_id].append(event)
+            subscribers = list(self.subscribers[session_id])
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # The subscriber's loop is closed, it is removed when its stream ends
+
+        return event[0]
+
+    def stream(self, session_id: str, event_type: str, tokens):
+        """
+        Passes a token stream through while publishing every token, e.g. the finalizer's reply.
+        """
+        for token in tokens:
+            self.publish(session_id, event_type, token)
+            yield token
+
+        self.publish(session_id, event_type + "_end", None)
+
+    async def subscribe(self, session_id: str, last_event_id: int = None, keepalive: float = EVENTS_KEEPALIVE):
+        """
+        Yields the events of the session as they are published, None as a keepalive when idle.
+        Args:
+            session_id (str): The session to follow.
+            last_event_id (int): The last event the client has seen. The buffered events after it
+                are replayed first, without it only new events are sent.
+            keepalive (float): Seconds without events before a keepalive is yielded.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        subscriber = (loop, queue)
+
+        with self._lock:
+            self.subscribers[session_id].add(subscriber)
+
+            backlog = []
+            if last_event_id is not None:
+                # An id from before a server restart is ahead of the counter, everything buffered is new then
+                if last_event_id > self.last_ids[session_id]:
+                    last_event_id = 0
+                backlog = [event for event in self.buffers[session_id] if event[0] > last_event_id]
+            else:
+                last_event_id = self.last_ids[session_id]
+
+        try:
+            for event in backlog:
+                last_event_id = event[0]
+                yield event
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                # Published while the backlog was read, already sent
+                if event[0] <= last_event_id:
+                    continue
+
+                last_event_id = event[0]
+                yield event
+        finally:
+            with self._lock:
+                self.subscribers[session_id].discard(subscriber)
+
+    def drop(self, session_id: str) -> None:
+        """
+        Forgets the buffered events of a deleted session.
+        """
+        with self._lock:
+            self.buffers.pop(session_id, None)
+            self.last_ids.pop(session_id, None)
+
+
+def get_event_bus() -> EventBus:
+    """
+    Returns the process-wide event bus.
+    """
+    global _event_bus
+
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
@@ -0,0 +1,274 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+import itertools
+import queue
+import threading
+import time
+import uuid
+
+from config import JOB_MAX_WORKERS, JOB_HISTORY_SIZE, JOB_INTERACTIVE_MAX_WAIT
+
+PRIORITY_AGENTIC = 10  # Interactive requests are not jobs, they take priority through JobManager.interactive()
+
+_job_manager = None
+
+
+class JobCancelled(Exception):
+    """
+    Raised at a job checkpoint after the job has been cancelled.
+    """
+
+
+class Job:
+    """
+    A unit of background work, e.g. an agentic task, with its status and result.
+    Status goes queued -> running -> done | failed | cancelled.
+    """
+
+    def __init__(self, fn, kind: str, priority: int, session_id: str = None, description: str = "", on_cancel=None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.on_cancel = on_cancel
+        self.kind = kind
+        self.priority = priority
+        self.session_id = session_id
+        self.description = description
+
+        self.status = "queued"
+        self.result = None
+        self.error = None
+
+        self.created = datetime.now().isoformat()
+        self.started = None
+        self.finished = None
+
+        self.cancel_event = threading.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "session_id": self.session_id,
+            "description": self.description,
+            "status": self.status,
+            "has_result": self.result is not None,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded pool of worker threads, highest priority first and FIFO within a priority.
+    Interactive requests have admission priority: while any is in flight, workers hold back new jobs
+    and running jobs pause at their next checkpoint, for at most JOB_INTERACTIVE_MAX_WAIT seconds.
+    """
+
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS, history_size: int = JOB_HISTORY_SIZE,
+                 interactive_max_wait: float = JOB_INTERACTIVE_MAX_WAIT):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.interactive_max_wait = interactive_max_wait
+
+        self.jobs = {}  # job_id -> Job, in submission order
+        self.listeners = []  # Called with the job on every status change
+        self.queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+
+        self._interactive = 0
+        self._interactive_done = threading.Condition()
+        self._lock = threading.Lock()
+
+        self.workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                        for i in range(max_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, fn, kind: str = "agentic", priority: int = PRIORITY_AGENTIC,
+               session_id: str = None, description: str = "", on_cancel=None) -> Job:
+        """
+        Queues a job.
+        Args:
+            fn: Called with the Job, its return value is the job result. Long jobs call
+                checkpoint(job) between their steps to honour cancellation and interactive priority.
+            kind (str): The kind of the job, e.g. "agentic".
+            priority (int): Lower runs first, see PRIORITY_AGENTIC.
+            session_id (str): The session the job belongs to.
+            description (str): A short description, e.g. the question.
+            on_cancel: Optional, called with the Job when it is cancelled before fn was called,
+                e.g. to release what the submitter reserved for it.
+        Returns:
+            Job: The queued job.
+        """
+        job = Job(fn, kind, priority, session_id, description, on_cancel)
+
+        with self._lock:
+            self.jobs[job.id] = job
+            self._trim_history()
+
+        self.queue.put((priority, next(self._sequence), job.id))
+        self._notify(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, session_id: str = None) -> list[Job]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job for job in jobs if session_id is None or job.session_id == session_id]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a job. A queued job never starts, a running job stops at its next checkpoint.
+        Returns:
+            bool: False if the job does not exist or is already finished.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished:
+            return False
+
+        job.cancel_event.set()
+
+        with self._lock:
+            cancelled = job.status == "queued"
+            if cancelled:
+                self._finish(job, "cancelled")
+
+        if cancelled:
+            self._cancelled_before_run(job)
+            self._notify(job)
+        return True
+
+    def checkpoint(self, job: Job) -> None:
+        """
+        Called by a running job between its steps. Raises JobCancelled if the job was cancelled,
+        otherwise waits while interactive requests are in flight.
+        """
+        if job.cancel_event.is_set():
+            raise JobCancelled(job.id)
+
+        self._yield_to_interactive()
+
+        if job.cancel_event.is_set():
+            raise JobCancelled(job.id)
+
+    @contextmanager
+    def interactive(self):
+        """
+        Marks an interactive request (routing, quick or RAG replies) as in flight.
+        """
+        with self._interactive_done:
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._interactive_done:
+                self._interactive -= 1
+                self._interactive_done.notify_all()
+
+    def interactive_stream(self, tokens):
+        """
+        Wraps a streamed reply, the request counts as in flight until its last token.
+        """
+        with self.interactive():
+            yield from tokens
+
+    def _yield_to_interactive(self) -> None:
+        deadline = time.monotonic() + self.interactive_max_wait
+
+        with self._interactive_done:
+            while self._interactive > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._interactive_done.wait(remaining)
+
+    def _work(self) -> None:
+        while True:
+            _, _, job_id = self.queue.get()
+            job = self.jobs.get(job_id)
+
+            with self._lock:
+                if job is None or job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started = datetime.now().isoformat()
+
+            self._notify(job)
+
+            entered = False
+            try:
+                self._yield_to_interactive()
+                if job.cancel_event.is_set():
+                    raise JobCancelled(job.id)
+
+                entered = True
+                job.result = job.fn(job)
+                status = "done"
+            except JobCancelled:
+                status = "cancelled"
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                status = "failed"
+
+            with self._lock:
+                self._finish(job, status)
+
+            # Cancelled while it waited for interactive requests, fn never ran to clean up after itself
+            if status == "cancelled" and not entered:
+                self._cancelled_before_run(job)
+            job.on_cancel = None
+
+            self._notify(job)
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a callable that is called with the job on every status change, from the changing thread.
+        """
+        self.listeners.append(listener)
+
+    def _notify(self, job: Job) -> None:
+        for listener in self.listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                print(f"Job listener failed for job {job.id}: {e}")
+
+    def _cancelled_before_run(self, job: Job) -> None:
+        on_cancel, job.on_cancel = job.on_cancel, None
+        if on_cancel is not None:
+            try:
+                on_cancel(job)
+            except Exception as e:
+                print(f"Cancel hook failed for job {job.id}: {e}")
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = datetime.now().isoformat()
+        job.fn = None  # Releases the captured session state
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self.jobs[job_id]
+
+
+def get_job_manager() -> JobManager:
+    """
+    Returns the process-wide job manager, starting its workers on first use.
+    """
+    global _job_manager
+
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
@@ -7,11 +7,16 @@ from SessionRAG import init_rag
 from tools import initialize_tools
 from SessionRAG import add_to_rag, similarity_search
 from parsers import parse_router
-from agents import run_router, run_quickresponse, run_RAG_router
+from agents import run_quickresponse, run_RAG_router
 from pipelines import agentic_behaviour, planner_behaviour
 from utils import create_session_id, create_session_directory
-from agents import run_rewriter, run_summarizer
+from post_turn import after_turn
 from session_manager import session_manager
+from memory.rewrite_cache import get_rewrite_cache, needs_rewrite, differs_materially
+from config import REWRITE_MODE, FAST_ROUTER_ENABLED, RAG_SUPERSEDED_MARKER
+from agents.fast_router import get_fast_router
+from agents import arun_router, arun_rewriter
+import asyncio
 
 def init_agent(passed_state=None, session_id=None, session_path=None, debug: bool = False) -> dict:
     """
@@ -73,25 +78,137 @@ def init_agent(passed_state=None, session_id=None, session_path=None, debug: boo
       "session_path": session_path
     }
 
-def route_query(state: dict, question: str, debug: bool = False):
+async def _cancel(task) -> None:
+    """
+    Cancels a helper task that is no longer needed and waits for it, so its exception is retrieved.
+    """
+    if task is None:
+        return
+
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+async def aretrieve_context(state: dict, question: str, on_context=None, debug: bool = False) -> str:
+    """
+    Retrieves the context of the question, calling the LLM rewriter only when it is needed.
+    Rewrites are memoized per session, short queries are searched as they are, and in the
+    "concurrent" REWRITE_MODE the raw question is searched while the rewrite is generated,
+    re-querying only if the rewrite differs materially.
+    Searches run in worker threads, so the event loop is never blocked.
+    Args:
+        state (dict): The current state of the application.
+        question (str): The user's question.
+        on_context: Optional, called with the first available context (the raw question's in
+                    "concurrent" mode), so dependent calls can start before the rewrite is done.
+        debug (bool): If True, enables debug mode for additional logging.
+    Returns:
+        str: The retrieved context.
+    """
+    llm          = state["llm"]
+    vectorstore  = state["vectorstore"]
+    cache        = get_rewrite_cache(state["session_path"])
+
+    def search(query: str):
+        return asyncio.to_thread(similarity_search, vectorstore=vectorstore, query=query, debug=debug)
+
+    def first_context(ctx: str) -> str:
+        if on_context is not None:
+            on_context(ctx)
+        return ctx
+
+    rew_q = cache.get(question)
+
+    if rew_q is not None:
+        if debug: print(f"Rewrite cache hit: {rew_q}")
+        return first_context(await search(rew_q))
+
+    if not needs_rewrite(question):
+        return first_context(await search(question))
+
+    if REWRITE_MODE == "concurrent":
+        rewrite = asyncio.create_task(arun_rewriter(reasoning_llm=llm, question=question))
+        try:
+            ctx = first_context(await search(question))
+            rew_q = await rewrite
+        finally:
+            # A failed search leaves the rewrite running, it is cancelled instead of wasting the call
+            await _cancel(rewrite)
+
+        cache.put(question, rew_q)
+
+        if differs_materially(question, rew_q):
+            if debug: print(f"Rewrite differs materially, re-querying with: {rew_q}")
+            ctx = await search(rew_q)
+
+        return ctx
+
+    rew_q = await arun_rewriter(reasoning_llm=llm, question=question)
+    cache.put(question, rew_q)
+
+    return first_context(await search(rew_q))
+
+async def aroute_query(state: dict, question: str, debug: bool = False):
+    """
+    Decides the pipeline of the question. Confident decisions of the embedding fast router are
+    used directly, otherwise the LLM router starts as soon as the first context is retrieved and
+    overlaps with the rewrite and re-query in "concurrent" REWRITE_MODE.
+    Args:
+        state (dict): The current state of the application.
+        question (str): The user's question.
+        debug (bool): If True, enables debug mode for additional logging.
+    Returns:
+        tuple: The chosen route and the retrieved context.
+    """
     memory        = state["memory"]
-    llm           = state["llm"]
     deterministic = state["deterministic"]
-    vectorstore   = state["vectorstore"]
 
     memory.add("user", question)
 
-    rew_q = run_rewriter(reasoning_llm=llm, question=question)
-    ctx   = similarity_search(vectorstore=vectorstore, query=rew_q, debug=debug)
-    route = parse_router(run_router(reasoning_llm=deterministic, query=question,
-                       context=memory, retrieved_context=ctx, debug=debug),debug=debug)
+    fast_router = get_fast_router(state["embeddings"]) if FAST_ROUTER_ENABLED else None
+
+    if fast_router is not None:
+        route, confidence = await asyncio.to_thread(fast_router.classify, question)
+
+        if route is not None:
+            if debug: print(f"Fast router: {route} ({confidence:.2f})")
+            fast_router.log_decision(question, route, source="fast", confidence=confidence)
+
+            # Only the RAG pipeline uses the retrieved context
+            ctx = await aretrieve_context(state, question, debug=debug) if route == "RAG" else ""
+            return route, ctx
+
+    router = None
+
+    def start_router(ctx: str):
+        nonlocal router
+        router = asyncio.create_task(arun_router(reasoning_llm=deterministic, query=question,
+                                                 context=memory, retrieved_context=ctx, debug=debug))
+
+    try:
+        ctx   = await aretrieve_context(state, question, on_context=start_router, debug=debug)
+        route = parse_router(await router, debug=debug)
+    finally:
+        # The router is stopped if retrieval failed after starting it
+        await _cancel(router)
+
+    if fast_router is not None:
+        # LLM decisions are the training labels of the fast router
+        fast_router.log_decision(question, route, source="llm", confidence=confidence)
+
     return route, ctx
 
+def route_query(state: dict, question: str, debug: bool = False):
+    """
+    Synchronous entry point of aroute_query, for callers without an event loop (e.g. the CLI).
+    """
+    return asyncio.run(aroute_query(state, question, debug=debug))
+
 def qr_get_reply(state: dict, question: str, route: str, ctx: str, debug: bool = False) -> str:
     memory        = state["memory"]
     llm           = state["llm"]
-    session_id    = state["session_id"]
-    session_path  = state["session_path"]
 
     if debug: print(f"\nQuestion: {question} | Routing: {route}\n")
 
@@ -102,14 +219,10 @@ def qr_get_reply(state: dict, question: str, route: str, ctx: str, debug: bool =
         answer += token  # Collect the response
         yield token  # Stream the response
 
-    # update summary
     memory.add("assistant", answer)
-    memory.chat_summary = run_summarizer(reasoning_llm=llm, memory=memory)
-    
-    # Save session after each interaction
-    if session_id:
-        session_manager.save_session(session_id=session_id, session_path=session_path, memory=memory)
-        if debug: print(f"Session {session_id} saved")
+
+    # Saving, summarizing and the title run after the stream is closed
+    after_turn(state, debug=debug)
     
     return answer
 
@@ -117,8 +230,9 @@ def rag_decide(state: dict, question: str, ctx: str, debug: bool = False):
     memory        = state["memory"]
     llm           = state["llm"]
 
-    resp      = run_quickresponse(llm, question, context=memory,
-                                      retrieved_context=ctx, rag=True)
+    # The RAG router judges a complete draft, not the token generator
+    resp      = "".join(run_quickresponse(llm, question, context=memory,
+                                          retrieved_context=ctx, rag=True))
     rag_route = run_RAG_router(llm, query=question, response=resp,
                                    debug=debug).strip()
     decision = parse_router(rag_route, debug=debug)
@@ -131,11 +245,48 @@ def rag_decide(state: dict, question: str, ctx: str, debug: bool = False):
     
     return False
 
+def rag_draft_and_judge(state: dict, question: str, ctx: str, on_escalate, debug: bool = False):
+    """
+    Single-generation RAG reply. The answer is streamed to the client while it is buffered as the
+    draft of the RAG router, which judges it once the generation is done. STAY keeps the streamed
+    answer, ESCALATE retracts it with RAG_SUPERSEDED_MARKER and hands the question to the agentic task.
+    Args:
+        state (dict): The current state of the application.
+        question (str): The user's question.
+        ctx (str): The retrieved context.
+        on_escalate: Called without arguments to start the agentic task, before the marker is sent.
+        debug (bool): If True, enables debug mode for additional logging.
+    Yields:
+        str: The answer tokens, followed by the marker and a processing note if the draft is superseded.
+    """
+    memory        = state["memory"]
+    llm           = state["llm"]
+
+    answer = ""
+
+    for token in run_quickresponse(llm, question, context=memory, retrieved_context=ctx, rag=True):
+        answer += token  # Buffer the draft for the judge
+        yield token  # Stream the response
+
+    rag_route = run_RAG_router(llm, query=question, response=answer, debug=debug).strip()
+    decision  = parse_router(rag_route, debug=debug)
+
+    print(f"RAG Route: {decision}")  # Debug log
+
+    if decision == "ESCALATE":
+        print("Escalating to agentic task, draft superseded...")  # Debug log
+        on_escalate()
+        yield f"{RAG_SUPERSEDED_MARKER}🔄 Processing your request... This may take a moment."
+        return
+
+    memory.add("assistant", answer)
+
+    # Saving, summarizing and the title run after the stream is closed
+    after_turn(state, debug=debug)
+
 def rag_get_reply(state: dict, question: str, route: str, ctx: str, debug: bool = False):
     memory        = state["memory"]
     llm           = state["llm"]
-    session_id    = state["session_id"]
-    session_path  = state["session_path"]
 
     answer = ""
 
@@ -144,14 +295,10 @@ def rag_get_reply(state: dict, question: str, route: str, ctx: str, debug: bool
         answer += token  # Collect the response
         yield token  # Stream the response
 
-    # update summary
     memory.add("assistant", answer)
-    memory.chat_summary = run_summarizer(reasoning_llm=llm, memory=memory)
 
-    # Save session after each interaction
-    if session_id:
-        session_manager.save_session(session_id=session_id, session_path=session_path, memory=memory)
-        if debug: print(f"Session {session_id} saved")
+    # Saving, summarizing and the title run after the stream is closed
+    after_turn(state, debug=debug)
 
     return answer
 
@@ -205,9 +352,9 @@ def load_session_by_id(session_id: str, session_path: str, debug: bool = False)
     """Load a session by ID and return initialized state"""
     return init_agent(session_id=session_id, session_path=session_path, debug=debug)
 
-def list_available_sessions():
-    """List all available sessions"""
-    return session_manager.list_sessions()
+def list_available_sessions(limit: int = None, offset: int = 0, sort: str = "timestamp", descending: bool = True):
+    """List the available sessions, optionally a sorted page of them"""
+    return session_manager.list_sessions(limit=limit, offset=offset, sort=sort, descending=descending)
 
 def delete_session_by_id(session_id: str, session_path: str) -> bool:
     """Delete a session by ID"""
@@ -12,6 +12,12 @@ class AgentMemory:
         self.step_history: List[Dict] = []
         self.thinkingsteps: List[Dict] = []
         self.max_history_length = max_history_length
+        # Messages of chat_history_total already folded into chat_summary
+        self.summarized_upto: int = 0
+        # Per-stage timings of the steps of the last agentic task, not saved with the session
+        self.step_timings: List[Dict] = []
+        # Memo table (ToolMemo) of the running agentic task, not saved with the session
+        self.tool_memo = None
 
     def add(self, role: str, content: str):
         # Chat history for the context follow-up, dynamically managed
@@ -21,46 +27,10 @@ class AgentMemory:
         self._manage_history_length()
     
     def _manage_history_length(self):
-        """Manage chat history length by keeping recent messages and summarizing older ones"""
+        """Keep the recent messages as the follow-up context, older ones live on in chat_summary"""
         if len(self.chat_history) > self.max_history_length:
             # Keep the last 10 messages (5 pairs of user/assistant)
-            recent_messages = self.chat_history[-10:]
-            
-            # The messages to be summarized (everything except recent)
-            old_messages = self.chat_history[:-10]
-            
-            # Only summarize if there are old messages
-            if old_messages:
-                # Create a summary of old messages
-                old_summary = self._create_conversation_summary(old_messages)
-                
-                # Update the main summary
-                if self.chat_summary:
-                    self.chat_summary = f"{self.chat_summary}\n\nPrevious conversation: {old_summary}"
-                else:
-                    self.chat_summary = f"Previous conversation: {old_summary}"
-                
-                # Keep only recent messages
-                self.chat_history = recent_messages
-    
-    def _create_conversation_summary(self, messages: List[Dict]) -> str:
-        """Create a concise summary of conversation messages"""
-        if not messages:
-            return ""
-        
-        summary_parts = []
-        for i in range(0, len(messages), 2):  # Process in pairs
-            if i < len(messages):
-                user_msg = messages[i].get('content', '')
-                assistant_msg = messages[i + 1].get('content', '') if i + 1 < len(messages) else ''
-                
-                # Create a brief summary of this exchange
-                user_summary = user_msg[:100] + "..." if len(user_msg) > 100 else user_msg
-                assistant_summary = assistant_msg[:100] + "..." if len(assistant_msg) > 100 else assistant_msg
-                
-                summary_parts.append(f"Q: {user_summary} A: {assistant_summary}")
-        
-        return " | ".join(summary_parts)
+            self.chat_history = self.chat_history[-10:]
 
     def get_last_messages(self, n: int = 5, role_filter: Optional[str] = None) -> List[str]:
         messages = self.chat_history
@@ -105,7 +75,8 @@ class AgentMemory:
             "step_history": self.step_history,
             "thinkingsteps": self.thinkingsteps,
             "max_history_length": self.max_history_length,
-            "chat_history_total": self.chat_history_total
+            "chat_history_total": self.chat_history_total,
+            "summarized_upto": self.summarized_upto
         }
     
     @classmethod
@@ -118,6 +89,9 @@ class AgentMemory:
         memory.step_history = data.get("step_history", [])
         memory.thinkingsteps = data.get("thinkingsteps", [])
         memory.chat_history_total = data.get("chat_history_total", [])
+        # Sessions from before the incremental summarizer had their whole history in the summary
+        memory.summarized_upto = data.get("summarized_upto",
+                                          len(memory.chat_history_total) if memory.chat_summary else 0)
         return memory
 
 
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Optional
+import json
+import os
+import re
+import threading
+
+from config import REWRITE_CACHE_SIZE, REWRITE_MIN_WORDS, REWRITE_MATERIAL_THRESHOLD
+
+REWRITE_CACHE_FILE = "rewrite_cache.json"
+
+_caches = {}
+
+
+def normalize_query(question: str) -> str:
+    """
+    Normalizes a query for cache lookups: lowercase, collapsed whitespace, no surrounding punctuation.
+    """
+    return re.sub(r"\s+", " ", question.lower()).strip(" \t\n?!.,;:'\"")
+
+
+def needs_rewrite(question: str, min_words: int = REWRITE_MIN_WORDS) -> bool:
+    """
+    Fast heuristic: very short queries are already keyword-like and are searched as they are.
+    """
+    return len(question.split()) > min_words
+
+
+def differs_materially(question: str, rewritten: str,
+                       threshold: float = REWRITE_MATERIAL_THRESHOLD) -> bool:
+    """
+    Checks if the rewrite changes the query enough to be worth another retrieval,
+    using the Jaccard similarity of their word sets.
+    """
+    original = set(re.findall(r"\w+", question.lower()))
+    rewrite = set(re.findall(r"\w+", rewritten.lower()))
+
+    if not original or not rewrite:
+        return bool(rewrite)
+
+    return len(original & rewrite) / len(original | rewrite) < threshold
+
+
+class RewriteCache:
+    """
+    Per-session LRU memo of the query rewriter. Queries are looked up exactly first,
+    then by their normalized form, so trivial variations of a question reuse the rewrite.
+    """
+
+    def __init__(self, session_path: str, max_entries: int = REWRITE_CACHE_SIZE):
+        self.path = os.path.join(session_path, "utils", REWRITE_CACHE_FILE)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = OrderedDict(json.load(f))
+            except Exception as e:
+                print(f"Error reading rewrite cache {self.path}: {e}")
+
+    def get(self, question: str) -> Optional[str]:
+        with self._lock:
+            for key in ("exact:" + question, "normalized:" + normalize_query(question)):
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, rewritten: str) -> None:
+        with self._lock:
+            for key in ("exact:" + question, "normalized:" + normalize_query(question)):
+                self.entries[key] = rewritten
+                self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(list(self.entries.items()), f, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def get_rewrite_cache(session_path: str) -> RewriteCache:
+    """
+    Returns the rewrite cache of the session, loading it from disk only once per process.
+    """
+    key = os.path.abspath(session_path)
+
+    if key not in _caches:
+        _caches[key] = RewriteCache(session_path)
+    return _caches[key]
+
+def drop_rewrite_cache(session_path: str) -> None:
+    """
+    Forgets the cached rewrite cache of the session, its entries stay on disk.
+    """
+    _caches.pop(os.path.abspath(session_path), None)
@@ -0,0 +1,63 @@
+from typing import List, Dict
+import threading
+import weakref
+
+from agents.summarizer import run_incremental_summarizer
+from memory.memory import AgentMemory
+from utils import count_tokens, truncate_to_tokens
+from config import SUMMARY_MAX_TOKENS, SUMMARY_DELTA_MAX_TOKENS
+
+# One fold at a time per memory, so two turns never fold the same messages twice
+_locks = weakref.WeakKeyDictionary()
+_locks_lock = threading.Lock()
+
+
+def _memory_lock(memory: AgentMemory) -> threading.Lock:
+    with _locks_lock:
+        if memory not in _locks:
+            _locks[memory] = threading.Lock()
+        return _locks[memory]
+
+
+def render_messages(messages: List[Dict], budget: int = SUMMARY_DELTA_MAX_TOKENS) -> str:
+    """
+    Renders messages for the summarizer within a token budget. Messages over their even share of the
+    budget are truncated, what the short ones leave unused goes to the longer ones.
+    """
+    rendered = [f"{m.get('role', 'system').capitalize()}: {m.get('content', '')}" for m in messages]
+
+    remaining = budget
+
+    # Shortest first, so each message gets an even share of what the shorter ones left over
+    order = sorted(range(len(rendered)), key=lambda i: count_tokens(rendered[i]))
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        rendered[i] = truncate_to_tokens(rendered[i], share)
+        remaining -= count_tokens(rendered[i])
+
+    return "\n".join(rendered)
+
+
+def fold_new_messages(reasoning_llm, memory: AgentMemory, extra: List[Dict] = None,
+                      max_tokens: int = SUMMARY_MAX_TOKENS) -> bool:
+    """
+    Folds the messages added since the last summary into memory.chat_summary.
+    Args:
+        reasoning_llm: The language model to use for summarization.
+        memory: The memory to summarize.
+        extra (list): Optional messages outside of the chat history to fold in too, e.g. agentic step reports.
+        max_tokens (int): The token budget of the summary.
+    Returns:
+        bool: True if the summary was updated.
+    """
+    with _memory_lock(memory):
+        upto = len(memory.chat_history_total)
+        delta = memory.chat_history_total[memory.summarized_upto:upto] + (extra or [])
+
+        if not delta:
+            return False
+
+        memory.chat_summary = run_incremental_summarizer(reasoning_llm, memory.chat_summary,
+                                                         render_messages(delta), max_tokens)
+        memory.summarized_upto = upto
+        return True
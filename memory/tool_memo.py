@@ -0,0 +1,221 @@
+from typing import Optional, Any
+import ast
+import json
+import re
+import threading
+
+from utils import is_tool_error
+
+
+def normalize_arguments(arguments: Any) -> str:
+    """
+    Normalizes tool arguments for memo lookups: JSON or Python literals with sorted keys,
+    other text lowercased with collapsed whitespace and no surrounding quotes.
+    """
+    if isinstance(arguments, str):
+        # Tools get JSON or Python literals, e.g. "{'query': ..., 'max_results': 5}"
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                arguments = parse(arguments)
+                break
+            except Exception:
+                continue
+
+    if isinstance(arguments, str):
+        return re.sub(r"\s+", " ", arguments.lower()).strip(" \t\n'\"")
+    return json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str).lower()
+
+
+def normalize_step(step: str) -> str:
+    """
+    Normalizes a plan step: no "Step N." prefix, lowercase, words only, so a replanned copy of a step matches it.
+    """
+    step = re.sub(r"^\W*step\s*\d+\s*[.:)-]?", "", step, flags=re.IGNORECASE)
+    return " ".join(re.findall(r"\w+", step.lower()))
+
+
+class ToolMemo:
+    """
+    Memo table of an agentic run: tool calls keyed by tool name and normalized arguments, and agent steps
+    keyed by their normalized text. A replanned step that repeats a finished one reuses its answer, and the
+    agent reuses the results of searches, downloads and RAG queries it already ran, instead of repeating them.
+    A step is stored with the scope and session state of the tools it used, it is forgotten once the scope
+    of one of them changes (e.g. the arXiv links a download indexes into) or their results are invalidated.
+    """
+
+    def __init__(self):
+        self.tools = {}  # (tool name, normalized arguments, scope) -> (result, state)
+        self.steps = {}  # normalized step -> (answer, parsed answer, summary, tools, failed tools, tool scopes)
+        self.tracked = {}  # tool name -> (scope, restore) of its memoize_tool wrapper, once it is called
+        self.hits = 0
+        self.misses = 0
+        self.step_hits = 0
+        self.step_misses = 0
+        self.on_change = None  # Optional, called after every stored or forgotten result, e.g. to checkpoint the memo
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        """
+        Returns the stored results in a JSON serializable form, the counters are not kept.
+        """
+        with self._lock:
+            return {"tools": [[name, arguments, scope, result, state]
+                              for (name, arguments, scope), (result, state) in self.tools.items()],
+                    "steps": {step: list(result) for step, result in self.steps.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ToolMemo":
+        memo = cls()
+        memo.tools = {(name, arguments, scope): (result, state)
+                      for name, arguments, scope, result, state in data.get("tools", [])}
+        # Steps stored without the scopes of their tools cannot be checked, they run again
+        memo.steps = {step: tuple(result) for step, result in data.get("steps", {}).items() if len(result) == 6}
+        return memo
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"Saving the tool memo failed: {e}")
+
+    def get_tool(self, name: str, arguments: Any, scope: str = "") -> Optional[tuple]:
+        """
+        Returns the (result, state) of an identical earlier call, None on a miss.
+        """
+        key = (name, normalize_arguments(arguments), scope)
+        with self._lock:
+            if key in self.tools:
+                self.hits += 1
+                return self.tools[key]
+            self.misses += 1
+            return None
+
+    def put_tool(self, name: str, arguments: Any, result: Any, scope: str = "", state: Any = None) -> None:
+        """
+        Stores the result of a call, with the session state it left behind. Calls reporting a tool_error are not stored.
+        """
+        if result is None or is_tool_error(result):
+            return
+        with self._lock:
+            self.tools[(name, normalize_arguments(arguments), scope)] = (result, state)
+        self._changed()
+
+    def invalidate_tool(self, name: str) -> None:
+        """
+        Forgets the results of a tool and the steps that used it, e.g. RAG searches after new documents were ingested.
+        """
+        with self._lock:
+            self.tools = {key: result for key, result in self.tools.items() if key[0] != name}
+            self.steps = {key: result for key, result in self.steps.items() if name not in result[3]}
+        self._changed()
+
+    def track(self, name: str, scope=None, restore=None) -> None:
+        """
+        Registers what the results of a tool depend on, see memoize_tool, so the steps using it can be checked.
+        """
+        if scope is not None or restore is not None:
+            with self._lock:
+                self.tracked[name] = (scope, restore)
+
+    def _tool_scopes(self, tools: list) -> dict:
+        # tool name -> [scope, session state] for the tracked tools of a step
+        with self._lock:
+            tracked = {name: self.tracked[name] for name in tools if name in self.tracked}
+
+        return {name: [scope() if scope is not None else None, restore() if restore is not None else None]
+                for name, (scope, restore) in tracked.items()}
+
+    def get_step(self, step: str) -> Optional[tuple]:
+        """
+        Returns the (answer, parsed answer, summary, tools, failed tools) of an identical step of the run, None on a miss.
+        A step whose tools have another scope now is forgotten, on a hit the session state of its tools is restored.
+        """
+        key = normalize_step(step)
+
+        with self._lock:
+            result = self.steps.get(key)
+
+        if result is not None:
+            answer, summ, summary, tools, failed, scopes = result
+            current = self._tool_scopes(list(scopes))
+
+            # Tools not called yet by this process (e.g. after a resume) cannot be checked either
+            if any(name not in current or current[name][0] != scope for name, (scope, _) in scopes.items()):
+                print(f"Step memo: the tool scope of '{step}' changed, it runs again")
+                self.drop_step(step)
+                result = None
+
+        with self._lock:
+            if result is None:
+                self.step_misses += 1
+                return None
+            self.step_hits += 1
+
+        for name, (_, state) in scopes.items():
+            restore = self.tracked[name][1]
+            if restore is not None:
+                restore(state)
+
+        return answer, summ, summary, tools, failed
+
+    def put_step(self, step: str, answer: str, summ: str, summary: str, tools: list, failed: list = ()) -> None:
+        scopes = self._tool_scopes(tools)
+        with self._lock:
+            self.steps[normalize_step(step)] = (answer, summ, summary, tools, list(failed), scopes)
+        self._changed()
+
+    def drop_step(self, step: str) -> None:
+        """
+        Forgets a step, e.g. one whose evaluation asked for a different plan.
+        """
+        with self._lock:
+            self.steps.pop(normalize_step(step), None)
+        self._changed()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tool_hits": self.hits, "tool_misses": self.misses,
+                    "step_hits": self.step_hits, "step_misses": self.step_misses}
+
+
+def memoize_tool(name: str, func, memory, scope=None, restore=None, invalidates: str = None):
+    """
+    Wraps a tool function with the memo table of the running agentic task (memory.tool_memo),
+    the function runs as it is outside of agentic tasks.
+    Args:
+        name (str): The tool name.
+        func: The tool function, called with the tool input.
+        memory: The AgentMemory of the session.
+        scope: Optional, returns what else the result depends on, e.g. the links a download indexes into.
+        restore: Optional, returns the session state a call leaves behind, and is given it back on a hit.
+        invalidates (str): Optional, the tool whose results are outdated once this one runs.
+    """
+    def memoized(tool_input):
+        memo = getattr(memory, "tool_memo", None)
+        if memo is None:
+            return func(tool_input)
+
+        memo.track(name, scope, restore)
+
+        key_scope = scope() if scope is not None else ""
+        cached = memo.get_tool(name, tool_input, key_scope)
+
+        if cached is not None:
+            print(f"Tool memo hit: {name}({tool_input})")
+            result, state = cached
+            if restore is not None:
+                restore(state)
+            return result
+
+        # A raised call is not stored, the agent sees it as a tool message with an error status
+        result = func(tool_input)
+
+        # A failed call changed nothing, e.g. a download that got no papers
+        if invalidates is not None and not is_tool_error(result):
+            memo.invalidate_tool(invalidates)
+        memo.put_tool(name, tool_input, result, key_scope, state=restore() if restore is not None else None)
+
+        return result
+
+    return memoized
@@ -1,13 +1,15 @@
 from .parse_agent import parse_agent
-from .parse_critic_plan import parse_critic_plan
+from .parse_critic_plan import parse_critic_plan, parse_step_dependencies
 from .parse_eval import parse_eval
-from .parse_router import parse_router
+from .parse_router import parse_router, RouterStreamParser
 from .parse_plan import extract_tools_from_plan
 
 __all__ = [
     "parse_agent",
     "parse_critic_plan",
+    "parse_step_dependencies",
     "parse_eval",
     "parse_router",
+    "RouterStreamParser",
     "extract_tools_from_plan"
 ]
@@ -1,3 +1,6 @@
+import re
+from typing import List, Set, Tuple
+
 def parse_critic_plan(text: str):
 
     steps = []
@@ -29,4 +32,39 @@ def parse_critic_plan(text: str):
             step_string += line
         folded_steps.append(step_string)
 
-    return folded_steps
\ No newline at end of file
+    return folded_steps
+
+DEPENDENCY_PATTERN = re.compile(r"\[\s*depends on\s*:\s*([^\]]*)\]", re.IGNORECASE)
+
+def parse_step_dependencies(steps: List[str]) -> Tuple[List[str], List[Set[int]]]:
+    """
+    Splits the "[depends on: 1, 3]" annotations off the plan steps.
+    Args:
+        steps (List[str]): The steps from parse_critic_plan.
+    Returns:
+        tuple: The steps without the annotations, and for each step the positions of the earlier steps it needs.
+        A step without an annotation needs the step before it, so unannotated plans run in sequence.
+        References to steps outside the plan, e.g. steps completed before a replan, are already satisfied.
+    """
+    positions = {}
+    for position, step in enumerate(steps):
+        match = re.match(r"\W*step\s*(\d+)", step, re.IGNORECASE)
+        if match:
+            positions.setdefault(int(match.group(1)), position)
+
+    clean_steps, dependencies = [], []
+    for position, step in enumerate(steps):
+        match = DEPENDENCY_PATTERN.search(step)
+
+        if match is None:
+            needs = {position - 1} if position > 0 else set()
+        else:
+            # Only earlier steps, so the plan stays acyclic
+            needs = {positions[int(number)] for number in re.findall(r"\d+", match.group(1))
+                     if int(number) in positions and positions[int(number)] < position}
+            step = DEPENDENCY_PATTERN.sub("", step).strip()
+
+        clean_steps.append(step)
+        dependencies.append(needs)
+
+    return clean_steps, dependencies
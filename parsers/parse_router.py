@@ -1,4 +1,11 @@
-import re 
+import re
+from typing import Optional
+
+ROUTE_CHOICES = ("QuickResponse", "RAG", "Agentic")
+RAG_ROUTE_CHOICES = ("STAY", "ESCALATE")
+
+# Longest text a decision line can span, the stream parser only rescans this much of the old text
+_DECISION_WINDOW = 64
 
 def parse_router(response:str, debug:bool = False) -> str:
 
@@ -18,4 +25,42 @@ def parse_router(response:str, debug:bool = False) -> str:
     except Exception as e:
         if debug:
             print(f"❌ Parsing the router failed: {e}")
-        return None
\ No newline at end of file
+        return None
+
+class RouterStreamParser:
+    """
+    Incremental parse_router for streamed router output. The tokens are fed as they arrive and the
+    decision is reported as soon as the "Choosen Pipeline:" line is complete, so the caller can stop
+    the generation there instead of waiting for the rest of the reasoning.
+    """
+
+    def __init__(self, choices: tuple = ROUTE_CHOICES):
+        # The lookahead waits for the character after the choice, so a split token is never cut short
+        self.pattern = re.compile(r"Choosen Pipeline:\s*(" + "|".join(choices) + r")(?=\W)")
+        self.text = ""
+        self.decision = None
+
+    def feed(self, token: str) -> Optional[str]:
+        """
+        Adds a streamed token.
+        Returns:
+            str: The decision once it is parsed, None before.
+        """
+        if self.decision is not None or not token:
+            return self.decision
+
+        scan_from = max(0, len(self.text) - _DECISION_WINDOW)
+        self.text += token
+
+        match = self.pattern.search(self.text, scan_from)
+        if match:
+            self.decision = match.group(1)
+        return self.decision
+
+    def finish(self, debug: bool = False) -> Optional[str]:
+        """
+        Parses the complete output once the stream has ended without an early decision.
+        """
+        if self.decision is None:
+            self.decision = parse_router(self.text, debug=debug)
+        return self.decision
@@ -0,0 +1,32 @@
+// src/app/api/events/route.js
+
+// Server-Sent Events are streamed, never cached
+export const dynamic = 'force-dynamic';
+
+export async function GET(request) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const lastEventId = request.headers.get('last-event-id');
+
+    // Forward the resume point so the backend replays the events missed during a reconnect
+    const res = await fetch(`http://localhost:8001/events?${searchParams.toString()}`, {
+      headers: lastEventId ? { 'Last-Event-ID': lastEventId } : {},
+      signal: request.signal,
+    });
+
+    if (!res.ok) {
+      throw new Error(`Backend responded with status: ${res.status}`);
+    }
+
+    return new Response(res.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+      }
+    });
+  } catch (error) {
+    console.error('Events API error:', error);
+    return new Response('Failed to connect to the event stream', { status: 502 });
+  }
+}
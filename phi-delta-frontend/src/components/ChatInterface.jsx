@@ -7,10 +7,15 @@ import remarkMath from 'remark-math';
 import rehypeKatex from 'rehype-katex';
 import 'katex/dist/katex.min.css';
 
+// Sent by the backend when a streamed RAG draft is escalated to the agentic pipeline (RAG_SUPERSEDED_MARKER)
+const SUPERSEDED_MARKER = '\n\n[[superseded]]\n';
+
 export default function ChatInterface() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
   const [thinkingSteps, setThinkingSteps] = useState([]);
+  const [memoStats, setMemoStats] = useState(null); // Reused step and tool results of the agentic run
+  const [evaluationStats, setEvaluationStats] = useState(null); // Evaluated and skipped steps of the agentic run
   const [isThinking, setIsThinking] = useState(false);
   const [isThinkingExpanded, setIsThinkingExpanded] = useState(false);
   const [uploadedFiles, setUploadedFiles] = useState([]);
@@ -113,6 +118,8 @@ export default function ChatInterface() {
     setIsThinking(false);
     setIsStreamingActive(false); // Reset streaming state
     setThinkingSteps([]);
+    setMemoStats(null);
+    setEvaluationStats(null);
     currentThinkingStepsRef.current = [];
     setIsSidebarOpen(false);
 
@@ -199,6 +206,8 @@ export default function ChatInterface() {
         setMessages([]);
         setInput('');
         setThinkingSteps([]);
+        setMemoStats(null);
+        setEvaluationStats(null);
         setIsThinking(false);
         setIsStreamingActive(false); // Reset streaming state
         setUploadedFiles([]);
@@ -293,53 +302,38 @@ export default function ChatInterface() {
     setIsThinking(true);
     setIsStreamingActive(false); // Reset streaming state
     setThinkingSteps([]);
+    setMemoStats(null);
+    setEvaluationStats(null);
     currentThinkingStepsRef.current = []; // Reset the ref for new request
 
     try {
-      // Start polling for thinking steps
-      const thinkingInterval = setInterval(async () => {
-        // Skip thinking steps polling during streaming
-        if (isStreamingActive) {
-          return;
-        }
-        
-        try {
-          const thinkingRes = await fetch('/api/get-chat-history');
-          
-          if (!thinkingRes.ok) {
-            console.warn('Thinking API not available yet');
-            return;
-          }
-          
-          const steps = await thinkingRes.json();
-          console.log('Received thinking steps:', steps);
-          
-          if (Array.isArray(steps) && steps.length > 0) {
-            setThinkingSteps(steps);
-            currentThinkingStepsRef.current = steps; // Keep ref updated
-          }
-        } catch (error) {
-          console.error('Error fetching thinking steps:', error);
-        }
-      }, 500);
+      // Thinking steps and job state changes are pushed by the backend, the browser resumes the stream on reconnect
+      const events = new EventSource('/api/events');
+      const stopEvents = () => events.close();
 
-      // Start polling for processing status
-      const statusInterval = setInterval(async () => {
-        // Skip status polling during streaming
-        if (isStreamingActive) {
-          return;
-        }
-        
-        try {
-          const statusRes = await fetch('/api/get-processing-status');
-          const status = await statusRes.json();
-          
-          console.log('Processing status:', status); // Debug log
-          
-          if (!status.is_processing && status.has_result) {
+      events.addEventListener('thinking_step', (event) => {
+        const step = JSON.parse(event.data);
+        console.log('Received thinking step:', step);
+
+        currentThinkingStepsRef.current = [...currentThinkingStepsRef.current, step]; // Keep ref updated
+        setThinkingSteps(currentThinkingStepsRef.current);
+      });
+
+      events.addEventListener('memo', (event) => {
+        setMemoStats(JSON.parse(event.data));
+      });
+
+      events.addEventListener('evaluation', (event) => {
+        setEvaluationStats(JSON.parse(event.data));
+      });
+
+      events.addEventListener('job', async (event) => {
+        const job = JSON.parse(event.data);
+        console.log('Job update:', job); // Debug log
+
+        if (job.kind === 'agentic' && ['done', 'failed', 'cancelled'].includes(job.status)) {
             // Processing is complete, get the streaming final result
-            clearInterval(thinkingInterval);
-            clearInterval(statusInterval);
+            stopEvents();
             
             // Update thinking status to show we're finalizing
             setThinkingSteps(prev => [...prev, {
@@ -439,12 +433,8 @@ export default function ChatInterface() {
               };
               setMessages(prev => [...prev, errorMsg]);
             }
-            return;
-          }
-        } catch (error) {
-          console.error('Error checking processing status:', error);
         }
-      }, 1000);
+      });
 
       const res = await fetch('/api/chat', {
         method: 'POST',
@@ -460,8 +450,7 @@ export default function ChatInterface() {
         console.log('🚀 Starting immediate streaming response');
         setIsStreamingActive(true); // Mark streaming as active
         
-        clearInterval(thinkingInterval);
-        clearInterval(statusInterval);
+        // The event stream stays open until the reply ends, a superseded RAG draft continues as an agentic task
         setIsThinking(false);
         
         const reader = res.body.getReader();
@@ -481,17 +470,28 @@ export default function ChatInterface() {
             const chunk = decoder.decode(value, { stream: true });
             accumulatedContent += chunk;
             
-            // Update the assistant message in real-time
+            // Update the assistant message in real-time, never showing the marker
+            const visibleContent = accumulatedContent.split(SUPERSEDED_MARKER)[0];
             setMessages(prev => prev.map((msg, idx) => 
-              idx === assistantMsgIndex ? { ...msg, content: accumulatedContent } : msg
+              idx === assistantMsgIndex ? { ...msg, content: visibleContent } : msg
             ));
           }
           
           console.log('✅ Immediate streaming completed');
           setIsStreamingActive(false); // Mark streaming as complete
+
+          if (accumulatedContent.includes(SUPERSEDED_MARKER)) {
+            // Retract the draft, the event stream fetches the agentic result when it is ready
+            console.log('↩️ RAG draft superseded, waiting for the agentic task');
+            setMessages(prev => prev.filter((_, idx) => idx !== assistantMsgIndex));
+            setIsThinking(true);
+          } else {
+            stopEvents();
+          }
           
         } catch (streamError) {
           console.error('Streaming error:', streamError);
+          stopEvents();
           setIsStreamingActive(false); // Mark streaming as complete even on error
           setMessages(prev => prev.map((msg, idx) => 
             idx === assistantMsgIndex ? { ...msg, content: accumulatedContent + '\n\n[Stream interrupted]' } : msg
@@ -503,12 +503,11 @@ export default function ChatInterface() {
         
         // If it's not agentic (immediate response), clear intervals and show result
         if (!reply.includes('🔄 Processing')) {
-          clearInterval(thinkingInterval);
-          clearInterval(statusInterval);
+          stopEvents();
           setIsThinking(false);
           setMessages(prev => [...prev, { role: 'assistant', content: reply }]);
         }
-        // If it's agentic, the intervals will handle the final result
+        // If it's agentic, the event stream will handle the final result
       }
       
     } catch (error) {
@@ -1258,6 +1257,16 @@ export default function ChatInterface() {
                         Step {thinkingSteps.length}
                       </span>
                     )}
+                    {memoStats && (
+                      <span className="text-slate-500 text-xs">
+                        · Reused {memoStats.step_hits}/{memoStats.step_hits + memoStats.step_misses} steps, {memoStats.tool_hits}/{memoStats.tool_hits + memoStats.tool_misses} tool calls
+                      </span>
+                    )}
+                    {evaluationStats && (
+                      <span className="text-slate-500 text-xs">
+                        · Evaluated {evaluationStats.evaluated}, skipped {evaluationStats.skipped}
+                      </span>
+                    )}
                   </div>
                   <div className={`transform transition-transform duration-200 ${isThinkingExpanded ? 'rotate-180' : ''}`}>
                     <svg className="w-5 h-5 text-slate-400" fill="currentColor" viewBox="0 0 20 20">
@@ -1,8 +1,87 @@
 from agents import run_agent, run_evaluator, run_humanizer, run_finalizer, run_summarizer
-from parsers import parse_agent, parse_eval
+from parsers import parse_agent, parse_eval, parse_step_dependencies, extract_tools_from_plan
 from langchain_openai import ChatOpenAI
 from memory.memory import AgentMemory
+from memory.tool_memo import ToolMemo
 from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from agents.core.context_budget import Section
+from pipelines.run_checkpoint import RunCheckpoint
+from pipelines.evaluation_policy import EvaluationPolicy, SKIPPED_EVALUATION
+from config import CONTEXT_STEP_SUMMARY_MAX_TOKENS, AGENTIC_STEP_WORKERS, AGENTIC_MAX_PARALLEL_STEPS, AGENTIC_HUMANIZER_WORKERS
+import threading
+import time
+
+# Shared by the agentic tasks for the step summarizer, which the step waits for
+_executor = ThreadPoolExecutor(max_workers=AGENTIC_STEP_WORKERS, thread_name_prefix="agentic-step")
+
+# The humanizer only feeds the UI, it gets its own threads so a summary never queues behind prefetched humanizations
+_humanizer_executor = ThreadPoolExecutor(max_workers=AGENTIC_HUMANIZER_WORKERS, thread_name_prefix="agentic-humanizer")
+
+# Tools sharing session state (the results of the last arXiv search), steps using them never overlap
+ORDERED_TOOLS = {"arxiv_search", "download_tool"}
+
+def _plan_graph(plan: List[str]) -> tuple:
+    """
+    Returns the steps of the plan without their dependency annotations, and the positions of the steps each needs.
+    """
+    steps, dependencies = parse_step_dependencies(plan)
+
+    previous = None
+    for position, step in enumerate(steps):
+        if ORDERED_TOOLS & set(extract_tools_from_plan(step)):
+            if previous is not None:
+                dependencies[position].add(previous)
+            previous = position
+
+    return steps, dependencies
+
+def _timed(fn, *args, **kwargs):
+    """
+    Runs fn and returns its result with the elapsed milliseconds.
+    """
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+class _StepDisplay:
+    """
+    Shows the humanized steps in order, each once its step has started and its humanization is done,
+    so the humanizer never holds up the step itself.
+    """
+
+    def __init__(self, memory: AgentMemory, on_step=None):
+        self.memory = memory
+        self.on_step = on_step
+        self.pending = deque()  # (step number, humanizer future, raw step, step_history entry, timing)
+        self._lock = threading.Lock()
+
+    def show(self, j: int, future, step: str, entry: dict, timing: dict) -> None:
+        with self._lock:
+            self.pending.append((j, future, step, entry, timing))
+        future.add_done_callback(lambda _: self._flush())
+        self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            while self.pending and self.pending[0][1].done():
+                j, future, step, entry, timing = self.pending.popleft()
+
+                try:
+                    description, timing["humanize_ms"] = future.result()
+                except Exception as e:
+                    # Display only, the raw step is shown instead
+                    print(f"Humanizing step {j} failed: {e}")
+                    description = step
+
+                print(description)
+
+                entry[f"Step {j}"] = description
+                self.memory.thinkingsteps.append({"step": j, "description": description})
+
+                if self.on_step is not None:
+                    self.on_step(self.memory.thinkingsteps[-1])
 
 def agentic_behaviour(llm: ChatOpenAI, 
                       agent, 
@@ -10,9 +89,18 @@ def agentic_behaviour(llm: ChatOpenAI,
                       question: str,  
                       memory: AgentMemory,
                       rag: bool = False, 
-                      log: bool = False) -> list:
+                      log: bool = False,
+                      checkpoint = None,
+                      on_step = None,
+                      on_memo = None,
+                      on_evaluation = None,
+                      run_checkpoint: RunCheckpoint = None,
+                      resume: dict = None) -> list:
     """
-    Executes the agentic behaviour by running the agent through a series of steps.
+    Executes the agentic behaviour by running the agent through the steps of the plan.
+    Steps run as soon as the steps they depend on are done, independent ones at the same time,
+    and their results are merged into the step history in plan order, where the evaluator
+    of each step can stop the task or replace the rest of the plan.
     Args:
         llm: The language model to use for reasoning and summarization.
         agent: The agent to run through the steps.
@@ -21,110 +109,318 @@ def agentic_behaviour(llm: ChatOpenAI,
         memory: An object that stores state, such as chat history and thinking steps.
         rag (bool): If True, enables RAG (Retrieval-Augmented Generation) mode.
         log (bool): If True, enables logging for debugging purposes.
+        checkpoint: Optional, called before every step, e.g. to stop a cancelled job.
+        on_step: Optional, called with every thinking step as it is added, e.g. to push it to the client.
+        on_memo: Optional, called with the hit and miss counts of the step and tool memo after every merge.
+        on_evaluation: Optional, called with the evaluated and skipped step counts after every merge.
+        run_checkpoint: Optional, the run is checkpointed into it after every finished step.
+        resume: Optional, a checkpoint to continue from, its plan replaces the given one.
     Returns:
         str: A message indicating the completion of the agentic behaviour.
     """
 
-    i,j = 0,1
+    j = 1
     
-    step_by_step_context = "Summary of the previous steps:"
+    step_summaries = ["Summary of the previous steps:"]
 
     ## Clearing the step history
     memory.step_history.clear()
+    memory.step_timings.clear()
+
+    # Steps and tool calls of this run, a new plan that repeats them reuses their results,
+    # and so does a resumed run, with the calls it completed before it was interrupted
+    if resume is not None and resume.get("tool_memo"):
+        memo = memory.tool_memo = ToolMemo.from_dict(resume["tool_memo"])
+    else:
+        memo = memory.tool_memo = ToolMemo()
+
+    if run_checkpoint is not None:
+        memo.on_change = lambda: run_checkpoint.save_memo(memo)
+        run_checkpoint.save_memo(memo)
+
+    evaluation_policy = EvaluationPolicy()
 
 
     if not rag: memory.step_history.append({"question":question})
 
-    while i < len(plan):
+    merged = 0    # The steps of the plan before this position are merged into the history, in plan order
+    restored = {} # position -> step finished but not merged when the checkpoint was written
+    stop, new_plan = False, None
+    run_messages = [] # The chat history messages added by the run
+
+    if resume is not None:
+        plan = resume["plan"]
+        merged = resume["merged"]
+        restored = {int(position): step for position, step in resume["finished"].items()}
+        j = resume["next_number"]
+        step_summaries = resume["step_summaries"]
+        memory.step_history[:] = resume["step_history"]
+
+        # Only the messages the run added are restored, the rest of the chat is the session's own
+        run_messages = resume.get("chat_messages", [])
+        memory.chat_history.extend(message for message in run_messages if message not in memory.chat_history)
+
+        # The run was interrupted after its last evaluation stopped it or replaced the plan
+        if resume.get("stopped"):
+            plan = []
+        elif resume.get("new_plan"):
+            plan, merged, restored = resume["new_plan"], 0, {}
+
+        print(f"Resuming the agentic run at step {merged + 1} of {len(plan)}, {len(restored)} later step(s) already done")
+
+    def save_checkpoint():
+        if run_checkpoint is None:
+            return
+
+        # Everything needed to continue without running a finished step again
+        run_checkpoint.save({
+            "question": question,
+            "rag": rag,
+            "plan": plan,
+            "merged": merged,
+            "finished": {str(position): {"entry": entries[position], "number": numbers[position], "result": list(result)}
+                         for position, result in finished.items()},
+            "next_number": j,
+            "step_history": memory.step_history,
+            "step_summaries": step_summaries,
+            "chat_messages": run_messages,
+            "stopped": stop,
+            "new_plan": new_plan
+        })
+
+    # The humanizer only feeds the UI, so steps are humanized in the background before and while they run,
+    # and the step summarizer runs next to the evaluator, both only need the agent's answer
+    display = _StepDisplay(memory, on_step)
+    humanized = {}  # step -> humanizer future, reused when a new plan repeats a step
+
+    def humanize(step: str):
+        if step not in humanized:
+            humanized[step] = _humanizer_executor.submit(_timed, run_humanizer, llm, step)
+        return humanized[step]
+
+    def run_step(step: str, position: int, steps: List[str], context: str, summaries: List[str], timing: dict,
+                 memoized: bool) -> tuple:
+        step_started = time.perf_counter()
+
+        # Only steps without dependencies are memoized, the answer of any other builds on the steps before it
+        reused = memo.get_step(step) if memoized else None
+        timing["memo"] = reused is not None
+
+        if reused is not None:
+            # The same step already ran in an earlier plan, only its evaluation against the new plan is repeated
+            print(f"Step memo hit: {step}")
+            answer, summ, summary, tools, failed = reused
+            summary_future = None
+        else:
+            (answer, tools, failed), timing["agent_ms"] = _timed(run_agent,
+                                                                 agent=agent,
+                                                                 step=step, 
+                                                                 context=context,
+                                                                 rag=rag)
+
+            if log:
+                print("\n\nagent ran\n\n")
+
+            summary_future = _executor.submit(_timed, run_summarizer, reasoning_llm=llm, memory=memory,
+                                             step=step, answer=answer)
 
-        if log:
-            print("-"*60 + f" {i}th Step " + "-"*60)
+        summ, res = parse_agent(answer)
 
-        print(i, j, plan[i])
+        print("Resources: ",res)
 
-        humanized_step_desc = run_humanizer(llm, plan[i])
+        # Clean steps are not evaluated, anomalous ones and every EVALUATION_EVERY_N_STEPS-th step are
+        # The run failed or was cancelled while the agent worked, its result is never merged
+        if aborted.is_set():
+            return None
 
+        reason = evaluation_policy.reason(position, summ, res, failed)
+        timing["evaluation"] = reason or "skipped"
 
-        print(humanized_step_desc)
+        if reason is None:
+            evaluation = SKIPPED_EVALUATION
+        else:
+            if failed:
+                print(f"Step {timing['step']} tool calls failed: {failed}")
 
-        memory.thinkingsteps.append({"step": j, "description": humanized_step_desc})
+            evaluation, timing["evaluate_ms"] = _timed(run_evaluator,
+                                                       reasoning_llm=llm, 
+                                                       action=summ or answer, 
+                                                       step=step, 
+                                                       steps=steps, 
+                                                       question=question,
+                                                       rag=rag,
+                                                       previous=evaluation_policy.batch(position, reason, summaries))
 
-        if log:
-            print(f"\n\n {i}th Context (Summary): ", memory.chat_summary, "\n\n")
+        if summary_future is not None:
+            summary, timing["summarize_ms"] = summary_future.result()
+            if memoized:
+                memo.put_step(step, answer, summ, summary, tools, failed)
 
-        answer, tools = run_agent(agent=agent,
-                                  step=plan[i], 
-                                  context=step_by_step_context,
-                                  rag=rag)
+        timing["wall_ms"] = round((time.perf_counter() - step_started) * 1000, 1)
+        print(f"Step {timing['step']} timings: {timing}")
 
-        memory.step_history.append({f"Step {j}":humanized_step_desc, f"Report {j}":answer})
+        return answer, summ, summary, evaluation, tools
 
-        if log:
-            print("\n\nagent ran\n\n")
+    # Independent steps of the plan run at the same time, up to AGENTIC_MAX_PARALLEL_STEPS
+    pool = ThreadPoolExecutor(max_workers=AGENTIC_MAX_PARALLEL_STEPS, thread_name_prefix="agentic-plan")
+    aborted = threading.Event()  # Set when the run leaves early, running steps stop before their evaluation
 
-        summ, res = parse_agent(answer)
+    try:
+        while plan:
 
-        print("Resources: ",res)
+            steps, dependencies = _plan_graph(plan)
 
-        summary = run_summarizer(reasoning_llm=llm, memory=memory, step=plan[i], answer=answer)
+            entries = {}   # position -> step_history entry of a started step
+            numbers = {}   # position -> displayed step number
+            running = {}   # future -> position
+            finished = {}  # position -> result of run_step, until it is merged
+            new_plan, stop = None, False
 
-        print(f"\n\n {i}th run_summarizer Summary: ", summary, "\n\n")
-        # print(f"\nFound Resources: {res}\n")
+            for position, step in restored.items():
+                entries[position], numbers[position] = step["entry"], step["number"]
+                finished[position] = tuple(step["result"])
+            restored = {}
 
-        # Since agent does not need all the summarized context, we only feed with the summary of the previous steps
-        step_by_step_context += summary
-        
-        if len(step_by_step_context) > 1000:
-            step_by_step_context = step_by_step_context[-1000:]
+            save_checkpoint()
 
-        if log:
-            print(f"\n\n {i}th Summary: ", summ, "\n\n")
-            print("\nAnswer: "+answer +"\n\n")
+            while merged < len(steps):
 
-        memory.chat_history.append({"role":"system","content": answer})
+                # A step starts once the steps it needs are merged, so it never builds on a result its evaluation replaced
+                for i in range(merged, len(steps)):
+                    if len(running) >= AGENTIC_MAX_PARALLEL_STEPS:
+                        break
+                    if i in entries or any(needed >= merged for needed in dependencies[i]):
+                        continue
 
-        evaluation = run_evaluator(reasoning_llm=llm, 
-                                   action=summ, 
-                                   step=plan[i], 
-                                   steps=plan, 
-                                   question=question,
-                                   rag=rag)
+                    if checkpoint is not None:
+                        checkpoint()
 
-        if log:
-            print(f"\n\n {i}th Evaluation: ", evaluation, "\n\n")
-        
-        parsed_eval = parse_eval(evaluation)
+                    if log:
+                        print("-"*60 + f" {i}th Step " + "-"*60)
 
-        print(parsed_eval)
-        print(type(parsed_eval))
+                    print(i, j, steps[i])
 
-        if parsed_eval == -1:
-            break
-                
-        elif isinstance(parsed_eval, list):
-            
-            i = 0
-            j += 1  
+                    timing = {"step": j, "task": steps[i]}
+                    memory.step_timings.append(timing)
 
-            #declaring the new plan
-            plan = parsed_eval
+                    # Shown as soon as its humanization is done, the step does not wait for it
+                    entries[i], numbers[i] = {f"Step {j}": steps[i]}, j
+                    display.show(j, humanize(steps[i]), steps[i], entries[i], timing)
 
-            
-            print("\n\nChanged plans\n\n")
+                    if log:
+                        print(f"\n\n {i}th Context (Summary): ", memory.chat_summary, "\n\n")
 
-            print(f"\n\nNew plan length: {len(plan)}\n\n")
+                    # The latest step summaries within CONTEXT_STEP_SUMMARY_MAX_TOKENS, the oldest are dropped first
+                    step_by_step_context = Section("context", step_summaries, CONTEXT_STEP_SUMMARY_MAX_TOKENS,
+                                                   keep="tail", pinned=1).fit()
+
+                    running[pool.submit(run_step, steps[i], i, steps, step_by_step_context, step_summaries[1:], timing,
+                                        not dependencies[i])] = i
+                    j += 1
+
+                # The next step to start is humanized while the running ones execute
+                upcoming = next((i for i in range(merged, len(steps)) if i not in entries), None)
+                if upcoming is not None:
+                    humanize(steps[upcoming])
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished[running.pop(future)] = future.result()
+
+                # Merged in plan order, the evaluation of each merged step decides how the plan goes on
+                while merged in finished:
+                    i = merged
+                    answer, summ, summary, evaluation, tools = finished.pop(i)
+
+                    entries[i][f"Report {numbers[i]}"] = answer
+                    memory.step_history.append(entries[i])
+
+                    print(f"\n\n {i}th run_summarizer Summary: ", summary, "\n\n")
+                    # print(f"\nFound Resources: {res}\n")
+
+                    # Since agent does not need all the summarized context, we only feed with the summary of the previous steps
+                    step_summaries.append(summary)
+
+                    if log:
+                        print(f"\n\n {i}th Summary: ", summ, "\n\n")
+                        print("\nAnswer: "+answer +"\n\n")
+
+                    memory.chat_history.append({"role":"system","content": answer})
+                    run_messages.append(memory.chat_history[-1])
+
+                    if log:
+                        print(f"\n\n {i}th Evaluation: ", evaluation, "\n\n")
+                    
+                    parsed_eval = parse_eval(evaluation)
+
+                    print(parsed_eval)
+                    print(type(parsed_eval))
 
-            memory.chat_history.append({"role":"system","content":evaluation})
+                    merged += 1
 
-            continue
+                    if parsed_eval == -1:
+                        stop = True
+                        break
+                            
+                    elif isinstance(parsed_eval, list):
+                        #declaring the new plan
+                        new_plan = parsed_eval
 
-        #print("Done. Proceeding...\n\n")
+                        # The evaluation found this step's result lacking, a repeat of it in the new plan runs again
+                        memo.drop_step(steps[i])
 
-        if log:
-            print("-"*130 + "\n\n")
+                        memory.chat_history.append({"role":"system","content":evaluation})
+                        run_messages.append(memory.chat_history[-1])
+                        break
+
+                    #print("Done. Proceeding...\n\n")
+
+                    if log:
+                        print("-"*130 + "\n\n")
+
+                save_checkpoint()
+
+                if on_memo is not None:
+                    on_memo(memo.stats())
+
+                if on_evaluation is not None:
+                    on_evaluation(evaluation_policy.stats())
+
+                if stop or new_plan is not None:
+                    break
+
+            # Steps still running belong to the stopped or replaced plan, they finish before anything else runs
+            # and their results are dropped, but stay in the memo for the new plan
+            if running:
+                wait(running)
+                print(f"Dropped {len(running)} step(s) started before the plan changed")
+
+            if new_plan is None:
+                break
+
+            plan = new_plan
+            merged = 0
+
+            print("\n\nChanged plans\n\n")
+
+            print(f"\n\nNew plan length: {len(plan)}\n\n")
 
-        i += 1
-        j += 1
+    finally:
+        # A failing or cancelled run waits for its running steps, so none of them calls tools or writes
+        # the memo and the checkpoint after the job has ended
+        aborted.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        memory.tool_memo = None
+
+    # Prefetched humanizations of steps that never ran are dropped
+    ran = {timing["task"] for timing in memory.step_timings}
+    for step, future in humanized.items():
+        if step not in ran:
+            future.cancel()
+
+    print(f"Agentic memo: {memo.stats()}")
+    print(f"Agentic evaluations: {evaluation_policy.stats()}")
 
 
     return "Done"
\ No newline at end of file
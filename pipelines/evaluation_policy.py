@@ -0,0 +1,66 @@
+from typing import List, Optional
+import threading
+
+from config import EVALUATION_POLICY, EVALUATION_EVERY_N_STEPS
+
+# Reported as the evaluation of a skipped step, parse_eval reads it as "no change"
+SKIPPED_EVALUATION = "No change (evaluation skipped by the evaluation policy)"
+
+
+class EvaluationPolicy:
+    """
+    Decides which plan steps the evaluator runs on. With the "adaptive" policy a step whose agent answer
+    parsed cleanly (a Summary and Resources) and whose tool calls all succeeded is not evaluated, unless it is
+    every EVALUATION_EVERY_N_STEPS-th step of the plan, where the skipped steps before it are evaluated with it.
+    The "always" policy evaluates every step. The evaluated and skipped steps are counted per reason.
+    """
+
+    def __init__(self, mode: str = EVALUATION_POLICY, every: int = EVALUATION_EVERY_N_STEPS):
+        self.mode = mode
+        self.every = max(1, every)
+        self.counts = {}  # reason -> steps, "skipped" for the steps without evaluation
+        self._lock = threading.Lock()
+
+    def reason(self, position: int, summ: str, resources: List[str], failed_tools: List[str]) -> Optional[str]:
+        """
+        Returns why the step at the plan position is evaluated, None if its evaluation is skipped.
+        Args:
+            position (int): The position of the step in the current plan.
+            summ (str): The Summary section parsed from the agent answer.
+            resources (list): The Resources lines parsed from the agent answer.
+            failed_tools (list): The tools whose calls failed during the step.
+        """
+        if self.mode == "always":
+            reason = "always"
+        elif failed_tools:
+            reason = "tool_failed"
+        elif not summ or not resources:
+            reason = "unparsed"
+        elif (position + 1) % self.every == 0:
+            reason = "every_n"
+        else:
+            reason = None
+
+        with self._lock:
+            key = reason or "skipped"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+        return reason
+
+    def batch(self, position: int, reason: str, summaries: List[str]) -> List[str]:
+        """
+        Returns the summaries of the steps since the last periodic evaluation, judged with an every_n evaluation.
+        Args:
+            position (int): The position of the evaluated step in the current plan.
+            reason (str): Why the step is evaluated.
+            summaries (list): The summaries of the merged steps, oldest first.
+        """
+        if reason != "every_n":
+            return []
+        return summaries[-min(self.every - 1, position):] if position and self.every > 1 else []
+
+    def stats(self) -> dict:
+        with self._lock:
+            evaluated = sum(count for key, count in self.counts.items() if key != "skipped")
+            return {"mode": self.mode, "evaluated": evaluated, "skipped": self.counts.get("skipped", 0),
+                    "reasons": {key: count for key, count in self.counts.items() if key != "skipped"}}
@@ -1,5 +1,6 @@
 from agents import run_finalizer
 from session_manager import session_manager
+from post_turn import get_post_turn
 from memory.memory import AgentMemory
 
 def finalizer_behaviour(llm, memory: AgentMemory, session_id: str, session_path: str):
@@ -26,5 +27,6 @@ def finalizer_behaviour(llm, memory: AgentMemory, session_id: str, session_path:
         print("Session path:", session_path)
         print("Saved Memory:", memory.chat_history_total)
 
-        # Save the session with the finalized memory
-        session_manager.save_session(session_id=session_id, session_path=session_path, memory=memory)
+        # Save the session with the finalized memory, after the stream is closed and the agentic task's own saves
+        get_post_turn().submit(session_id, "save", lambda: session_manager.save_session(
+            session_id=session_id, session_path=session_path, memory=memory))
@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import Optional
+import json
+import os
+import tempfile
+import threading
+import uuid
+
+CHECKPOINT_FILE = "agentic_checkpoint.json"
+
+RESUMABLE = ("running", "failed")  # "planning", "done", "cancelled" and "stale" runs are not resumed
+
+
+class RunCheckpoint:
+    """
+    Checkpoint of the session's agentic run, rewritten after every finished step: the question, the current
+    plan, how many of its steps are merged, the finished but not yet merged steps, the step history,
+    the step summaries and the chat messages the run added. A run interrupted by a restart or a failing tool resumes
+    from its last completed step, without replanning and without running the completed steps' tools again.
+    The tool memo of the run is saved with it whenever a tool call completes, so a step interrupted
+    mid-way reuses the searches and downloads it already made when it runs again.
+    Every run has its own id, a checkpoint object only ever finishes the checkpoint of its own run.
+    """
+
+    def __init__(self, session_path: str):
+        self.path = os.path.join(session_path, "utils", CHECKPOINT_FILE)
+        self.run_id = uuid.uuid4().hex
+        self._lock = threading.RLock()
+        self._data = None  # The last saved checkpoint
+        self._memo = None  # The ToolMemo of the run
+        self._finished = False
+
+    def start(self, question: str, rag: bool) -> None:
+        """
+        Replaces the previous run's checkpoint before planning, so a run failing before its first step
+        is never confused with the previous one. A run still "planning" is not resumable.
+        """
+        with self._lock:
+            self._data = {"run_id": self.run_id, "question": question, "rag": rag, "plan": [], "merged": 0,
+                          "finished": {}, "status": "planning", "updated": datetime.now().isoformat()}
+            self._write(self._data)
+
+    def save(self, data: dict) -> None:
+        """
+        Replaces the checkpoint, the status stays "running" until finish() is called.
+        """
+        with self._lock:
+            if self._finished:
+                return
+
+            # A snapshot, the memo is saved from tool threads while the run goes on changing its state
+            self._data = json.loads(json.dumps(dict(data, run_id=self.run_id, status="running",
+                                                    updated=datetime.now().isoformat()),
+                                               ensure_ascii=False, default=str))
+            self._write(self._with_memo(self._data))
+
+    def save_memo(self, memo) -> None:
+        """
+        Saves the current tool memo (a ToolMemo) of the run into the checkpoint.
+        """
+        with self._lock:
+            # A step still finishing after the run ended must not turn it back to "running"
+            if self._finished:
+                return
+
+            self._memo = memo
+            if self._data is not None and self._data["status"] == "running":
+                self._write(self._with_memo(self._data))
+
+    def _with_memo(self, data: dict) -> dict:
+        # Serialized under the lock, so the last write always holds the latest memo
+        return dict(data, tool_memo=self._memo.to_dict()) if self._memo is not None else data
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading agentic checkpoint {self.path}: {e}")
+            return None
+
+    def resumable(self) -> Optional[dict]:
+        """
+        Returns the checkpoint if its run did not complete: it failed, or it was still running when the process stopped.
+        A run that failed while planning has nothing to resume.
+        """
+        data = self.load()
+        if data is not None and data.get("status") in RESUMABLE and data.get("plan"):
+            return data
+        return None
+
+    def finish(self, status: str, error: str = None) -> None:
+        """
+        Marks the run "done", "failed" (resumable) or "cancelled", later saves of the run are ignored.
+        The checkpoint on disk is left alone if it belongs to another run.
+        """
+        with self._lock:
+            self._finished = True
+
+            data = self.load()
+            if data is None or data.get("run_id") != self.run_id:
+                return
+
+            data.update(status=status, error=error, updated=datetime.now().isoformat())
+            self._write(data)
+
+    def mark_stale(self) -> None:
+        """
+        Marks an interrupted run as no longer resumable, e.g. once a newer turn of the session is recorded,
+        so resuming it never rewinds the chat past that turn.
+        """
+        with self._lock:
+            data = self.load()
+            if data is None or data.get("status") not in RESUMABLE:
+                return
+
+            data.update(status="stale", updated=datetime.now().isoformat())
+            self._write(data)
+
+    def _write(self, data: dict) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            # A temporary file per write, the run and a post-turn task may write the same checkpoint
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=CHECKPOINT_FILE, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from pathlib import Path
+from typing import List, Dict
+import threading
+import time
+
+from agents import generate_title
+from memory.rolling_summary import fold_new_messages
+from session_manager import session_manager
+from SessionRAG import add_to_rag
+from config import POST_TURN_WORKERS
+
+_post_turn = None
+
+
+class PostTurnPipeline:
+    """
+    Runs the work that follows a reply (summarization, persistence, title generation, RAG ingestion)
+    after the response is closed. The tasks of a session run one at a time in submission order,
+    so e.g. a save always sees the summary folded before it, different sessions run in parallel.
+    The queue wait and run time of every task are tracked per task name.
+    """
+
+    def __init__(self, max_workers: int = POST_TURN_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="post-turn")
+        self._queues = {}  # session_id -> deque of (name, fn, future, submitted), present while it is drained
+        self._lock = threading.Lock()
+        self._stats = {}  # name -> latency counters
+        self._stats_lock = threading.Lock()
+
+    def submit(self, session_id: str, name: str, fn) -> Future:
+        """
+        Queues a task after the pending tasks of the session.
+        Args:
+            session_id (str): The session of the task, tasks without a session share the None queue.
+            name (str): The task name the latency is tracked under, e.g. "save".
+            fn: Called without arguments on a pipeline thread.
+        Returns:
+            Future: Resolves to the result of fn.
+        """
+        future = Future()
+
+        with self._lock:
+            queue = self._queues.get(session_id)
+            start = queue is None
+            if start:
+                queue = self._queues[session_id] = deque()
+            queue.append((name, fn, future, time.perf_counter()))
+
+        # A single drain per session keeps its tasks in order
+        if start:
+            self._executor.submit(self._drain, session_id)
+        return future
+
+    def _drain(self, session_id: str) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues[session_id]
+                if not queue:
+                    del self._queues[session_id]
+                    return
+                name, fn, future, submitted = queue.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started = time.perf_counter()
+            try:
+                future.set_result(fn())
+                failed = False
+            except Exception as e:
+                print(f"Post-turn task {name} of session {session_id} failed: {e}")
+                future.set_exception(e)
+                failed = True
+
+            self._record(name, started - submitted, time.perf_counter() - started, failed)
+
+    def _record(self, name: str, wait: float, run: float, failed: bool) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                  "last_ms": 0.0, "wait_total_ms": 0.0})
+            stats["count"] += 1
+            stats["failed"] += failed
+            stats["total_ms"] += run * 1000
+            stats["max_ms"] = max(stats["max_ms"], run * 1000)
+            stats["last_ms"] = run * 1000
+            stats["wait_total_ms"] += wait * 1000
+
+    def latency(self) -> Dict[str, dict]:
+        """
+        Returns the latency of each task name: count, failed, mean_ms, max_ms, last_ms and mean_wait_ms.
+        """
+        with self._stats_lock:
+            return {name: {
+                "count": stats["count"],
+                "failed": stats["failed"],
+                "mean_ms": round(stats["total_ms"] / stats["count"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "last_ms": round(stats["last_ms"], 1),
+                "mean_wait_ms": round(stats["wait_total_ms"] / stats["count"], 1)
+            } for name, stats in self._stats.items()}
+
+    def pending(self, session_id: str) -> int:
+        with self._lock:
+            return len(self._queues.get(session_id, ()))
+
+    def cancel(self, session_id: str) -> int:
+        """
+        Drops the queued tasks of the session, e.g. before it is deleted. A running task finishes.
+        Returns:
+            int: The number of dropped tasks.
+        """
+        with self._lock:
+            queue = self._queues.get(session_id)
+            if not queue:
+                return 0
+            dropped = list(queue)
+            queue.clear()
+
+        for _, _, future, _ in dropped:
+            future.cancel()
+        return len(dropped)
+
+    def flush(self, session_id: str, timeout: float = None) -> bool:
+        """
+        Waits until the tasks queued so far for the session have run.
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        done = threading.Event()
+        self.submit(session_id, "flush", done.set)
+        return done.wait(timeout)
+
+
+def get_post_turn() -> PostTurnPipeline:
+    """
+    Returns the process-wide post-turn pipeline.
+    """
+    global _post_turn
+
+    if _post_turn is None:
+        _post_turn = PostTurnPipeline()
+    return _post_turn
+
+
+def write_title(state: dict) -> str:
+    """
+    Generates and saves the session title, unless it already has one.
+    Returns:
+        str: The title, None if the chat has nothing to name yet.
+    """
+    session_id    = state.get("session_id")
+    session_path  = state["session_path"]
+
+    title_file = Path(session_path) / "utils" / "title.txt"
+    if title_file.exists():
+        return title_file.read_text().strip()
+
+    title = generate_title(state["llm"], state["memory"])
+    if title == "Skip":
+        return None
+
+    print(f"Generated title: {title}")  # Debug log
+    session_manager.save_title(session_path=session_path, session_id=session_id, title=title)
+    return title
+
+
+def after_turn(state: dict, summarize: bool = True, extra: List[Dict] = None, title: bool = True,
+               ingest: bool = False, debug: bool = False) -> None:
+    """
+    Queues the work that follows a reply of the session, the reply is already in its memory.
+    The session is saved first, so the answer is persisted before any LLM call of the pipeline.
+    Args:
+        state (dict): The state of the session.
+        summarize (bool): If True, folds the new messages into the rolling summary and saves again.
+        extra (list): Optional messages outside of the chat history to fold in, e.g. agentic step reports.
+        title (bool): If True, generates the title of a session that has none.
+        ingest (bool): If True, adds the new files of the session folder to the RAG store.
+        debug (bool): If True, enables debug logging.
+    """
+    pipeline      = get_post_turn()
+    memory        = state["memory"]
+    llm           = state["llm"]
+    session_id    = state.get("session_id")
+    session_path  = state["session_path"]
+
+    # pipelines imports this module, the run checkpoint is imported late
+    from pipelines.run_checkpoint import RunCheckpoint
+
+    # An interrupted agentic run must not be resumed over the newer turn, its chat messages would follow it
+    RunCheckpoint(session_path).mark_stale()
+
+    def save():
+        if session_id:
+            session_manager.save_session(session_id=session_id, session_path=session_path, memory=memory)
+            if debug: print(f"Session {session_id} saved")
+
+    def summary():
+        if fold_new_messages(llm, memory, extra=extra):
+            save()
+
+    pipeline.submit(session_id, "save", save)
+
+    if title and session_id:
+        # Kept on the state, so the title endpoint awaits it instead of generating another one
+        state["pending_title"] = pipeline.submit(session_id, "title", lambda: write_title(state))
+
+    if summarize:
+        pipeline.submit(session_id, "summarize", summary)
+
+    if ingest:
+        pipeline.submit(session_id, "ingest",
+                        lambda: add_to_rag(vectorstore=state["vectorstore"], session_path=session_path, debug=debug))
@@ -245,11 +245,16 @@ CRITIC_PROMPT_TEMPLATE = """
     - Example: Change "download selected papers" to "download papers using their original search result indices"
     - This prevents index confusion in the executor agent
 
+    **Step dependencies:**
+    - End every step with the earlier steps whose output it needs, e.g. "[depends on: 1, 2]", or "[depends on: none]" if it needs none.
+    - Steps that do not depend on each other are run in parallel, e.g. a web search and an arXiv search on different topics.
+    - A download_tool step always depends on the arxiv_search step it downloads from. When unsure, add the dependency.
+
     **Response Format:**
 
     Corrected Plan:
-    Step 1. <Step 1>
-    Step 2. <Step 2>
+    Step 1. <Step 1> [depends on: none]
+    Step 2. <Step 2> [depends on: 1]
     ...
 
     Only output the plan and verdict in the format shown above. You have tools that can be used: 
@@ -356,8 +361,10 @@ Decision: <"No change" OR "Changed Steps" OR "BREAK" OR "STOP">
 
 OPTIONAL (only if Decision is "Changed Steps"):
 Corrected NEXT Plan:
-Step x. <...>
-Step y. <...>
+Step x. <...> [depends on: none]
+Step y. <...> [depends on: x]
+
+End every new step with the new steps whose output it needs, "[depends on: none]" if it needs none, independent steps run in parallel.
 
 ---
 
@@ -380,6 +387,25 @@ SUMMARIZER_PROMPT_EXAMPLE = """
     
     """
 
+INCREMENTAL_SUMMARIZER_PROMPT_TEMPLATE = """
+    
+    You are a summarizer agent. You keep a rolling summary of a conversation up to date.
+    You are given the current summary and only the messages that happened after it. Fold the new messages into the summary.
+    Focus on:
+    - The user’s goals and key questions
+    - Critical results from tools (e.g. titles, conclusions)
+    - Decisions made, paths taken
+
+    Keep what is still relevant from the current summary, drop what the new messages made obsolete.
+    Do NOT repeat logs, metadata, or all tool outputs. Abstract what happened. The updated summary must stay within ~{max_tokens} tokens.
+
+    DO NOT include any explanation or additional text. Only the updated summary is needed.
+
+    The current summary is:
+    {summary}
+
+    """
+
 STEP_SUMMARIZER_PROMPT_EXAMPLE = """
   You are a summarizer agent tasked with condensing the outcome of the current reasoning step in a multi-step agentic workflow.
 
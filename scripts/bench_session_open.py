@@ -0,0 +1,64 @@
+"""
+Benchmarks how the session-open path of init_rag scales with the collection size.
+
+The old path materialized the whole collection twice (vectorstore.get() for the documents and again
+for the metadatas), the current path only runs a count query. Synthetic 384-dim chunks
+(the size of all-MiniLM-L6-v2) are used so the benchmark does not need the embedder.
+
+Usage:
+    python scripts/bench_session_open.py --sizes 100 1000 5000 20000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import chromadb
+
+DIM = 384
+CHUNK_TEXT = "lorem ipsum dolor sit amet " * 37  # ~1000 characters, the configured chunk size
+
+
+def fill_collection(collection, size: int, batch_size: int = 2048) -> None:
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        collection.add(
+            ids=[str(start + i) for i in range(count)],
+            embeddings=[[random.random() for _ in range(DIM)] for _ in range(count)],
+            metadatas=[{"source": f"paper_{(start + i) % 50}.pdf"} for i in range(count)],
+            documents=[CHUNK_TEXT] * count
+        )
+
+
+def time_it(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} | {'full get() x2 (s)':>18} | {'count() (s)':>12} | {'speedup':>8}")
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as persist_directory:
+            client = chromadb.PersistentClient(path=persist_directory)
+            collection = client.create_collection(name="bench")
+            fill_collection(collection, size)
+
+            old = time_it(lambda: (collection.get(include=["documents", "metadatas"]),
+                                   collection.get(include=["documents", "metadatas"])), args.repeats)
+            new = time_it(collection.count, args.repeats)
+
+            print(f"{size:>8} | {old:>18.4f} | {new:>12.5f} | {old / new if new else float('inf'):>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,64 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request
 from pydantic import BaseModel
-from main import init_agent, route_query, save_current_session, load_session_by_id, list_available_sessions, delete_session_by_id, rag_decide, qr_get_reply, rag_get_reply
-from fastapi import BackgroundTasks
-from session_manager import session_manager
+from typing import Optional
+from main import aroute_query, save_current_session, list_available_sessions, delete_session_by_id, rag_decide, qr_get_reply, rag_get_reply, rag_draft_and_judge
+from session_registry import SessionRegistry
 from fastapi.responses import StreamingResponse
 from pipelines import planner_behaviour, agentic_behaviour, finalizer_behaviour
+from pipelines.run_checkpoint import RunCheckpoint, RESUMABLE
 from SessionRAG import add_to_rag
 from utils import create_session_directory
-from agents import generate_title
+from config import RAG_REPLY_MODE
+from jobs import get_job_manager, JobCancelled
+from events import get_event_bus, format_sse
+from post_turn import after_turn, get_post_turn, write_title
+import asyncio
 
 app = FastAPI()
-state = init_agent(debug=True)
 
-# Add state management for async processing
-processing_state = {
-    "is_processing": False,
-    "result": None,
-    "current_question": None
-}
+# Agentic tasks run as jobs on a bounded worker pool, interactive replies get admission priority
+job_manager = get_job_manager()
 
-def run_agentic_task(state, question, rag = False, debug=False):
+# Thinking steps, job state changes and finalizer tokens are pushed to the clients over SSE
+event_bus = get_event_bus()
+job_manager.add_listener(lambda job: event_bus.publish(job.session_id, "job", job.to_dict()))
+
+# Saving, summarizing, titles and RAG ingestion run in order per session after the replies are closed
+post_turn = get_post_turn()
+
+# Resident sessions, requests without a session_id use the current (last loaded or created) session
+registry = SessionRegistry(debug=True)
+registry.new()
+
+async def get_state(session_id: str = None) -> dict:
+    """
+    Returns the state of the session, a resident session is returned immediately,
+    a cold one is loaded off the event loop.
     """
-    Runs the agentic task in a separate thread to avoid blocking the main thread.
+    state = registry.resident(session_id)
+    if state is None:
+        state = await asyncio.to_thread(registry.get, session_id)
+    return state
+
+def run_agentic_task(state, question, rag = False, debug=False, job=None, resume=None):
+    """
+    Runs the agentic task on a job worker to avoid blocking the main thread.
     Args:
         state: The current state of the application.
         question (str): The question to process.
         rag (bool): If True, enables RAG mode.
         debug (bool): If True, enables debug logging.
+        job: Optional, the job running the task, checked between the steps for cancellation.
+        resume (dict): Optional, the checkpoint of an interrupted run to continue instead of planning again.
+    Returns:
+        str: The result of the agentic task.
     """
-    global processing_state
+    if resume is not None:
+        question, rag = resume["question"], resume["rag"]
+
+    run_checkpoint = RunCheckpoint(state["session_path"])
+
+    processing_state = state["processing"]
     processing_state["is_processing"] = True
     processing_state["current_question"] = question
     
@@ -37,12 +67,25 @@ def run_agentic_task(state, question, rag = False, debug=False):
         memory = state["memory"]
         llm = state["llm"]
         agent = state["agent"]
-        vectorstore = state["vectorstore"]
-        session_path = state["session_path"]
         session_id = state.get("session_id")
         
-        plan = planner_behaviour(llm=llm, question=question, memory=memory, rag=rag, debug=debug)
-        result = agentic_behaviour(llm=llm, agent=agent, plan=plan, question=question, memory=memory, rag=rag, log=debug)
+        checkpoint = (lambda: job_manager.checkpoint(job)) if job is not None else None
+
+        # A resumed run continues its checkpointed plan, finished steps are not run again
+        if resume is not None:
+            plan = resume["plan"]
+        else:
+            # The new run owns the checkpoint from here on, before the planner can fail
+            run_checkpoint.start(question, rag)
+            plan = planner_behaviour(llm=llm, question=question, memory=memory, rag=rag, debug=debug)
+
+        result = agentic_behaviour(llm=llm, agent=agent, plan=plan, question=question, memory=memory, rag=rag, log=debug,
+                                   checkpoint=checkpoint,
+                                   on_step=lambda step: event_bus.publish(session_id, "thinking_step", step),
+                                   on_memo=lambda stats: event_bus.publish(session_id, "memo", stats),
+                                   on_evaluation=lambda stats: event_bus.publish(session_id, "evaluation", stats),
+                                   run_checkpoint=run_checkpoint, resume=resume)
+        run_checkpoint.finish("done")
         
         print(f"Agentic task completed. Result: {result[:100]}...")  # Debug log
         
@@ -50,32 +93,40 @@ def run_agentic_task(state, question, rag = False, debug=False):
         processing_state["result"] = result
         processing_state["is_processing"] = False
         
-        # Update chat summary (like in main.py)
-        from agents import run_summarizer
-        memory.chat_summary = run_summarizer(reasoning_llm=llm, memory=memory)
-
-        # adding if any files were downloaded
-        add_to_rag(vectorstore=vectorstore, session_path=session_path, debug=debug)
-        
-        # Save session after agentic task completion
-        if session_id:
-            session_manager.save_session(session_id=session_id, session_path=session_path, memory=memory)
-            if debug: print(f"Session {session_id} saved after agentic task")
+        # The session is saved first, then the question and the step reports are folded into the chat summary
+        # and any downloaded files are added to RAG, after the job has released its worker
+        step_reports = [{"role": "system", "content": str(step)} for step in memory.step_history]
+        after_turn(state, extra=step_reports, ingest=True, debug=debug)
 
         print(f"Task fully completed. Processing state: {processing_state}")  # Debug log
-        
+
+        return result
+
+    except JobCancelled:
+        print(f"Agentic task cancelled: {question}")  # Debug log
+        run_checkpoint.finish("cancelled")
+        # The finalizer still answers from the steps done so far
+        processing_state["result"] = "Cancelled"
+        processing_state["is_processing"] = False
+        raise
+
     except Exception as e:
         print(f"Error in agentic task: {str(e)}")  # Debug log
+        # Resumable from the last completed step with POST /agentic/resume
+        run_checkpoint.finish("failed", error=str(e))
         processing_state["result"] = f"Error: {str(e)}"
         processing_state["is_processing"] = False
+        raise
 
 
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     reply: str
+    job_id: Optional[str] = None
 
 class SessionInfo(BaseModel):
     session_id: str
@@ -84,14 +135,15 @@ class SessionInfo(BaseModel):
     title: str
 
 @app.get("/sessions")
-async def get_sessions():
-    """Get list of all saved sessions"""
-    sessions = list_available_sessions()
+async def get_sessions(limit: Optional[int] = None, offset: int = 0, sort: str = "timestamp", descending: bool = True):
+    """Get a page of the saved sessions, most recent first by default"""
+    sessions = list_available_sessions(limit=limit, offset=offset, sort=sort, descending=descending)
     return {"sessions": sessions}
 
 @app.post("/save-session")
-async def save_session():
+async def save_session(session_id: str = None):
     """Save current session"""
+    state = await get_state(session_id)
     session_id = save_current_session(state)
     if session_id:
         return {"status": "success", "session_id": session_id}
@@ -100,21 +152,17 @@ async def save_session():
 @app.post("/load-session/{session_id}")
 async def load_session(session_id: str):
     """Load a session by ID"""
-    global state, processing_state
-    
     try:
         print("Loading session:", session_id)  # Debug log
 
-        session_path = create_session_directory(session_id=session_id)
-
-        state = load_session_by_id(session_id=session_id, session_path=session_path, debug=True)
+        # Resident sessions are switched to without reinitializing anything
+        state = registry.resident(session_id)
+        if state is not None:
+            registry.current_id = session_id
+        else:
+            state = await asyncio.to_thread(registry.activate, session_id)
 
         print("Session state after loading:", state)  # Debug log
-
-        # Reset processing state
-        processing_state["is_processing"] = False
-        processing_state["result"] = None
-        processing_state["current_question"] = None
         
         return {"status": "success", "message": f"Session {session_id} loaded successfully"}
     except Exception as e:
@@ -126,18 +174,43 @@ async def delete_session(session_id: str):
     """Delete a session by ID"""
     session_path = create_session_directory(session_id=session_id)
 
+    registry.remove(session_id)
+    event_bus.drop(session_id)
+    post_turn.cancel(session_id)
     success = delete_session_by_id(session_id=session_id, session_path=session_path)
     if success:
         return {"status": "success", "message": f"Session {session_id} deleted"}
     return {"status": "error", "message": "Failed to delete session"}
 
+@app.get("/events")
+async def events(request: Request, session_id: str = None, last_event_id: int = None):
+    """
+    Server-Sent Events stream of the session: "thinking_step", "job" and "final_token" events.
+    Reconnecting clients send Last-Event-ID (or last_event_id) and receive the events they missed.
+    """
+    state = await get_state(session_id)
+    session_id = state["session_id"]
+
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
+
+    async def stream():
+        async for event in event_bus.subscribe(session_id, last_event_id):
+            yield ": keepalive\n\n" if event is None else format_sse(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/get-chat-history")
-async def get_chat_history():
+async def get_chat_history(session_id: str = None):
+    state = await get_state(session_id)
     memory = state["memory"]
     return memory.thinkingsteps
 
 @app.get("/get-processing-status")
-async def get_processing_status():
+async def get_processing_status(session_id: str = None):
+    processing_state = (await get_state(session_id))["processing"]
     status = {
         "is_processing": processing_state["is_processing"],
         "has_result": processing_state["result"] is not None,
@@ -147,7 +220,10 @@ async def get_processing_status():
     return status
 
 @app.get("/get-final-result")
-async def get_final_result():
+async def get_final_result(session_id: str = None):
+    state = await get_state(session_id)
+    processing_state = state["processing"]
+
     if processing_state["result"] is not None:
 
         memory = state["memory"]
@@ -155,13 +231,15 @@ async def get_final_result():
         session_id = state["session_id"]
         session_path = state["session_path"]
         
-        return StreamingResponse(finalizer_behaviour(llm, memory, session_id, session_path), media_type="text/plain")
+        tokens = finalizer_behaviour(llm, memory, session_id, session_path)
+        return StreamingResponse(event_bus.stream(session_id, "final_token", tokens), media_type="text/plain")
 
     print("No result available yet")  # Debug log
     return {"result": None}
 
 @app.get("/get-chat")
-async def get_chat():
+async def get_chat(session_id: str = None):
+    state = await get_state(session_id)
     memory = state["memory"]
     chat_history = memory.chat_history_total
     return {"chat": chat_history}
@@ -169,6 +247,7 @@ async def get_chat():
 @app.get("/current-session")
 async def get_current_session():
     """Get current session information"""
+    state = await get_state()
     session_id = state.get("session_id")
     session_path = state.get("session_path")
     return {
@@ -178,7 +257,9 @@ async def get_current_session():
     }
 
 @app.post("/reset-chat-history")
-async def reset_chat_history():
+async def reset_chat_history(session_id: str = None):
+    state = await get_state(session_id)
+    processing_state = state["processing"]
     memory = state["memory"]
     memory.thinkingsteps.clear()
     # Also reset processing state
@@ -195,16 +276,18 @@ async def get_model_files(session_id: str):
     import os
     from config import MAIN_PATH
     session_path = create_session_directory(session_id=session_id)
-    model_files = [f for f in os.listdir(session_path) if not f.endswith('.json') and not f.endswith('.txt') and not os.path.isdir(os.path.join(session_path, f))]
+    model_files = [f for f in os.listdir(session_path) if not f.endswith('.json') and not f.endswith('.jsonl') and not f.endswith('.txt') and not os.path.isdir(os.path.join(session_path, f))]
     return model_files
 
 @app.post("/upload-file")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), session_id: str = None):
     """
     Endpoint to upload a file to the server.
     """
     from pathlib import Path
 
+    state = await get_state(session_id)
+
     vectorstore = state["vectorstore"]
     session_path = state["session_path"]
 
@@ -230,7 +313,7 @@ async def upload_file(file: UploadFile = File(...)):
         print(f"File uploaded successfully: {save_path}")
 
         # Add to RAG system
-        add_to_rag(vectorstore=vectorstore, session_path=session_path, debug=False)
+        await asyncio.to_thread(add_to_rag, vectorstore=vectorstore, session_path=session_path, debug=False)
 
         print("File added to RAG system")
         
@@ -259,19 +342,17 @@ async def get_chat_title(session_id: str):
         return {"status": "success", "title": title}
     
     else:
-        generated_title = generate_title(state["llm"], state["memory"])
+        state = await get_state(session_id)
+
+        # The first reply queued the title generation, it is awaited instead of generating a second one
+        pending = state.get("pending_title")
+        if pending is not None and not pending.done():
+            generated_title = await asyncio.wrap_future(pending)
+        else:
+            generated_title = await asyncio.to_thread(write_title, state)
 
-        if generated_title == "Skip":
+        if generated_title is None:
             return {"status": "success", "title": "New Chat"}
-        
-        print(f"Generated title: {generated_title}")  # Debug log
-        
-        # Ensure the utils directory exists
-        title_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(title_file, "w") as f:
-            f.write(generated_title)
-        print(f"Title saved to {title_file}")
 
         return {"status": "success", "title": generated_title}
     
@@ -280,35 +361,18 @@ async def new_chat():
     """
     Endpoint to start a new chat session.
     """
-    global state, processing_state
-
     try:
-        # Save current session before starting new one
-        current_session_id = save_current_session(state)
-        if current_session_id:
-            print(f"Saved current session: {current_session_id}")
-        
-        passed_state = {
-            "llm": state["llm"],
-            "agent": state["agent"],
-            "vectorstore": state["vectorstore"],
-            "deterministic": state["deterministic"],
-            "embeddings": state["embeddings"],
-        }
-
-        if not passed_state:
-            raise ValueError("Passed state is empty or invalid.")
-
-        # Reinitialize state with new session
-        state = init_agent(passed_state, debug=True)
+        # Save current session before starting new one, it stays resident in the registry
+        current = registry.resident()
+        if current is not None:
+            current_session_id = save_current_session(current)
+            if current_session_id:
+                print(f"Saved current session: {current_session_id}")
+
+        # The new session shares the models of the resident ones
+        state = await asyncio.to_thread(registry.new)
         print(f"New session initialized: {state.get('session_id')}")
 
-        # Reset processing state
-        processing_state["is_processing"] = False
-        processing_state["result"] = None
-        processing_state["current_question"] = None
-        print("Processing state reset successfully.")
-
         return ChatResponse(reply="New chat session started successfully.")
     
     except Exception as e:
@@ -317,38 +381,133 @@ async def new_chat():
 
 
 
+def submit_agentic_task(state: dict, question: str, rag: bool = False, resume: dict = None):
+    """
+    Queues the agentic task of the question as a job of its session, or the continuation of an interrupted one.
+    """
+    state["processing"]["is_processing"] = True
+
+    def release(job):
+        # Cancelled before run_agentic_task started, so nothing else resets the session
+        state["processing"]["result"] = "Cancelled"
+        state["processing"]["is_processing"] = False
+
+    return job_manager.submit(lambda job: run_agentic_task(state, question, rag, True, job=job, resume=resume),  # Enable debug
+                              kind="agentic", session_id=state["session_id"], description=question,
+                              on_cancel=release)
+
+@app.get("/agentic/checkpoint")
+async def get_agentic_checkpoint(session_id: str = None):
+    """Get the checkpoint of the session's last agentic run and if it can be resumed"""
+    state = await get_state(session_id)
+    data = RunCheckpoint(state["session_path"]).load()
+
+    if data is None:
+        return {"status": "none", "resumable": False}
+
+    return {
+        "status": data["status"],
+        "resumable": data["status"] in RESUMABLE and bool(data["plan"]) and not state["processing"]["is_processing"],
+        "question": data["question"],
+        "completed_steps": data["merged"] + len(data["finished"]),
+        "total_steps": len(data["plan"]),
+        "error": data.get("error"),
+        "updated": data["updated"]
+    }
+
+@app.post("/agentic/resume", response_model=ChatResponse)
+async def resume_agentic_task(session_id: str = None):
+    """Continue the session's interrupted agentic run from its last completed step"""
+    state = await get_state(session_id)
+
+    if state["processing"]["is_processing"]:
+        return ChatResponse(reply="An agentic task is already running for this session.")
+
+    resume = RunCheckpoint(state["session_path"]).resumable()
+    if resume is None:
+        return ChatResponse(reply="There is no interrupted agentic task to resume.")
+
+    state["processing"]["result"] = None
+    job = submit_agentic_task(state, resume["question"], resume["rag"], resume=resume)
+
+    return ChatResponse(reply="🔄 Resuming your request... This may take a moment.", job_id=job.id)
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest, background_tasks: BackgroundTasks):
+async def chat(req: ChatRequest):
+    state = await get_state(req.session_id)
+    processing_state = state["processing"]
+
     # Clear previous result
     processing_state["result"] = None
     
-    route, ctx = route_query(state, req.message, debug=False)
+    # Routing awaits the LLM calls, other endpoints stay responsive meanwhile
+    with job_manager.interactive():
+        route, ctx = await aroute_query(state, req.message, debug=False)
     print(f"Route determined: {route}")
 
     if route == "Agentic":
-        processing_state["is_processing"] = True
-        background_tasks.add_task(run_agentic_task, state, req.message, False, True)  # Enable debug
+        job = submit_agentic_task(state, req.message)
 
         print(state["memory"].chat_history)
         
-        return ChatResponse(reply="🔄 Processing your request... This may take a moment.")
+        return ChatResponse(reply="🔄 Processing your request... This may take a moment.", job_id=job.id)
     
     if route == "QuickResponse":
 
-        return StreamingResponse(qr_get_reply(state, req.message, route, ctx, debug=False), media_type="text/plain")
+        return StreamingResponse(job_manager.interactive_stream(qr_get_reply(state, req.message, route, ctx, debug=False)), media_type="text/plain")
     
+    if route == "RAG" and RAG_REPLY_MODE == "draft_and_judge":
+        def escalate():
+            submit_agentic_task(state, req.message, rag=True)
+
+        return StreamingResponse(job_manager.interactive_stream(rag_draft_and_judge(state, req.message, ctx, on_escalate=escalate, debug=False)), media_type="text/plain")
+
     if route == "RAG":
-        decision = rag_decide(state, req.message, ctx, debug=False)
+        with job_manager.interactive():
+            decision = await asyncio.to_thread(rag_decide, state, req.message, ctx, debug=False)
 
         # Answer returns True if it indicates an agentic task should be run after RAG routing. This is handled in the main.py logic.
         if decision == True:
             print("RAG Agentic task triggered")
-            background_tasks.add_task(run_agentic_task, state, req.message, True, True)  # Enable debug, RAG
+            job = submit_agentic_task(state, req.message, rag=True)
             
             print(state["memory"].chat_history)
 
-            return ChatResponse(reply="🔄 Processing your request... This may take a moment.")
+            return ChatResponse(reply="🔄 Processing your request... This may take a moment.", job_id=job.id)
         
         else:
-            return StreamingResponse(rag_get_reply(state, req.message, route, ctx, debug=False), media_type="text/plain")
-        
+            return StreamingResponse(job_manager.interactive_stream(rag_get_reply(state, req.message, route, ctx, debug=False)), media_type="text/plain")
+
+@app.get("/post-turn/latency")
+async def post_turn_latency():
+    """Latency of the post-turn tasks (save, title, summarize, ingest) since the server started"""
+    return {"tasks": post_turn.latency()}
+
+@app.get("/jobs")
+async def list_jobs(session_id: str = None):
+    """List the jobs, optionally of a single session"""
+    return {"jobs": [job.to_dict() for job in job_manager.list(session_id)]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Job {job_id} not found"}
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Get the result of a finished job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Job {job_id} not found"}
+    return {"job_id": job.id, "status": job.status, "result": job.result, "error": job.error}
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, a running job stops before its next step"""
+    # A job cancelled before it ran releases its session through its on_cancel hook
+    if job_manager.cancel(job_id):
+        return {"status": "success", "message": f"Job {job_id} cancelled"}
+    return {"status": "error", "message": f"Job {job_id} not found or already finished"}
@@ -0,0 +1,208 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+from config import MAIN_PATH, SESSION_INDEX_PATH
+from session_journal import SessionJournal
+
+SORT_COLUMNS = {"timestamp", "title", "message_count", "size_bytes"}
+
+_session_index = None
+
+
+def session_title(title: Optional[str], first_message: Optional[str]) -> str:
+    """
+    The sidebar title: the generated title, else the start of the first user message, else "New Chat".
+    """
+    if title:
+        return title
+    if first_message:
+        return first_message[:50] + "..." if len(first_message) > 50 else first_message
+    return "New Chat"
+
+
+def session_size(session_path: str, session_id: str) -> int:
+    """
+    Returns the bytes of the session's snapshot and journal.
+    """
+    size = 0
+    for suffix in (".json", ".jsonl"):
+        path = Path(session_path) / f"{session_id}{suffix}"
+        if path.exists():
+            size += path.stat().st_size
+    return size
+
+
+class SessionIndex:
+    """
+    SQLite index of the saved sessions, so the sidebar is a single query instead of parsing every session file.
+    It is updated on every save, title change and delete, and can be rebuilt from the session files on disk.
+    """
+
+    def __init__(self, db_path: str = SESSION_INDEX_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id    TEXT PRIMARY KEY,
+                    session_path  TEXT NOT NULL,
+                    timestamp     TEXT NOT NULL,
+                    title         TEXT,
+                    first_message TEXT,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    size_bytes    INTEGER NOT NULL DEFAULT 0
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions (timestamp)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @property
+    def is_built(self) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+    def record_save(self, session_id: str, session_path: str, chat_history_total: list,
+                    timestamp: str = None) -> None:
+        """
+        Updates the entry of a saved session, the title is kept.
+        """
+        first_message = next((message.get("content", "") for message in chat_history_total
+                              if message.get("role") == "user"), None)
+
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO sessions (session_id, session_path, timestamp, first_message, message_count, size_bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    session_path = excluded.session_path,
+                    timestamp = excluded.timestamp,
+                    first_message = excluded.first_message,
+                    message_count = excluded.message_count,
+                    size_bytes = excluded.size_bytes""",
+                (session_id, str(session_path), timestamp or datetime.now().isoformat(), first_message,
+                 len(chat_history_total), session_size(session_path, session_id)))
+
+    def set_title(self, session_id: str, title: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE sessions SET title = ? WHERE session_id = ?", (title, session_id))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def list(self, limit: int = None, offset: int = 0, sort: str = "timestamp",
+             descending: bool = True) -> List[Dict]:
+        """
+        Returns a page of sessions.
+        Args:
+            limit (int): Optional, the page size, every session if None.
+            offset (int): The number of sessions to skip.
+            sort (str): One of SORT_COLUMNS.
+            descending (bool): The sort direction, most recent first by default.
+        Returns:
+            list: Session metadata (session_id, timestamp, title, message_count, size_bytes).
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort sessions by {sort}, use one of {sorted(SORT_COLUMNS)}")
+
+        order = f"{sort} {'DESC' if descending else 'ASC'}, session_id"
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT session_id, timestamp, title, first_message, message_count, size_bytes
+                    FROM sessions ORDER BY {order} LIMIT ? OFFSET ?""",
+                (-1 if limit is None else limit, offset)).fetchall()
+
+        return [{
+            "session_id": session_id,
+            "timestamp": timestamp,
+            "title": session_title(title, first_message),
+            "message_count": message_count,
+            "size_bytes": size_bytes
+        } for session_id, timestamp, title, first_message, message_count, size_bytes in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def rebuild(self, main_path: str = MAIN_PATH) -> int:
+        """
+        Rebuilds the index from the session files on disk, replacing it in one transaction.
+        Returns:
+            int: The number of indexed sessions.
+        """
+        rows = []
+        for folders in Path(main_path).iterdir():
+            if not folders.is_dir():
+                continue
+            for file in folders.iterdir():
+                if not file.is_dir():
+                    continue
+                for session_file in file.glob("*.json"):
+                    try:
+                        session_id = session_file.stem
+                        session_path = str(file)
+                        # The snapshot and its journal tail, read only, a live session's journal is left to its writer
+                        session_data = SessionJournal(session_path=session_path, session_id=session_id).read()
+                        if session_data is None:
+                            continue
+
+                        chat_history_total = session_data["memory"].get("chat_history_total", [])
+                        first_message = next((message.get("content", "") for message in chat_history_total
+                                              if message.get("role") == "user"), None)
+
+                        title = None
+                        title_file = file / "utils" / "title.txt"
+                        if title_file.exists():
+                            title = title_file.read_text(encoding="utf-8").strip() or None
+
+                        rows.append((session_id, session_path, session_data["timestamp"] or "", title, first_message,
+                                     len(chat_history_total), session_size(session_path, session_id)))
+                    except Exception as e:
+                        print(f"Error reading session file {session_file}: {e}")
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sessions")
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO sessions
+                    (session_id, session_path, timestamp, title, first_message, message_count, size_bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)",
+                              (datetime.now().isoformat(),))
+
+        print(f"Session index rebuilt with {len(rows)} sessions")
+        return len(rows)
+
+
+def get_session_index() -> SessionIndex:
+    """
+    Returns the process-wide session index.
+    """
+    global _session_index
+
+    if _session_index is None:
+        _session_index = SessionIndex()
+    return _session_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Session index maintenance")
+    parser.add_argument("command", choices=["rebuild", "list"])
+    args = parser.parse_args()
+
+    index = get_session_index()
+
+    if args.command == "rebuild":
+        index.rebuild()
+    else:
+        print(json.dumps(index.list(), indent=2, ensure_ascii=False))
@@ -0,0 +1,269 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Any, Dict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import JOURNAL_COMPACT_RECORDS, JOURNAL_FSYNC_INTERVAL
+
+# Journals with written but not yet fsynced records
+_dirty = set()
+_dirty_lock = threading.Lock()
+_sync_thread = None
+
+
+def _sync_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+
+        with _dirty_lock:
+            journals = list(_dirty)
+            _dirty.clear()
+
+        for journal in journals:
+            journal.sync()
+
+
+def _mark_dirty(journal: "SessionJournal") -> None:
+    global _sync_thread
+
+    with _dirty_lock:
+        _dirty.add(journal)
+
+        if _sync_thread is None:
+            _sync_thread = threading.Thread(target=_sync_loop, args=(JOURNAL_FSYNC_INTERVAL,),
+                                            name="journal-fsync", daemon=True)
+            _sync_thread.start()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _items_hash(items: list) -> str:
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(_dumps(item).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+class SessionJournal:
+    """
+    Append-only persistence of a session. The snapshot is the regular {session_id}.json file,
+    every save after it appends a single JSONL record to {session_id}.jsonl with only what changed:
+    the new tail of lists that grew in place, the full value of anything else that changed.
+    Records are fsynced in batches every JOURNAL_FSYNC_INTERVAL seconds, and the journal is compacted
+    into a new snapshot every JOURNAL_COMPACT_RECORDS records, so loading reads a snapshot and a short tail.
+    """
+
+    def __init__(self, session_path: str, session_id: str, compact_records: int = JOURNAL_COMPACT_RECORDS):
+        self.session_path = session_path
+        self.session_id = session_id
+        self.snapshot_path = Path(session_path) / f"{session_id}.json"
+        self.journal_path = Path(session_path) / f"{session_id}.jsonl"
+        self.compact_records = compact_records
+
+        self.seq = 0      # Sequence number of the last written record
+        self.records = 0  # Records in the journal since the last snapshot
+        self.persisted = {}  # field -> (length, hash of the items) for lists, the dumped value otherwise
+        self.additional_data = {}
+
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the snapshot and replays the journal records written after it, priming the journal for appends.
+        Returns:
+            dict: The session data in the snapshot format, None if the session has never been saved.
+        """
+        with self._lock:
+            replayed = self._replay()
+            if replayed is None:
+                return None
+
+            data, self.seq, self.records, torn = replayed
+
+            self._remember(data["memory"], data.get("additional_data", {}))
+
+            # New records must not be appended to the torn line
+            if torn:
+                self._compact(data["memory"], data.get("additional_data", {}))
+
+            return data
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the session like load(), without priming or compacting the journal, so it is safe on the
+        journal of a live session whose writer is another SessionJournal, e.g. for the session index.
+        """
+        replayed = self._replay()
+        return replayed[0] if replayed is not None else None
+
+    def _replay(self) -> Optional[tuple]:
+        """
+        Returns the session data, the seq of its last record, the records replayed after the snapshot
+        and if the journal ends with a torn record, None if the session has never been saved.
+        """
+        data = None
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+        records, torn = self._read_records()
+        if data is None and not records:
+            return None
+
+        data = data or {"session_id": self.session_id, "session_path": self.session_path,
+                        "timestamp": None, "memory": {}, "additional_data": {}}
+        seq = data.get("journal_seq", 0)
+        replayed = 0
+
+        for record in records:
+            # Records up to the snapshot's seq are already in it, e.g. after a crash during compaction
+            if record["seq"] <= seq:
+                continue
+
+            for field, items in record.get("extend", {}).items():
+                data["memory"].setdefault(field, []).extend(items)
+            for field, value in record.get("set", {}).items():
+                if field == "additional_data":
+                    data["additional_data"] = value
+                else:
+                    data["memory"][field] = value
+
+            data["timestamp"] = record["timestamp"]
+            seq = record["seq"]
+            replayed += 1
+
+        return data, seq, replayed, torn
+
+    def _read_records(self) -> tuple[list, bool]:
+        if not self.journal_path.exists():
+            return [], False
+
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last record of a crash, everything before it is intact
+                    print(f"Ignoring a torn record at the end of {self.journal_path}")
+                    return records, True
+        return records, False
+
+    def _remember(self, memory: dict, additional_data: dict) -> None:
+        self.persisted = {}
+        for field, value in memory.items():
+            if isinstance(value, list):
+                self.persisted[field] = (len(value), _items_hash(value))
+            else:
+                self.persisted[field] = _dumps(value)
+
+        self.additional_data = additional_data
+        self.persisted["additional_data"] = _dumps(additional_data)
+
+    def _delta(self, memory: dict, additional_data: dict) -> tuple[dict, dict]:
+        extend, changed = {}, {}
+
+        for field, value in memory.items():
+            known = self.persisted.get(field)
+
+            if isinstance(value, list):
+                if isinstance(known, tuple):
+                    length, persisted_hash = known
+                    # Grown in place: the persisted items are all still where they were, a trimmed window
+                    # that happens to end with an identical item is a change
+                    if len(value) >= length and _items_hash(value[:length]) == persisted_hash:
+                        if len(value) > length:
+                            extend[field] = value[length:]
+                        continue
+                changed[field] = value
+
+            elif known != _dumps(value):
+                changed[field] = value
+
+        if additional_data is not None and _dumps(additional_data) != self.persisted.get("additional_data"):
+            changed["additional_data"] = additional_data
+
+        return extend, changed
+
+    def append(self, memory: dict, additional_data: Optional[dict] = None) -> None:
+        """
+        Journals the changes of the memory since the last save, compacting when the journal is long.
+        Args:
+            memory (dict): AgentMemory.to_dict() of the session.
+            additional_data (dict): Optional, replaces the additional data of the session.
+        """
+        with self._lock:
+            # A session without a snapshot is not listed, so its first save writes one
+            if not self.snapshot_path.exists():
+                self._compact(memory, additional_data or {})
+                return
+
+            extend, changed = self._delta(memory, additional_data)
+            if not extend and not changed:
+                return
+
+            self.seq += 1
+            record = {"seq": self.seq, "timestamp": datetime.now().isoformat()}
+            if extend:
+                record["extend"] = extend
+            if changed:
+                record["set"] = changed
+
+            if self._file is None:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+
+            self._file.write(_dumps(record) + "\n")
+            self._file.flush()
+            _mark_dirty(self)
+
+            self.records += 1
+            self._remember(memory, changed.get("additional_data", self.additional_data))
+
+            if self.records >= self.compact_records:
+                self._compact(memory, self.additional_data)
+
+    def _compact(self, memory: dict, additional_data: dict) -> None:
+        session_data = {
+            "session_id": self.session_id,
+            "session_path": self.session_path,
+            "timestamp": datetime.now().isoformat(),
+            "memory": memory,
+            "additional_data": additional_data,
+            "journal_seq": self.seq
+        }
+
+        tmp_path = self.snapshot_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session_data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # The snapshot holds every record now, a crash before the truncation only leaves skipped records
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        open(self.journal_path, "w").close()
+
+        self.records = 0
+        self._remember(memory, additional_data)
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
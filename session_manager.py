@@ -1,19 +1,33 @@
-import json
-from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
 from memory.memory import AgentMemory
 
-from config import MAIN_PATH
 from utils import create_session_id
+from SessionRAG.manifest import drop_manifest
+from session_journal import SessionJournal
+from session_index import get_session_index
 
 import shutil
+import threading
 
 class SessionManager:
     def __init__(self, sessions_dir: str = "model_files/sessions"):
         self.sessions_dir = Path(sessions_dir)
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self.journals = {}  # session_id -> SessionJournal
+        self._journals_lock = threading.Lock()
+
+    def _journal(self, session_path: str, session_id: str, prime: bool = True) -> SessionJournal:
+        with self._journals_lock:
+            journal = self.journals.get(session_id)
+            if journal is None or journal.session_path != session_path:
+                journal = SessionJournal(session_path=session_path, session_id=session_id)
+                # Primes the journal with what is on disk, so the first save only appends the changes
+                if prime:
+                    journal.load()
+                self.journals[session_id] = journal
+            return journal
 
     def save_session(self, session_path: str, session_id: str, memory: AgentMemory,
                     additional_data: Optional[Dict[str, Any]] = None) -> bool:
@@ -29,21 +43,9 @@ class SessionManager:
             bool: True if saved successfully, False otherwise
         """
         try:
-            session_data = {
-                "session_id": session_id,
-                "session_path": session_path,
-                "timestamp": datetime.now().isoformat(),
-                "memory": memory.to_dict(),
-                "additional_data": additional_data or {}
-            }
-
-            session_file = Path(session_path) / f"{session_id}.json"
-
-            print("Saving session to:", session_file)  # Debug log
-
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2, ensure_ascii=False)
-                print("Session saved successfully.")
+            # Only the changes since the last save are appended, see SessionJournal
+            self._journal(session_path, session_id).append(memory.to_dict(), additional_data)
+            get_session_index().record_save(session_id, session_path, memory.chat_history_total)
             return True
         except Exception as e:
             print(f"Error saving session {session_id}: {e}")
@@ -60,13 +62,11 @@ class SessionManager:
             Dict containing session data or None if not found
         """
         try:
-            session_file = Path(session_path) / f"{session_id}.json"
-            if not session_file.exists():
+            # The snapshot and the journal tail written after it, loading primes the journal as well
+            session_data = self._journal(session_path, session_id, prime=False).load()
+            if session_data is None:
                 return None
                 
-            with open(session_file, 'r', encoding='utf-8') as f:
-                session_data = json.load(f)
-                
             # Convert memory dict back to AgentMemory instance
             memory_data = session_data.get("memory", {})
             memory = AgentMemory.from_dict(memory_data)
@@ -85,62 +85,45 @@ class SessionManager:
             print(f"Error loading session {session_id}: {e}")
             return None
     
-    def list_sessions(self) -> List[Dict[str, str]]:
+    def save_title(self, session_path: str, session_id: str, title: str) -> None:
+        """
+        Save the generated title of a session to utils/title.txt and the session index
+        
+        Args:
+            session_path: Path to the session directory
+            session_id: Unique identifier for the session
+            title: The generated title
         """
-        List all available sessions
+        title_file = Path(session_path) / "utils" / "title.txt"
+        title_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(title_file, "w") as f:
+            f.write(title)
+
+        get_session_index().set_title(session_id, title)
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0,
+                      sort: str = "timestamp", descending: bool = True) -> List[Dict[str, str]]:
+        """
+        List the available sessions from the session index
         
+        Args:
+            limit: Optional page size, all sessions if None
+            offset: Number of sessions to skip
+            sort: Column to sort by (timestamp, title, message_count, size_bytes)
+            descending: Sort direction, most recent first by default
+            
         Returns:
-            List of session metadata (id, timestamp, title)
+            List of session metadata (id, timestamp, title, message count, size)
         """
-        sessions = []
         try:
-            for folders in Path(MAIN_PATH).iterdir():
-                for file in folders.iterdir():
-                    for session_file in file.glob("*.json"):
-                        try:
-                            with open(session_file, 'r', encoding='utf-8') as f:
-                                session_data = json.load(f)
-                            
-                            # Check for AI generated title first
-                            session_id = session_data["session_id"]
-                            session_path = session_data.get("session_path", file.parent)
-                            title_file = Path(session_path) / "utils" / "title.txt"
-                            
-                            title = "New Chat"  # Default title
-                            
-                            # Try to read generated title first
-                            if title_file.exists():
-                                try:
-                                    with open(title_file, 'r', encoding='utf-8') as tf:
-                                        generated_title = tf.read().strip()
-                                        if generated_title:
-                                            title = generated_title
-                                except Exception as e:
-                                    print(f"Error reading title file {title_file}: {e}")
-                            
-                            # If no generated title, fall back to first user message
-                            if title == "New Chat":
-                                memory_data = session_data.get("memory", {})
-                                chat_history = memory_data.get("chat_history", [])
-                                
-                                for msg in chat_history:
-                                    if msg.get("role") == "user":
-                                        content = msg.get("content", "")
-                                        title = content[:50] + "..." if len(content) > 50 else content
-                                        break
-                            
-                            sessions.append({
-                                "session_id": session_data["session_id"],
-                                "timestamp": session_data["timestamp"],
-                                "title": title
-                            })
-                        except Exception as e:
-                            print(f"Error reading session file {session_file}: {e}")
-                            continue
-                        
-            # Sort by timestamp (most recent first)
-            sessions.sort(key=lambda s: s["timestamp"], reverse=True)
-            return sessions
+            index = get_session_index()
+
+            # The first use indexes the sessions saved before the index existed
+            if not index.is_built:
+                index.rebuild()
+
+            return index.list(limit=limit, offset=offset, sort=sort, descending=descending)
         except Exception as e:
             print(f"Error listing sessions: {e}")
             return []
@@ -160,9 +143,17 @@ class SessionManager:
             session_dir = Path(session_path)
             print(f"Deleting session {session_id} from path {session_dir}")  # Debug log
 
+            with self._journals_lock:
+                journal = self.journals.pop(session_id, None)
+            if journal is not None:
+                journal.close()
+
+            get_session_index().delete(session_id)
+
             if session_dir.exists() and session_dir.is_dir():
                 print(f"Session directory found: {session_dir}")
                 shutil.rmtree(session_dir)  # Recursively delete the directory and its contents
+                drop_manifest(session_path)
                 print(f"Session {session_id} deleted successfully.")
                 return True
             else:
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from typing import Optional
+import gc
+import os
+import threading
+
+from config import SESSION_REGISTRY_MAX_SESSIONS, SESSION_REGISTRY_MAX_RSS_MB
+from main import init_agent
+from session_manager import session_manager
+from SessionRAG.manifest import drop_manifest
+from memory.rewrite_cache import drop_rewrite_cache
+
+
+def _current_rss_mb() -> Optional[float]:
+    """
+    Returns the resident memory of the process in MB, None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def new_processing_state() -> dict:
+    return {
+        "is_processing": False,
+        "result": None,
+        "current_question": None
+    }
+
+
+class SessionRegistry:
+    """
+    Keeps the states of recently used sessions resident (memory, agent, tools and the corpus view),
+    so switching between chats does not rebuild them with init_agent.
+    The models and the embedder are shared by every session. Cold sessions are saved and evicted
+    in LRU order once the session count or the process memory exceeds its budget.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_REGISTRY_MAX_SESSIONS,
+                 max_rss_mb: float = SESSION_REGISTRY_MAX_RSS_MB, debug: bool = False):
+        self.max_sessions = max_sessions
+        self.max_rss_mb = max_rss_mb
+        self.debug = debug
+
+        self.sessions = OrderedDict()  # session_id -> state, least recently used first
+        self.shared = None             # llm, deterministic and embeddings, created with the first session
+        self.current_id = None         # the session of requests that do not name one
+
+        self._lock = threading.RLock()
+
+    def _register(self, state: dict) -> dict:
+        state.setdefault("processing", new_processing_state())
+
+        with self._lock:
+            if self.shared is None:
+                self.shared = {key: state[key] for key in ("llm", "deterministic", "embeddings")}
+
+            self.sessions[state["session_id"]] = state
+            self.sessions.move_to_end(state["session_id"])
+            self._enforce_budget(keep=state["session_id"])
+
+        return state
+
+    def new(self) -> dict:
+        """
+        Creates a new session with the shared models and makes it the current one.
+        """
+        state = self._register(init_agent(passed_state=self.shared, debug=self.debug))
+        self.current_id = state["session_id"]
+        return state
+
+    def resident(self, session_id: str = None) -> Optional[dict]:
+        """
+        Returns the state of a resident session without loading anything, None if it is not resident.
+        """
+        with self._lock:
+            session_id = session_id or self.current_id
+            state = self.sessions.get(session_id)
+            if state is not None:
+                self.sessions.move_to_end(session_id)
+            return state
+
+    def get(self, session_id: str = None) -> dict:
+        """
+        Returns the state of the session, loading it from disk if it is not resident.
+        Without a session_id the current session is returned, or a new one is created.
+        """
+        state = self.resident(session_id)
+        if state is not None:
+            return state
+
+        if session_id is None and self.current_id is None:
+            return self.new()
+
+        session_id = session_id or self.current_id
+        print(f"Session {session_id} is not resident, loading it")
+
+        state = init_agent(passed_state=self.shared, session_id=session_id, debug=self.debug)
+
+        # Another request may have loaded it meanwhile, the first one wins so both share a memory
+        with self._lock:
+            if session_id in self.sessions:
+                return self.resident(session_id)
+            return self._register(state)
+
+    def activate(self, session_id: str) -> dict:
+        """
+        Makes the session the current one, loading it if needed.
+        """
+        state = self.get(session_id)
+        self.current_id = state["session_id"]
+        return state
+
+    def save(self, state: dict) -> bool:
+        return session_manager.save_session(session_id=state["session_id"], session_path=state["session_path"],
+                                            memory=state["memory"])
+
+    def evict(self, session_id: str, save: bool = True) -> None:
+        """
+        Saves the session and drops it and its per-session caches from memory.
+        """
+        with self._lock:
+            state = self.sessions.pop(session_id, None)
+            if self.current_id == session_id:
+                self.current_id = None
+
+        if state is None:
+            return
+
+        if save:
+            self.save(state)
+
+        drop_manifest(state["session_path"])
+        drop_rewrite_cache(state["session_path"])
+
+        if self.debug: print(f"Session {session_id} evicted from the registry")
+
+    def remove(self, session_id: str) -> None:
+        """
+        Drops a deleted session without saving it, which would recreate its files.
+        """
+        self.evict(session_id, save=False)
+
+    def _enforce_budget(self, keep: str) -> None:
+        # Sessions with a running agentic task are never evicted, their task still writes to the state,
+        # nor is the current session, requests without a session_id would get a new empty one
+        candidates = [session_id for session_id, state in self.sessions.items()
+                      if session_id not in (keep, self.current_id) and not state["processing"]["is_processing"]]
+
+        while candidates and len(self.sessions) > self.max_sessions:
+            self.evict(candidates.pop(0))
+
+        if self.max_rss_mb:
+            rss = _current_rss_mb()
+            while candidates and rss is not None and rss > self.max_rss_mb:
+                self.evict(candidates.pop(0))
+                gc.collect()
+                rss = _current_rss_mb()
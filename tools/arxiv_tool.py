@@ -1,6 +1,7 @@
 import arxiv
 from langchain.tools import Tool
 from memory.memory import AgentMemory
+from utils import tool_error
 import json
 import os
 from datetime import datetime
@@ -60,13 +61,13 @@ def search_arxiv_details(query: str, memory, max_results: int = 3, ) -> str:
             memory.arxiv_links.append([paper_link, result.title])
 
         if not formatted_results:
-            return "No results found on ArXiv for that query."
+            return tool_error("No results found on ArXiv for that query.")
 
         return "\n---\n".join(formatted_results)
 
     except Exception as e:
         print("error")
-        return f"An error occurred during ArXiv search: {e}"
+        return tool_error(f"An error occurred during ArXiv search: {e}")
 
 
 def search_arxiv_tool_input(input_data: str, memory: AgentMemory, debug: bool = False) -> str:
@@ -85,7 +86,7 @@ def search_arxiv_tool_input(input_data: str, memory: AgentMemory, debug: bool =
     elif isinstance(input_data, str):
         input_data = input_data.strip()
         if not input_data:
-            return "Empty input received. Please provide a search query."
+            return tool_error("Empty input received. Please provide a search query.")
     
         if debug:
             print("Input is a string, trying to parse it...")
@@ -119,10 +120,10 @@ def search_arxiv_tool_input(input_data: str, memory: AgentMemory, debug: bool =
                 max_results = int(max_results_match.group(1))
 
     else:
-        return "Invalid input type. Please provide a string or dictionary."
+        return tool_error("Invalid input type. Please provide a string or dictionary.")
 
     if not query:
-        return "Missing 'query'. Please provide a valid search term."
+        return tool_error("Missing 'query'. Please provide a valid search term.")
 
     #print(f"Running search with query='{query}', max_results={max_results}")
     result = search_arxiv_details(query=query, memory=memory, max_results=max_results)
@@ -5,15 +5,21 @@ from config import MAIN_PATH
 import ast
 import re 
 from SessionRAG import add_to_rag
+from utils import tool_error
 
-def bound_download_tool(input_indices_str, links, vectorstore, session_path: str = MAIN_PATH) -> Tuple[str, List[str]]:
+def bound_download_tool(input_indices_str, links, vectorstore, session_path: str = MAIN_PATH):
     """
     Wrapper function for the download tool for agent use.
     Accepts a string of indices, converts it to a list, and calls the download function.
+    Returns the summary message and the downloaded file paths, or a tool_error if nothing was downloaded.
     """
     print(f"\n\n\n\n\n\nDownload tool invoked, Input indices string: {input_indices_str}\n\n\n\n\n")
     input_indices = ast.literal_eval(input_indices_str)  # Converts "[1, 2]" -> [1, 2]
-    return download_arxiv_pdfs(input_indices, links, vectorstore, save_directory=session_path)
+    summary_msg, downloaded_file_paths = download_arxiv_pdfs(input_indices, links, vectorstore, save_directory=session_path)
+
+    if not downloaded_file_paths:
+        return tool_error(f"No PDFs downloaded for {input_indices_str}, the indices refer to the last arxiv_search result.")
+    return summary_msg, downloaded_file_paths
 
 def download_arxiv_pdfs(choices: List[int], links: List[str], vectorstore, save_directory: str = MAIN_PATH) -> Tuple[str, List[str]]:
     """Downloads PDFs from ArXiv based on user choices and saves them to a specified directory.
@@ -1,4 +1,5 @@
 from config import MAIN_PATH
+from utils import tool_error
 
 def list_directory(filetype: str = None, session_path: str = None) -> list[str]:
     """
@@ -9,7 +10,7 @@ def list_directory(filetype: str = None, session_path: str = None) -> list[str]:
         filetype (str): Optional file extension to filter files (e.g., 'pdf').
         session_path (str): Path to the directory to list files from.
     Returns:
-        list[str]: Sorted list of file names in the directory.
+        list[str]: Sorted list of file names in the directory, a tool_error if it cannot be listed.
     """
     import os
 
@@ -24,7 +25,7 @@ def list_directory(filetype: str = None, session_path: str = None) -> list[str]:
         return sorted(files)
     
     except Exception as e:
-        return [f"Error listing directory: {e}"]
+        return tool_error(f"Listing the directory failed: {e}")
 
 def list_files_tool_wrapper(input: str = "", session_path: str = None) -> list[str]:
 
@@ -8,6 +8,7 @@ import fitz
 from PIL import Image
 import io
 from config import MAIN_PATH
+from utils import tool_error
 
 class ImageDescribeInput(BaseModel):
     
@@ -43,7 +44,7 @@ class Phi4MMTool(BaseTool):
                 path = Path(image_path)
                 
                 if not path.exists():
-                    return f"❌ File {image_path} not found."
+                    return tool_error(f"File {image_path} not found.")
 
                 #pdf okuma
                 if path.suffix.lower() == ".pdf" and pdf_page is not None:
@@ -56,9 +57,9 @@ class Phi4MMTool(BaseTool):
 
 
                 else:
-                    return f"❌ Unsupported file type: {path.suffix}"
+                    return tool_error(f"Unsupported file type: {path.suffix}")
             except Exception as e:
-                return f"❌ Failed to read file: {e}"
+                return tool_error(f"Failed to read file: {e}")
 
         payload = {
             "model": "microsoft/Phi-4-multimodal-instruct",
@@ -83,7 +84,7 @@ class Phi4MMTool(BaseTool):
             response.raise_for_status()
             return response.json()["choices"][0]["message"]["content"]
         except Exception as e:
-            return f"❌ Error querying Phi-4-MM: {str(e)}"
+            return tool_error(f"Querying Phi-4-MM failed: {str(e)}")
 
     def pdf_page_to_base64(self, pdf_path: str, page_number: int) -> str:
         
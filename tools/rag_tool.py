@@ -1,21 +1,25 @@
 from langchain.schema import Document
 from SessionRAG import similarity_search
 from config import MAIN_PATH
+from utils import tool_error
 import os
 
-def rag_search(vectorstore, query: str, file: str = None, debug:bool = True) -> list[Document]:
+def rag_search(vectorstore, query: str | list[str], file: str = None, debug:bool = True) -> list[Document]:
     """
     Perform a similarity search in the vector store and return the results.
 
     Args:
-        query (str): The query string to search for.
+        query (str | list[str]): The query string, or several query strings, to search for.
         vectorstore: The vector store to search in.
         embeddings: The embeddings used for the search.
 
     Returns:
         list[Document]: A list of documents that match the query.
     """
-    if not query.strip():
+    if isinstance(query, str):
+        query = query.strip()
+
+    if not query:
         if debug: raise ValueError("Query Not Found")
         return []
 
@@ -37,11 +41,12 @@ def rag_search_wrapper(vectorstore, input_string: str, debug: bool = False) -> l
     
     Args:
         input_string (str): The input string containing the query and file name. This will get parsed to extract the query and file name.
+                            Several queries can be given separated by "|", or as several "query:" parts.
         vectorstore: The vector store to search in.
         debug (bool): Whether to print debug information.
 
     Returns:
-        list[Document]: A list of documents that match the query.
+        list[Document]: A list of documents that match the query, a tool_error if the input has no query.
     """
     try:
         # Normalize the input string, remove unnecessary characters, parts etc.
@@ -49,7 +54,7 @@ def rag_search_wrapper(vectorstore, input_string: str, debug: bool = False) -> l
         parts = input_string.split(",")
         if debug: print(f"Normalized parts: {parts}")
 
-        query = None
+        queries = []
         file = None
 
         for part in parts:
@@ -58,8 +63,8 @@ def rag_search_wrapper(vectorstore, input_string: str, debug: bool = False) -> l
                 key, value = map(str.strip, part.split(":", 1))  # Use `split(":", 1)` to avoid errors with multiple colons
                 key = key.lower()
                 if debug: print(f"Key: {key}, Value: {value}")
-                if "query" in key:
-                    query = value
+                if "query" in key or "queries" in key:
+                    queries.extend(q.strip() for q in value.split("|") if q.strip())
                 elif "file" in key:
                     file = value
             except ValueError:
@@ -67,13 +72,14 @@ def rag_search_wrapper(vectorstore, input_string: str, debug: bool = False) -> l
                     print(f"Error parsing part: {part}")
                 continue
 
-        if not query:
+        if not queries:
             raise ValueError("Query is required in the input string.")
 
-        # Perform the RAG search
+        # Perform the RAG search, multiple queries are searched in a single batch
+        query = queries[0] if len(queries) == 1 else queries
         return rag_search(vectorstore, query=query, file=file, debug=debug)
 
     except Exception as e:
         if debug:
             print(f"Error parsing input string: {e}")
-        return []
\ No newline at end of file
+        return tool_error(f"RAG search failed: {e}")
\ No newline at end of file
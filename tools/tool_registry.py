@@ -4,6 +4,7 @@ from langchain.tools import Tool
 from . import phi4multimodal
 
 from memory.memory import AgentMemory
+from memory.tool_memo import memoize_tool
 from .search_and_summarize import search_and_summarize
 from .arxiv_tool import search_arxiv_tool_input
 from .download_arxiv_pdfs import bound_download_tool
@@ -13,6 +14,18 @@ from .rag_tool import rag_search_wrapper
 from functools import partial
 
 
+def _arxiv_links(memory: AgentMemory, links: list = None) -> list:
+    """
+    Returns a copy of the arxiv links of the memory, or restores them from a memoized arxiv_search,
+    so a following download_arxiv_pdfs uses the papers of that search.
+    """
+    if links is None:
+        return [list(link) for link in memory.arxiv_links]
+
+    memory.arxiv_links[:] = [list(link) for link in links]
+    return links
+
+
 def initialize_tools(llm, memory : AgentMemory, 
                      vectorstore, 
                      session_path: str = None,
@@ -36,7 +49,7 @@ def initialize_tools(llm, memory : AgentMemory,
 
     search_tool = Tool.from_function(
         name="search_tool",
-        func=lambda search: search_and_summarize(llm, search),
+        func=memoize_tool("search_tool", lambda search: search_and_summarize(llm, search), memory),
         description=(
             "Searches the web for up-to-date information, including breaking news. "
             "Accepts a natural language query as input. "
@@ -50,7 +63,8 @@ def initialize_tools(llm, memory : AgentMemory,
 
     arxiv_tool = Tool.from_function(
         name="arxiv_search",
-        func=lambda input_data: search_arxiv_tool_input(input_data, memory),
+        func=memoize_tool("arxiv_search", lambda input_data: search_arxiv_tool_input(input_data, memory), memory,
+                          restore=lambda links=None: _arxiv_links(memory, links)),
         description=(
             "Searches ArXiv for academic papers. "
             "Accepts a dictionary with 'query': (str), 'max_results': (int).' "
@@ -61,7 +75,11 @@ def initialize_tools(llm, memory : AgentMemory,
     download_tool = Tool.from_function(
 
         name="download_arxiv_pdfs",
-        func=lambda input_data: bound_download_tool(input_indices_str=input_data, links=memory.arxiv_links, session_path=session_path, vectorstore=vectorstore),  # return just the message
+        func=memoize_tool("download_arxiv_pdfs",
+                          lambda input_data: bound_download_tool(input_indices_str=input_data, links=memory.arxiv_links, session_path=session_path, vectorstore=vectorstore),  # return just the message
+                          memory,
+                          scope=lambda: str(memory.arxiv_links),  # the indices refer to the last arxiv_search
+                          invalidates="rag_search"),  # new papers change what rag_search finds
         description=("Downloads the PDF versions of academic papers from the last arxiv_search. It saves them locally for extensive analysis of the academic resources."
                      "Accepts a list of the wanted papers to be downloaded. " 
                      "Example input: '[x, y ,z]' where the x,y,z letters correspond to the indices of the papers in the last arxiv_search result.")
@@ -80,7 +98,7 @@ def initialize_tools(llm, memory : AgentMemory,
 
     wolfram_tool = Tool.from_function(
         name="wolfram_search",
-        func=lambda input_data: run_wolfram_alpha_query(query=input_data),
+        func=memoize_tool("wolfram_search", lambda input_data: run_wolfram_alpha_query(query=input_data), memory),
         description=(
             "Queries the Wolfram Alpha API for computational knowledge. "
             "Accepts a natural language query as input. "
@@ -90,13 +108,15 @@ def initialize_tools(llm, memory : AgentMemory,
 
     rag_tool = Tool.from_function(
         name="rag_search",
-        func=lambda input_data: rag_search_wrapper(vectorstore=vectorstore,
-                                                   input_string=input_data,
-                                                   debug=debug),
+        func=memoize_tool("rag_search",
+                          lambda input_data: rag_search_wrapper(vectorstore=vectorstore,
+                                                                input_string=input_data,
+                                                                debug=debug),
+                          memory),
         description=(
             "Performs a similarity search in the vector store and returns the results. "
-            "Accepts a query string and a file name as input. "
-            "Example input: 'query: your search query here, file: your_file_name.pdf'"
+            "Accepts a query string and a file name as input. Multiple queries can be separated by '|' in one call. "
+            "Example input: 'query: your search query here | another query, file: your_file_name.pdf'"
         )
     )
 
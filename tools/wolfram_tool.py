@@ -28,17 +28,24 @@ async def tolerant_aquery(self, input, params=(), **kw):
 
 from langchain_community.utilities import WolframAlphaAPIWrapper
 from pd_secrets import WOLFRAM_ALPHA_APPID
+from utils import tool_error
+
+# The answer of WolframAlphaAPIWrapper.run when the query has no result
+WOLFRAM_NO_ANSWER = "Wolfram Alpha wasn't able to answer it"
 
 def run_wolfram_alpha_query(query:str):
     """Runs a Wolfram Alpha query using the provided query string.
     Args:
         query (str): The query string to send to Wolfram Alpha.
     Returns:
-        str: The response from Wolfram Alpha.
+        str: The response from Wolfram Alpha, a tool_error if it has no answer.
     """
     wolframalpha.Client.aquery = tolerant_aquery
 
     api = WolframAlphaAPIWrapper(wolfram_alpha_appid=WOLFRAM_ALPHA_APPID)
 
-    return api.run(query)
+    answer = api.run(query)
+    if answer.strip() == WOLFRAM_NO_ANSWER:
+        return tool_error(f"{WOLFRAM_NO_ANSWER}, try rephrasing the query.")
+    return answer
 
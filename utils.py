@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from config import MAIN_PATH, SESSION_BASED_PATHING
+from config import MAIN_PATH, SESSION_BASED_PATHING, TOKENIZER_ENCODING
 import os
 import re 
 
@@ -39,6 +39,34 @@ def extract_tool_names(conversation:dict) -> list[str]:
                         tool_names.add(fn['name'])
     return sorted(tool_names)
 
+# Tools report a failure instead of a result with this prefix, like the error messages of failed tool calls
+TOOL_ERROR_PREFIX = "Error: "
+
+def tool_error(message: str) -> str:
+    """
+    Returns the output of a tool reporting a failure, see is_tool_error.
+    """
+    return TOOL_ERROR_PREFIX + message
+
+def is_tool_error(output) -> bool:
+    return isinstance(output, str) and output.startswith(TOOL_ERROR_PREFIX)
+
+def extract_tool_errors(conversation: dict) -> list[str]:
+    """
+    Extracts the names of the tools whose calls failed in a conversation dictionary:
+    tool messages with an error status (the tool raised) or a tool_error output.
+    """
+    failed = set()
+    for msg in conversation.get('messages', []):
+        if isinstance(msg, dict):
+            kind, name, status, content = msg.get('type') or msg.get('role'), msg.get('name'), msg.get('status'), msg.get('content')
+        else:
+            kind, name, status, content = getattr(msg, 'type', None), getattr(msg, 'name', None), getattr(msg, 'status', None), getattr(msg, 'content', None)
+
+        if kind == 'tool' and (status == 'error' or is_tool_error(content)):
+            failed.add(name or 'unknown')
+    return sorted(failed)
+
 
 def create_session_id() -> str:
     """
@@ -72,4 +100,54 @@ def get_user_prompts(conversation: list[dict]) -> list[dict]:
     """
     user_messages = [entry for entry in conversation if entry.get("role") == "user"]
 
-    return user_messages
\ No newline at end of file
+    return user_messages
+
+_encoding = None
+
+
+def _get_encoding():
+    """
+    Returns the tokenizer encoding, False if it is not available (tiktoken missing or the encoding not downloadable).
+    """
+    global _encoding
+
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"Tokenizer {TOKENIZER_ENCODING} not available, estimating tokens from characters: {e}")
+            _encoding = False
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of a text with the model's tokenizer, about 4 characters per token without it.
+    """
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """
+    Cuts a text down to max_tokens tokens, marking the cut.
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): The token budget, the marker included.
+        keep (str): "head" keeps the start of the text, "tail" keeps the end.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    max_tokens = max(0, max_tokens - 2)  # Room for the marker
+    encoding = _get_encoding()
+
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        kept = tokens[:max_tokens] if keep == "head" else tokens[len(tokens) - max_tokens:]
+        text = encoding.decode(kept)
+    else:
+        text = text[:max_tokens * 4] if keep == "head" else text[len(text) - max_tokens * 4:]
+
+    return text + " [...]" if keep == "head" else "[...] " + text